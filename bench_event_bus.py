@@ -0,0 +1,94 @@
+import argparse
+import json
+import multiprocessing
+import statistics
+import time
+from typing import Dict, List
+
+from event_bus import EventBus
+
+
+def bus_echo(name: str, count: int, spin: int):
+    # Forked from the creator, so it shares the creator's resource tracker
+    bus = EventBus.attach(name, "gesture", shared_tracker=True)
+    for _ in range(count):
+        _, topic, data = bus.wait(spin=spin)
+        while not bus.publish("pong", data):
+            pass
+    bus.close()
+
+
+def queue_echo(requests: multiprocessing.Queue, replies: multiprocessing.Queue, count: int):
+    for _ in range(count):
+        replies.put(requests.get())
+
+
+def bus_round_trips(count: int, spin: int) -> List[float]:
+    bus = EventBus.create()
+    echo = multiprocessing.Process(target=bus_echo, args=(bus.name, count, spin))
+    echo.start()
+    rtts = []
+    try:
+        for i in range(count):
+            start = time.perf_counter_ns()
+            bus.publish("ping", {"seq": i})
+            bus.wait(spin=spin)
+            rtts.append((time.perf_counter_ns() - start) / 1e3)
+        echo.join()
+    finally:
+        bus.close()
+    return rtts
+
+
+def queue_round_trips(count: int) -> List[float]:
+    requests, replies = multiprocessing.Queue(), multiprocessing.Queue()
+    echo = multiprocessing.Process(target=queue_echo, args=(requests, replies, count))
+    echo.start()
+    rtts = []
+    for i in range(count):
+        start = time.perf_counter_ns()
+        requests.put(("ping", {"seq": i}))
+        replies.get()
+        rtts.append((time.perf_counter_ns() - start) / 1e3)
+    echo.join()
+    return rtts
+
+
+def summarize(rtts: List[float], warmup: int) -> Dict:
+    measured = sorted(rtts[warmup:])
+    return {
+        'count': len(measured),
+        'mean_us': statistics.fmean(measured),
+        'p50_us': measured[len(measured) // 2],
+        'p99_us': measured[min(len(measured) - 1, round(0.99 * (len(measured) - 1)))],
+        'max_us': measured[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Round-trip latency of the shared-memory event bus '
+                                                 'against a multiprocessing.Queue pair')
+    parser.add_argument('--count', type=int, default=5000, help='Round trips per transport')
+    parser.add_argument('--warmup', type=int, default=200, help='Round trips left out of the statistics')
+    parser.add_argument('--spin', type=str, default='0,200',
+                        help='Comma-separated spin counts for the bus before it sleeps between checks')
+    parser.add_argument('--json', type=str, help='Also write the statistics to this file')
+    args = parser.parse_args()
+
+    results = {'queue': summarize(queue_round_trips(args.count), args.warmup)}
+    for spin in (int(value) for value in args.spin.split(',')):
+        results[f'bus spin={spin}'] = summarize(bus_round_trips(args.count, spin), args.warmup)
+
+    print(f"{args.count - args.warmup} round trips per transport, {multiprocessing.cpu_count()} CPUs")
+    print(f"{'transport':<16}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}")
+    for name, stats in results.items():
+        print(f"{name:<16}{stats['mean_us']:>10.1f}{stats['p50_us']:>10.1f}{stats['p99_us']:>10.1f}"
+              f"{stats['max_us']:>10.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import re
+import statistics
+import threading
+import time
+import urllib.request
+
+import psutil
+
+from exporter import MetricsExporter
+from monitor import SystemMetricsCollector
+
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[^}]*\})? \S+$')
+
+
+def check_page(page: str, openmetrics: bool):
+    """Minimal exposition-format check, standing in for a real Prometheus scraper."""
+    lines = page.rstrip('\n').split('\n')
+    if openmetrics and lines[-1] != '# EOF':
+        raise ValueError("OpenMetrics page does not end with # EOF")
+    for line in lines:
+        if not line.startswith('#') and not SAMPLE_LINE.match(line):
+            raise ValueError(f"Malformed sample line: {line!r}")
+        if openmetrics and line.startswith('# TYPE') and line.endswith('counter'):
+            family = line.split()[2]
+            if f'{family}_total' not in page:
+                raise ValueError(f"Counter {family} has no _total sample")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrape the metrics exporter hard and measure its cost')
+    parser.add_argument('--port', type=int, default=9108)
+    parser.add_argument('--interval', type=float, default=1.0, help='Sampling interval of the collector')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds to scrape for')
+    parser.add_argument('--scrapers', type=int, default=4, help='Concurrent scraping threads')
+    args = parser.parse_args()
+
+    collector = SystemMetricsCollector(psutil.Process())
+    exporter = MetricsExporter(collector.fields, args.port, labels={'pid': str(psutil.Process().pid)})
+    exporter.start()
+    stop = threading.Event()
+
+    def sample():
+        while not stop.is_set():
+            exporter.publish(collector.collect_values())
+            stop.wait(args.interval)
+
+    latencies = []
+
+    def scrape(openmetrics: bool):
+        headers = {'Accept': 'application/openmetrics-text; version=1.0.0'} if openmetrics else {}
+        while not stop.is_set():
+            request = urllib.request.Request(exporter.url, headers=headers)
+            start = time.perf_counter()
+            with urllib.request.urlopen(request) as response:
+                page = response.read().decode()
+            latencies.append(time.perf_counter() - start)
+            check_page(page, openmetrics)
+
+    threads = [threading.Thread(target=sample)]
+    threads += [threading.Thread(target=scrape, args=(i % 2 == 1,)) for i in range(args.scrapers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    exporter.close()
+    collector.close()
+
+    latencies.sort()
+    print(f"{len(latencies)} scrapes in {args.duration:.0f} s, {exporter.version} samples, "
+          f"{exporter.renders} renders")
+    print(f"scrape latency: p50 {statistics.median(latencies) * 1000:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+    print(exporter.page().decode())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+from intent_router import ASSISTANT_INTENTS, ASSISTANT_ROUTER, UNKNOWN, Route
+
+# Utterances with the intent and argument proton.py must route them to. The
+# ones marked as regressions were misrouted by the old if/elif substring chain.
+CORPUS = [
+    ('exit', 'exit', None),
+    ('please terminate the assistant', 'exit', None),
+    ('bye', 'sleep', None),
+    ('goodbye proton', 'sleep', None),
+    ('wake up', 'wake', None),
+    ('proton wake up please', 'wake', None),
+    ('search python tutorials', 'search', 'python tutorials'),
+    ('search for the weather in pune', 'search', 'the weather in pune'),
+    ('search', 'search', ''),
+    ('search what time it is in tokyo', 'search', 'what time it is in tokyo'),
+    ('location', 'location', None),
+    ('show me a location', 'location', None),
+    ('launch gesture recognition', 'launch_gesture', None),
+    ('please launch gesture recognition now', 'launch_gesture', None),
+    ('stop gesture recognition', 'stop_gesture', None),
+    ('copy', 'copy', None),
+    ('copy this', 'copy', None),
+    ('paste', 'paste', None),
+    ('pest', 'paste', None),
+    ('page', 'paste', None),
+    ('list', 'list', None),
+    ('back', 'back', None),
+    ('open 3', 'open_item', 3),
+    ('open 12', 'open_item', 12),
+    ('open notepad', 'open_app', 'notepad'),
+    ('open google chrome', 'open_app', 'google chrome'),
+    ('time', 'time', None),
+    ("what's the time", 'time', None),
+    ('tell me the date', 'date', None),
+    ('clear', 'clear', None),
+    ('clear the log', 'clear', None),
+    ('hi', 'greeting', None),
+    ('hello there', 'greeting', None),
+    ('hey proton', 'greeting', None),
+    ('how are you', 'how_are_you', None),
+    ('thank you', 'thanks', None),
+    ('thanks', 'thanks', None),
+    ('tell me a joke', UNKNOWN, None),
+    # Regressions of the substring chain
+    ('this', UNKNOWN, None),
+    ('update', UNKNOWN, None),
+    ('timeline', UNKNOWN, None),
+    ('research papers', UNKNOWN, None),
+    ('which is bigger', UNKNOWN, None),
+    ('set an alarm', UNKNOWN, None),
+    ('what is the update on the timeline', UNKNOWN, None),
+    ('nothing to do', UNKNOWN, None),
+    ('a photocopy shop near me', UNKNOWN, None),
+    ('they said something', UNKNOWN, None),
+    ('how are you doing this fine morning', 'how_are_you', None),
+    ('open the clock app', 'open_app', 'the clock app'),
+    ('show the history of the date palm', 'date', None),
+    ('open  7', 'open_item', 7),
+]
+
+
+def legacy_route(command: str) -> Route:
+    """The dispatch of proton.py's execute_command before it used intent_router."""
+    if any(word in command for word in ['exit', 'terminate']):
+        return 'exit', None
+    elif "bye" in command:
+        return 'sleep', None
+    elif "wake up" in command:
+        return 'wake', None
+    elif 'search' in command:
+        return 'search', command.split("search", 1)[1].strip()
+    elif 'location' in command:
+        return 'location', None
+    elif "launch gesture recognition" in command:
+        return 'launch_gesture', None
+    elif "stop gesture recognition" in command:
+        return 'stop_gesture', None
+    elif "copy" in command:
+        return 'copy', None
+    elif any(word in command for word in ["paste", "page", "pest"]):
+        return 'paste', None
+    elif command.strip() == "list":
+        return 'list', None
+    elif command.startswith("open "):
+        parts = command.split()
+        if len(parts) == 2 and parts[1].isdigit():
+            return 'open_item', int(parts[1])
+        return 'open_app', command.replace('open', '').strip()
+    elif command.strip() == "back":
+        return 'back', None
+    elif 'time' in command:
+        return 'time', None
+    elif 'date' in command:
+        return 'date', None
+    elif 'clear' in command:
+        return 'clear', None
+    elif any(greet in command for greet in ['hi', 'hello', 'hey']):
+        return 'greeting', None
+    elif "how are you" in command:
+        return 'how_are_you', None
+    elif "thank" in command:
+        return 'thanks', None
+    return UNKNOWN, None
+
+
+def check(route: Callable[[str], Route]) -> List[Dict]:
+    """The corpus entries ``route`` gets wrong."""
+    failures = []
+    for utterance, intent, argument in CORPUS:
+        got = route(utterance)
+        if got != (intent, argument):
+            failures.append({'utterance': utterance, 'expected': [intent, argument], 'got': list(got)})
+    return failures
+
+
+def latencies(route: Callable[[str], Route], utterances: List[str], repeat: int) -> Dict[str, List[float]]:
+    """Per-call routing time in microseconds for each utterance, best of ``repeat`` batches."""
+    batch = 200
+    results = {}
+    for utterance in utterances:
+        best = []
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            for _ in range(batch):
+                route(utterance)
+            best.append((time.perf_counter_ns() - start) / batch / 1e3)
+        results[utterance] = best
+    return results
+
+
+def summarize(timings: Dict[str, List[float]]) -> Dict:
+    medians = sorted(statistics.median(values) for values in timings.values())
+    return {
+        'mean_us': statistics.fmean(medians),
+        'p50_us': medians[len(medians) // 2],
+        'max_us': medians[-1],
+    }
+
+
+def by_intent(per_utterance: Dict[str, float]) -> Dict[str, float]:
+    """Median latency per expected intent, in the order of the old chain's branches."""
+    grouped = {}
+    for utterance, intent, _ in CORPUS:
+        grouped.setdefault(intent, []).append(per_utterance[utterance])
+    order = [intent.name for intent in ASSISTANT_INTENTS] + [UNKNOWN]
+    return {intent: statistics.median(grouped[intent]) for intent in order if intent in grouped}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Routing accuracy and latency of proton.py's intent router "
+                                                 "against the old if/elif substring chain")
+    parser.add_argument('--repeat', type=int, default=15, help='Timed batches per utterance')
+    parser.add_argument('--json', type=str, help='Also write the failures and statistics to this file')
+    args = parser.parse_args()
+
+    routes = {'router': ASSISTANT_ROUTER.route, 'legacy': legacy_route}
+    utterances = [utterance for utterance, _, _ in CORPUS]
+    results = {}
+    for name, route in routes.items():
+        timings = latencies(route, utterances, args.repeat)
+        results[name] = {'failures': check(route), 'latency': summarize(timings),
+                         'per_utterance_us': {utterance: statistics.median(values)
+                                              for utterance, values in timings.items()}}
+
+    print(f"{len(CORPUS)} utterances, median of {args.repeat} batches each")
+    print(f"{'dispatch':<10}{'correct':>10}{'mean us':>10}{'p50 us':>10}{'max us':>10}")
+    for name, result in results.items():
+        latency = result['latency']
+        correct = len(CORPUS) - len(result['failures'])
+        print(f"{name:<10}{correct:>6}/{len(CORPUS):<3}{latency['mean_us']:>10.2f}{latency['p50_us']:>10.2f}"
+              f"{latency['max_us']:>10.2f}")
+
+    # The old chain gets slower the further down a command's branch sits; the router should not
+    router_by_intent = by_intent(results['router']['per_utterance_us'])
+    legacy_by_intent = by_intent(results['legacy']['per_utterance_us'])
+    print(f"{'intent':<16}{'router us':>10}{'legacy us':>10}")
+    for intent, latency in router_by_intent.items():
+        print(f"{intent:<16}{latency:>10.2f}{legacy_by_intent[intent]:>10.2f}")
+
+    for failure in results['legacy']['failures']:
+        print(f"  legacy misroutes {failure['utterance']!r}: {failure['got']} instead of {failure['expected']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    for failure in results['router']['failures']:
+        print(f"Router misroutes {failure['utterance']!r}: {failure['got']} instead of {failure['expected']}")
+    if results['router']['failures']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import psutil
+
+from monitor import SystemMetricsCollector
+from probes import PROBES
+
+# Names the launchers hard-code; the benchmark replaces them with stand-ins
+CHILD_SCRIPTS = ["Gesture_Controller.py", "proton.py"]
+METRICS = ['spawn_ms', 'first_output_ms', 'launcher_rss_mb', 'teardown_ms', 'total_ms']
+
+# Two-sided 95% Student t quantiles by degrees of freedom; 1.96 beyond 30
+T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+        10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042}
+
+STAND_IN = """import time
+started = time.monotonic_ns()
+with open({stamps!r}, 'a') as f:
+    f.write(f"start {{started}}\\n")
+time.sleep({startup})
+ballast = bytearray({memory_mb} * 1024 * 1024)
+print("stand-in ready", flush=True)
+time.sleep({runtime})
+with open({stamps!r}, 'a') as f:
+    f.write(f"end {{time.monotonic_ns()}}\\n")
+"""
+
+
+def write_stand_ins(directory: str, startup: float, runtime: float, memory_mb: int):
+    """Writes the stand-in child scripts; each appends monotonic start/end stamps to a file.
+
+    CLOCK_MONOTONIC is shared by all processes on Linux, so these stamps can be
+    compared with the harness's own.
+    """
+    stamps = os.path.join(directory, 'stamps.txt')
+    for name in CHILD_SCRIPTS:
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(STAND_IN.format(stamps=stamps, startup=startup, runtime=runtime, memory_mb=memory_mb))
+    return stamps
+
+
+def prepare_launchers(directory: str, names: List[str]) -> Dict[str, List[str]]:
+    """Returns the command of each launcher, set up to start the stand-ins in ``directory``."""
+    repo = os.path.dirname(os.path.abspath(__file__))
+    launchers = {}
+    if 'python' in names:
+        # run_parallel.py starts scripts next to itself
+        shutil.copy(os.path.join(repo, 'run_parallel.py'), directory)
+        shutil.copy(os.path.join(repo, 'event_bus.py'), directory)
+        launchers['python'] = [sys.executable, os.path.join(directory, 'run_parallel.py')]
+    if 'go' in names:
+        # rp.go starts scripts in its working directory
+        binary = os.path.join(directory, 'gestureplus')
+        go = shutil.which('go')
+        if go is None:
+            print("Skipping the Go launcher: no go toolchain to build rp.go")
+        elif subprocess.run([go, 'build', '-o', binary, 'rp.go'], cwd=repo).returncode != 0:
+            print("Skipping the Go launcher: building rp.go failed")
+        else:
+            launchers['go'] = [binary]
+    return launchers
+
+
+def is_launcher_process(process: psutil.Process, directory: str) -> bool:
+    """True for the launcher and its helpers, False for the stand-ins it runs."""
+    try:
+        return not any(arg.startswith(directory) and os.path.basename(arg) in CHILD_SCRIPTS
+                       for arg in process.cmdline())
+    except psutil.Error:
+        return False
+
+
+def run_once(command: List[str], directory: str, stamps: str, interval: float) -> Dict:
+    """Runs a launcher once and measures it.
+
+    spawn_ms: launch until the last stand-in started running Python code.
+    first_output_ms: launch until the launcher printed the first stand-in line.
+    launcher_rss_mb: peak summed RSS of the launcher and its helper processes.
+    teardown_ms: last stand-in finished until the launcher exited.
+    """
+    if os.path.exists(stamps):
+        os.remove(stamps)
+
+    first_output = []
+    launched = time.monotonic_ns()
+    process = subprocess.Popen(command, cwd=directory, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True)
+
+    def read_output():
+        for line in process.stdout:
+            if not first_output and 'stand-in ready' in line:
+                first_output.append(time.monotonic_ns())
+
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+
+    # The existing collector samples each launcher process; only memory matters here
+    root = psutil.Process(process.pid)
+    probe_set = PROBES.detect(root, ['memory'])
+    collectors = {}
+    peak_rss = 0.0
+    while process.poll() is None:
+        try:
+            tree = [root] + root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            break
+        rss = 0.0
+        for member in tree:
+            if member.pid not in collectors:
+                if not is_launcher_process(member, directory):
+                    continue
+                collectors[member.pid] = SystemMetricsCollector(member, probe_set)
+            metrics = collectors[member.pid].collect_metrics()
+            if metrics is not None:
+                rss += metrics['memory_rss_mb']
+        peak_rss = max(peak_rss, rss)
+        time.sleep(interval)
+
+    process.wait()
+    exited = time.monotonic_ns()
+    reader.join()
+    probe_set.close()
+
+    with open(stamps) as f:
+        events = [line.split() for line in f]
+    starts = [int(stamp) for kind, stamp in events if kind == 'start']
+    ends = [int(stamp) for kind, stamp in events if kind == 'end']
+    if len(starts) != len(CHILD_SCRIPTS) or len(ends) != len(CHILD_SCRIPTS):
+        raise RuntimeError(f"{command[0]}: expected {len(CHILD_SCRIPTS)} stand-ins, stamps were {events}")
+
+    return {
+        'spawn_ms': (max(starts) - launched) / 1e6,
+        'first_output_ms': (first_output[0] - launched) / 1e6 if first_output else None,
+        'launcher_rss_mb': peak_rss,
+        'teardown_ms': (exited - max(ends)) / 1e6,
+        'total_ms': (exited - launched) / 1e6,
+    }
+
+
+def confidence_interval(values: List[float]):
+    """Mean and the half-width of its 95% confidence interval."""
+    mean = statistics.fmean(values)
+    if len(values) < 2:
+        return mean, float('nan')
+    dof = len(values) - 1
+    t = T_95[max(k for k in T_95 if k <= dof)] if dof <= 30 else 1.96
+    return mean, t * statistics.stdev(values) / len(values) ** 0.5
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    summary = {}
+    for metric in METRICS:
+        values = [run[metric] for run in runs if run[metric] is not None]
+        if not values:
+            continue
+        mean, half_width = confidence_interval(values)
+        summary[metric] = {
+            'mean': mean,
+            'ci95': half_width,
+            'median': statistics.median(values),
+            'min': min(values),
+            'max': max(values),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the run_parallel.py and rp.go launchers')
+    parser.add_argument('--runs', type=int, default=10, help='Measured runs per launcher')
+    parser.add_argument('--warmup', type=int, default=1, help='Unmeasured runs per launcher first')
+    parser.add_argument('--launchers', type=str, default='python,go', help='Comma-separated: python, go')
+    parser.add_argument('--child-startup', type=float, default=0.0,
+                        help='Seconds each stand-in sleeps before printing its first line')
+    parser.add_argument('--child-runtime', type=float, default=0.5,
+                        help='Seconds each stand-in runs after its first line')
+    parser.add_argument('--child-memory-mb', type=int, default=0, help='Memory each stand-in allocates')
+    parser.add_argument('--interval', type=float, default=0.02, help='Launcher RSS sampling interval')
+    parser.add_argument('--json', type=str, help='Also write all runs and statistics to this file')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='bench_launchers_') as directory:
+        stamps = write_stand_ins(directory, args.child_startup, args.child_runtime, args.child_memory_mb)
+        launchers = prepare_launchers(directory, [name.strip() for name in args.launchers.split(',')])
+        for name, command in launchers.items():
+            for _ in range(args.warmup):
+                run_once(command, directory, stamps, args.interval)
+            runs = [run_once(command, directory, stamps, args.interval) for _ in range(args.runs)]
+            results[name] = {'command': command, 'runs': runs, 'summary': summarize(runs)}
+
+    print(f"{args.runs} runs per launcher, stand-ins: {args.child_startup}s startup, "
+          f"{args.child_runtime}s runtime, {args.child_memory_mb} MB")
+    print(f"{'launcher':<10}{'metric':<18}{'mean':>10}{'95% CI':>10}{'median':>10}{'min':>10}{'max':>10}")
+    for name, result in results.items():
+        for metric, stats in result['summary'].items():
+            print(f"{name:<10}{metric:<18}{stats['mean']:>10.1f}{'±':>3}{stats['ci95']:>7.1f}"
+                  f"{stats['median']:>10.1f}{stats['min']:>10.1f}{stats['max']:>10.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
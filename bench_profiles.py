@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+from bench_launchers import confidence_interval
+
+METRICS = ['frame_p50_ms', 'frame_p95_ms', 'frame_p99_ms', 'dropped_frames', 'gesture_cpu_s', 'voice_cpu_s']
+
+# Stands in for Gesture_Controller.py: a fixed amount of work per camera frame on a fixed frame clock.
+# Latency is from when the frame was due until its work finished, so waiting for a CPU counts.
+GESTURE_STAND_IN = """import json, resource, time
+period = 1 / {fps}
+latencies, dropped = [], 0
+due = time.monotonic()
+end = due + {duration}
+while due < end:
+    delay = due - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+    total = 0
+    for i in range({frame_work}):
+        total += i * i
+    latencies.append((time.monotonic() - due) * 1000)
+    due += period
+    behind = time.monotonic() - due
+    if behind > 0:
+        skipped = int(behind // period) + 1
+        dropped += skipped
+        due += skipped * period
+usage = resource.getrusage(resource.RUSAGE_SELF)
+with open({result!r}, 'w') as f:
+    json.dump({{'latencies_ms': latencies, 'dropped': dropped, 'cpu_s': usage.ru_utime + usage.ru_stime}}, f)
+"""
+
+# Stands in for proton.py's CPU-heavy moments; like a native library, it runs as many
+# workers as OMP_NUM_THREADS allows, so thread caps in a profile take effect
+VOICE_STAND_IN = """import json, os, resource, time
+workers = int(os.environ.get('OMP_NUM_THREADS', os.cpu_count() or 1))
+pids = []
+for _ in range(workers):
+    pid = os.fork()
+    if pid == 0:
+        end = time.monotonic() + {duration}
+        while time.monotonic() < end:
+            pass
+        os._exit(0)
+    pids.append(pid)
+for pid in pids:
+    os.waitpid(pid, 0)
+usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+with open({result!r}, 'w') as f:
+    json.dump({{'workers': workers, 'cpu_s': usage.ru_utime + usage.ru_stime}}, f)
+"""
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+def write_stand_ins(directory: str, fps: float, frame_work: int, duration: float):
+    results = {name: os.path.join(directory, f'{name}.json') for name in ('gesture', 'voice')}
+    with open(os.path.join(directory, 'Gesture_Controller.py'), 'w') as f:
+        f.write(GESTURE_STAND_IN.format(fps=fps, frame_work=frame_work, duration=duration,
+                                        result=results['gesture']))
+    with open(os.path.join(directory, 'proton.py'), 'w') as f:
+        f.write(VOICE_STAND_IN.format(duration=duration, result=results['voice']))
+    return results
+
+
+def run_once(directory: str, profile: str, results: Dict[str, str]) -> Dict:
+    for path in results.values():
+        if os.path.exists(path):
+            os.remove(path)
+    command = [sys.executable, os.path.join(directory, 'run_parallel.py'), '--profile', profile]
+    subprocess.run(command, cwd=directory, stdout=subprocess.DEVNULL, check=True)
+
+    with open(results['gesture']) as f:
+        gesture = json.load(f)
+    with open(results['voice']) as f:
+        voice = json.load(f)
+    latencies = gesture['latencies_ms']
+    return {
+        'frame_p50_ms': percentile(latencies, 0.5),
+        'frame_p95_ms': percentile(latencies, 0.95),
+        'frame_p99_ms': percentile(latencies, 0.99),
+        'dropped_frames': gesture['dropped'],
+        'gesture_cpu_s': gesture['cpu_s'],
+        'voice_cpu_s': voice['cpu_s'],
+        'voice_workers': voice['workers'],
+    }
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    summary = {}
+    for metric in METRICS:
+        values = [run[metric] for run in runs]
+        mean, half_width = confidence_interval(values)
+        summary[metric] = {'mean': mean, 'ci95': half_width, 'median': statistics.median(values)}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare run_parallel.py launch profiles on a stand-in workload')
+    parser.add_argument('--profiles', type=str, default='default,gesture_first,isolated',
+                        help='Comma-separated built-in profile names or JSON profile files')
+    parser.add_argument('--runs', type=int, default=5, help='Measured runs per profile')
+    parser.add_argument('--duration', type=float, default=3.0, help='Seconds each run lasts')
+    parser.add_argument('--fps', type=float, default=30.0, help='Frame rate of the gesture stand-in')
+    parser.add_argument('--frame-work', type=int, default=100000,
+                        help='Loop iterations per frame in the gesture stand-in')
+    parser.add_argument('--json', type=str, help='Also write all runs and statistics to this file')
+    args = parser.parse_args()
+
+    profiles = [name.strip() for name in args.profiles.split(',')]
+    # Profile files are resolved now; the launcher runs from a temporary directory
+    profiles = [os.path.abspath(name) if os.path.isfile(name) else name for name in profiles]
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='bench_profiles_') as directory:
+        repo = os.path.dirname(os.path.abspath(__file__))
+        for name in ('run_parallel.py', 'event_bus.py'):
+            shutil.copy(os.path.join(repo, name), directory)
+        result_paths = write_stand_ins(directory, args.fps, args.frame_work, args.duration)
+        for profile in profiles:
+            runs = [run_once(directory, profile, result_paths) for _ in range(args.runs)]
+            results[profile] = {'runs': runs, 'summary': summarize(runs)}
+
+    print(f"{args.runs} runs per profile, {args.duration}s at {args.fps:g} fps, {os.cpu_count()} CPUs")
+    print(f"{'profile':<16}{'metric':<16}{'mean':>10}{'95% CI':>10}{'median':>10}")
+    for profile, result in results.items():
+        name = os.path.basename(profile)
+        for metric, stats in result['summary'].items():
+            print(f"{name:<16}{metric:<16}{stats['mean']:>10.2f}{'±':>3}{stats['ci95']:>7.2f}{stats['median']:>10.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from monitor import TIMESTAMP_FIELD
+from probes import PROBES, DEFAULT_PROBES
+from session_store import SampleBuffer
+
+# The default schema: timestamp plus the fields of the default probes
+SAMPLE_FIELDS = [TIMESTAMP_FIELD] + [field for name in DEFAULT_PROBES for field in PROBES.probes[name].fields]
+SAMPLE_NAMES = [name for name, _ in SAMPLE_FIELDS]
+
+
+def synthetic_values(n: int):
+    """Pre-generates sample tuples so the benchmark measures storage, not psutil."""
+    rng = random.Random(0)
+    start = time.time_ns()
+    # Counters ('q') and counts ('i') must be ints for struct; only 'd' fields are floats
+    makers = [(lambda: rng.random() * 100) if code == 'd' else (lambda: rng.randrange(10**9))
+              for _, code in SAMPLE_FIELDS[1:]]
+    return [(start + i * 10**9,) + tuple(make() for make in makers) for i in range(n)]
+
+
+def store_as_dicts(samples):
+    """The original path: one dict per sample, formatted timestamp, DataFrame at the end."""
+    metrics_list = []
+    for values in samples:
+        metrics = {
+            'timestamp': datetime.fromtimestamp(values[0] / 1e9).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        metrics.update(zip(SAMPLE_NAMES[1:], values[1:]))
+        metrics_list.append(metrics)
+    return metrics_list
+
+
+def store_in_buffer(samples):
+    buffer = SampleBuffer(SAMPLE_FIELDS, len(samples))
+    for values in samples:
+        buffer.append(values)
+    return buffer
+
+
+def measure(store, to_frame, samples):
+    start = time.perf_counter()
+    store_result = store(samples)
+    store_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    to_frame(store_result)
+    frame_time = time.perf_counter() - start
+
+    tracemalloc.start()
+    retained = store(samples)
+    bytes_used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del retained
+
+    return {
+        'samples_per_sec': len(samples) / store_time,
+        'frame_ms': frame_time * 1000,
+        'bytes_per_sample': bytes_used / len(samples),
+    }
+
+
+def measure_live(n: int):
+    """Times real collection on this process through both collector APIs."""
+    import psutil
+    from monitor import SystemMetricsCollector
+
+    collector = SystemMetricsCollector(psutil.Process())
+    results = {}
+    for _ in range(min(n, 100)):
+        collector.collect_values()
+
+    start = time.perf_counter()
+    metrics_list = [collector.collect_metrics() for _ in range(n)]
+    pd.DataFrame(metrics_list)
+    results['dicts'] = n / (time.perf_counter() - start)
+
+    buffer = SampleBuffer(collector.fields, n)
+    start = time.perf_counter()
+    for _ in range(n):
+        buffer.append(collector.collect_values())
+    buffer.to_dataframe()
+    results['buffer'] = n / (time.perf_counter() - start)
+    collector.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sample storage in the monitor')
+    parser.add_argument('--samples', type=int, default=200000, help='Synthetic samples to store')
+    parser.add_argument('--live', type=int, default=0,
+                        help='Also time N real psutil samples of this process')
+    args = parser.parse_args()
+
+    samples = synthetic_values(args.samples)
+    before = measure(store_as_dicts, pd.DataFrame, samples)
+    after = measure(store_in_buffer, SampleBuffer.to_dataframe, samples)
+
+    print(f"{'':<16}{'samples/s':>14}{'to DataFrame':>16}{'bytes/sample':>16}")
+    for label, result in (('list of dicts', before), ('SampleBuffer', after)):
+        print(f"{label:<16}{result['samples_per_sec']:>14,.0f}"
+              f"{result['frame_ms']:>13.1f} ms{result['bytes_per_sample']:>16.1f}")
+    print(f"speedup: {after['samples_per_sec'] / before['samples_per_sec']:.1f}x store, "
+          f"{before['frame_ms'] / max(after['frame_ms'], 1e-6):.0f}x DataFrame, "
+          f"{before['bytes_per_sample'] / after['bytes_per_sample']:.1f}x less memory")
+
+    if args.live:
+        live = measure_live(args.live)
+        print(f"live collection: {live['dicts']:,.0f} samples/s with dicts, "
+              f"{live['buffer']:,.0f} samples/s with SampleBuffer")
+
+
+if __name__ == "__main__":
+    main()
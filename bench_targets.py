@@ -0,0 +1,78 @@
+import argparse
+import subprocess
+import time
+import tracemalloc
+
+import psutil
+
+from monitor import SystemMetricsCollector
+from multi_target import HAS_PROCFS, MultiTargetMonitor, TargetSelector
+
+
+def spawn_targets(n: int):
+    return [subprocess.Popen(['sleep', '600']) for _ in range(n)]
+
+
+def time_ticks(sample, ticks: int) -> float:
+    """Mean milliseconds per call of ``sample`` after one priming call."""
+    sample()
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sample()
+    return (time.perf_counter() - start) / ticks * 1000
+
+
+def measure(children, ticks: int):
+    pids = [child.pid for child in children]
+
+    # One SystemMetricsCollector per process, as ProcessTreeCollector does
+    collectors = [SystemMetricsCollector(psutil.Process(pid)) for pid in pids]
+    per_process = time_ticks(lambda: [collector.collect_values() for collector in collectors], ticks)
+    for collector in collectors:
+        collector.close()
+
+    by_pid = MultiTargetMonitor(TargetSelector(pids=pids), discovery_interval=3600, verbose=False)
+    multi = time_ticks(by_pid.sample, ticks)
+
+    # The oneshot() read used where there is no /proc
+    by_psutil = MultiTargetMonitor(TargetSelector(pids=pids), discovery_interval=3600, procfs=False,
+                                   verbose=False)
+    psutil_ms = time_ticks(by_psutil.sample, ticks)
+
+    # Re-resolving the name pattern on every tick is the worst case
+    by_name = MultiTargetMonitor(TargetSelector(names=['sleep']), discovery_interval=0, verbose=False)
+    by_name_ms = time_ticks(by_name.sample, ticks)
+
+    tracemalloc.start()
+    state_monitor = MultiTargetMonitor(TargetSelector(pids=pids), discovery_interval=3600, verbose=False)
+    state_monitor.sample()
+    state_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return per_process, multi, psutil_ms, by_name_ms, state_bytes / len(pids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark multi-target monitoring cost against target count')
+    parser.add_argument('--counts', type=str, default='1,10,50,100,300', help='Comma-separated target counts')
+    parser.add_argument('--ticks', type=int, default=20, help='Ticks timed per measurement')
+    args = parser.parse_args()
+
+    # Per-tick cost should grow linearly with the targets, so us/target should stay flat
+    read = '/proc' if HAS_PROCFS else 'psutil'
+    print(f"{'targets':>8}{'per-process ms':>16}{'multi ms':>10}{'psutil ms':>11}{'by name ms':>12}"
+          f"{'per-process us/target':>23}{'multi us/target':>17}{'state B/target':>16}   (multi reads {read})")
+    for n in [int(count) for count in args.counts.split(',')]:
+        children = spawn_targets(n)
+        try:
+            per_process, multi, psutil_ms, by_name, state_bytes = measure(children, args.ticks)
+        finally:
+            for child in children:
+                child.kill()
+                child.wait()
+        print(f"{n:>8}{per_process:>16.2f}{multi:>10.2f}{psutil_ms:>11.2f}{by_name:>12.2f}"
+              f"{per_process / n * 1000:>23.1f}{multi / n * 1000:>17.1f}{state_bytes:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import glob
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+CATALOG_NAME = "catalog.sqlite"
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    session_dir TEXT NOT NULL,
+    process_name TEXT,
+    script TEXT,
+    command_line TEXT,
+    mode TEXT,
+    status TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    duration_s REAL,
+    samples INTEGER,
+    cpu_mean REAL,
+    cpu_p95 REAL,
+    cpu_max REAL,
+    cpu_seconds REAL,
+    peak_rss_mb REAL,
+    rss_mean REAL,
+    alerts_fired INTEGER,
+    cataloged_at TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_process_name ON sessions (process_name, start_time);
+CREATE INDEX IF NOT EXISTS sessions_script ON sessions (script, start_time);
+CREATE INDEX IF NOT EXISTS sessions_command_line ON sessions (command_line);
+CREATE INDEX IF NOT EXISTS sessions_time ON sessions (start_time, end_time);
+"""
+
+COLUMNS = ['session_id', 'session_dir', 'process_name', 'script', 'command_line', 'mode', 'status',
+           'start_time', 'end_time', 'duration_s', 'samples', 'cpu_mean', 'cpu_p95', 'cpu_max',
+           'cpu_seconds', 'peak_rss_mb', 'rss_mean', 'alerts_fired', 'cataloged_at']
+
+# Columns query results can be ordered by
+SORTABLE = {'start_time', 'end_time', 'duration_s', 'cpu_mean', 'cpu_p95', 'cpu_max', 'cpu_seconds',
+            'peak_rss_mb', 'rss_mean', 'samples'}
+
+INTERPRETERS = re.compile(r'^(python[\d.]*|pythonw|py|go|node|bash|sh)(\.exe)?$')
+
+
+def open_catalog(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def script_name(command_line: List[str]) -> str:
+    """The program a command line runs: the script for interpreters (``proton.py``), else the executable."""
+    args = [os.path.basename(arg) for arg in command_line or []]
+    if args and INTERPRETERS.match(args[0]):
+        for arg in args[1:]:
+            if not arg.startswith('-'):
+                return arg
+    return args[0] if args else None
+
+
+def session_row(session_dir: str) -> Dict:
+    """Summarizes a finished session directory into one catalog row."""
+    from compare import summarize
+
+    with open(os.path.join(session_dir, "session_info.json")) as f:
+        info = json.load(f)
+    try:
+        summary = summarize(session_dir)
+    except (ValueError, KeyError, IndexError, OSError) as e:
+        print(f"Cataloging {session_dir} without statistics: {e}")
+        summary = {'metrics': {}}
+    if not summary.get('samples'):
+        # Stopped before its first tick: keep the session, with null statistics
+        summary = {'metrics': {}, 'samples': 0}
+    cpu = summary['metrics'].get('cpu_percent', {})
+    command_line = info.get('command_line') or []
+
+    return {
+        'session_id': os.path.basename(os.path.normpath(session_dir)),
+        'session_dir': os.path.abspath(session_dir),
+        'process_name': info.get('process_name'),
+        'script': script_name(command_line),
+        'command_line': ' '.join(command_line),
+        'mode': info.get('mode'),
+        'status': info.get('status'),
+        'start_time': info.get('start_time'),
+        'end_time': info.get('end_time'),
+        'duration_s': summary.get('duration_s'),
+        'samples': summary.get('samples', info.get('samples')),
+        'cpu_mean': cpu.get('mean'),
+        'cpu_p95': cpu.get('p95'),
+        'cpu_max': cpu.get('max'),
+        'cpu_seconds': summary.get('cpu_seconds'),
+        'peak_rss_mb': summary.get('peak_rss_mb'),
+        'rss_mean': summary['metrics'].get('memory_rss_mb', {}).get('mean'),
+        'alerts_fired': info.get('alerts_fired'),
+        'cataloged_at': datetime.now().strftime(TIME_FORMAT),
+    }
+
+
+def catalog_session(session_dir: str, catalog_path: str = None):
+    """Adds or updates a session in the catalog of its base directory."""
+    catalog_path = catalog_path or os.path.join(os.path.dirname(os.path.normpath(session_dir)), CATALOG_NAME)
+    row = session_row(session_dir)
+    with open_catalog(catalog_path) as connection:
+        connection.execute(f"INSERT OR REPLACE INTO sessions ({', '.join(COLUMNS)}) "
+                           f"VALUES ({', '.join('?' for _ in COLUMNS)})", [row[column] for column in COLUMNS])
+    connection.close()
+    return row
+
+
+def backfill(base_dir: str, catalog_path: str = None, force: bool = False) -> int:
+    """Catalogs every session directory under ``base_dir`` not cataloged yet."""
+    catalog_path = catalog_path or os.path.join(base_dir, CATALOG_NAME)
+    connection = open_catalog(catalog_path)
+    known = {row['session_id'] for row in connection.execute("SELECT session_id FROM sessions")}
+    connection.close()
+
+    added = 0
+    for info_path in sorted(glob.glob(os.path.join(base_dir, "*", "session_info.json"))):
+        session_dir = os.path.dirname(info_path)
+        if not force and os.path.basename(session_dir) in known:
+            continue
+        try:
+            catalog_session(session_dir, catalog_path)
+            added += 1
+        except (OSError, ValueError, KeyError, IndexError, sqlite3.Error) as e:
+            print(f"Skipping {session_dir}: {e}")
+    return added
+
+
+def parse_time(text: str) -> str:
+    """Accepts '2026-10-01', '2026-10-01 12:00:00' or a relative '7d', '12h', '30m'."""
+    match = re.match(r'^(\d+)([dhm])$', text)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        delta = {'d': timedelta(days=amount), 'h': timedelta(hours=amount), 'm': timedelta(minutes=amount)}[unit]
+        return (datetime.now() - delta).strftime(TIME_FORMAT)
+    for time_format in (TIME_FORMAT, "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, time_format).strftime(TIME_FORMAT)
+        except ValueError:
+            pass
+    raise ValueError(f"Unrecognized time: {text!r}")
+
+
+def query(catalog_path: str, process: str = None, command_contains: str = None, since: str = None,
+          until: str = None, min_peak_rss: float = None, min_cpu_p95: float = None,
+          order_by: str = 'start_time', limit: int = 50) -> List[Dict]:
+    """Finds sessions; ``process`` matches the process name or the script it ran."""
+    if order_by not in SORTABLE:
+        raise ValueError(f"Cannot order by {order_by} (choose from {', '.join(sorted(SORTABLE))})")
+    conditions, params = [], []
+    if process:
+        conditions.append("(process_name = ? OR script = ?)")
+        params += [process, process]
+    if command_contains:
+        conditions.append("command_line LIKE ?")
+        params.append(f"%{command_contains}%")
+    if since:
+        # Sessions still running at ``since`` count, not only those started after it
+        conditions.append("(end_time >= ? OR end_time IS NULL)")
+        params.append(parse_time(since))
+    if until:
+        conditions.append("start_time <= ?")
+        params.append(parse_time(until))
+    if min_peak_rss is not None:
+        conditions.append("peak_rss_mb >= ?")
+        params.append(min_peak_rss)
+    if min_cpu_p95 is not None:
+        conditions.append("cpu_p95 >= ?")
+        params.append(min_cpu_p95)
+
+    sql = "SELECT * FROM sessions"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {order_by} DESC LIMIT ?"
+    params.append(limit)
+
+    connection = open_catalog(catalog_path)
+    rows = [dict(row) for row in connection.execute(sql, params)]
+    connection.close()
+    return rows
+
+
+def format_rows(rows: List[Dict]) -> str:
+    lines = [f"{'session':<17}{'process':<22}{'start':<21}{'duration':>10}{'CPU p95':>9}{'peak RSS':>10}"]
+    for row in rows:
+        name = row['script'] or row['process_name'] or '?'
+        duration = f"{row['duration_s']:.0f} s" if row['duration_s'] is not None else '-'
+        cpu = f"{row['cpu_p95']:.1f}" if row['cpu_p95'] is not None else '-'
+        rss = f"{row['peak_rss_mb']:.1f}" if row['peak_rss_mb'] is not None else '-'
+        lines.append(f"{row['session_id']:<17}{name[:21]:<22}{row['start_time'] or '-':<21}"
+                     f"{duration:>10}{cpu:>9}{rss:>10}")
+    lines.append(f"{len(rows)} session(s)")
+    return '\n'.join(lines)
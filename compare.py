@@ -0,0 +1,205 @@
+import json
+import os
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from session_store import load_samples
+
+# Columns that are identifiers or cumulative counters rather than levels
+NON_METRIC_COLUMNS = ('timestamp', 'timestamp_ns', 'pid', 'process_count', 'cpu_user', 'cpu_system',
+                      'io_read_bytes', 'io_write_bytes')
+PERCENTILES = (50, 95, 99)
+
+# Largest increase over the baseline a candidate may show before it counts as
+# a regression; "10%" is relative to the baseline value, a bare number is
+# absolute in the metric's own unit.
+DEFAULT_THRESHOLDS = {
+    'cpu_percent.mean': '10%',
+    'cpu_percent.p95': '10%',
+    'peak_rss_mb': '10%',
+    'cpu_seconds': '10%',
+}
+
+
+def steady_state_time(elapsed: np.ndarray, values: np.ndarray, window: int = 10,
+                      tolerance: float = 0.1, floor: float = 1.0) -> float:
+    """Seconds until a series settles, or None if it never does.
+
+    The steady level is the median of the second half of the series. The
+    series counts as settled from the first point after which its rolling mean
+    over ``window`` samples stays within ``tolerance`` of that level (and
+    never closer than ``floor`` in absolute terms).
+    """
+    if len(values) < 2 * window:
+        return None
+    level = np.median(values[len(values) // 2:])
+    band = max(abs(level) * tolerance, floor)
+    rolling = np.convolve(values, np.ones(window) / window, mode='valid')
+    outside = np.nonzero(np.abs(rolling - level) > band)[0]
+    if not len(outside):
+        return 0.0
+    settled = outside[-1] + 1
+    if settled >= len(rolling):
+        return None
+    return float(elapsed[settled + window - 1])
+
+
+def summarize(path: str) -> Dict:
+    """Computes the comparison statistics of one session."""
+    df = load_samples(path)
+    summary = {'name': path, 'samples': len(df)}
+
+    elapsed = None
+    if 'timestamp' in df.columns and len(df):
+        elapsed = (df['timestamp'] - df['timestamp'].iloc[0]).dt.total_seconds().to_numpy()
+        summary['duration_s'] = float(elapsed[-1])
+
+    metrics, missing = {}, []
+    for column in df.columns:
+        if column in NON_METRIC_COLUMNS or not np.issubdtype(df[column].dtype, np.number):
+            continue
+        values = df[column].to_numpy(dtype=float)
+        if not len(values):
+            # A session stopped before its first tick has the schema but no samples
+            missing.append(column)
+            continue
+        p50, p95, p99 = np.percentile(values, PERCENTILES)
+        metrics[column] = {
+            'mean': float(values.mean()),
+            'p50': float(p50),
+            'p95': float(p95),
+            'p99': float(p99),
+            'max': float(values.max()),
+        }
+    summary['metrics'] = metrics
+    summary['missing'] = missing
+
+    if 'memory_rss_mb' in metrics:
+        summary['peak_rss_mb'] = metrics['memory_rss_mb']['max']
+
+    if elapsed is not None and 'cpu_percent' in df.columns:
+        cpu = df['cpu_percent'].to_numpy(dtype=float) / 100
+        # Trapezoidal integral of CPU utilisation over wall time
+        summary['cpu_seconds'] = float(np.sum((cpu[1:] + cpu[:-1]) / 2 * np.diff(elapsed)))
+
+    if elapsed is not None:
+        summary['steady_state_s'] = {
+            column: steady_state_time(elapsed, df[column].to_numpy(dtype=float))
+            for column in ('cpu_percent', 'memory_rss_mb') if column in df.columns
+        }
+    return summary
+
+
+def lookup(summary: Dict, key: str) -> float:
+    """Resolves ``peak_rss_mb`` or ``cpu_percent.p95`` style keys in a summary."""
+    if key in summary:
+        return summary[key]
+    metric, _, stat = key.rpartition('.')
+    return summary['metrics'].get(metric, {}).get(stat)
+
+
+def parse_threshold(limit: str):
+    limit = limit.strip()
+    if limit.endswith('%'):
+        return float(limit[:-1]) / 100, True
+    return float(limit), False
+
+
+def compare_sessions(paths: Sequence[str], thresholds: Dict[str, str] = None) -> Dict:
+    """Compares every session against the first one.
+
+    Returns the per-session summaries and, for each candidate, one check per
+    threshold with the baseline and candidate values and whether it passed.
+    """
+    thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    summaries = [summarize(path) for path in paths]
+    baseline = summaries[0]
+
+    comparisons = []
+    for candidate in summaries[1:]:
+        checks, missing = [], []
+        for key, limit in thresholds.items():
+            base_value, value = lookup(baseline, key), lookup(candidate, key)
+            if base_value is None or value is None:
+                if base_value is not None or value is not None:
+                    missing.append(key)
+                continue
+            allowed, relative = parse_threshold(limit)
+            max_value = base_value * (1 + allowed) if relative else base_value + allowed
+            checks.append({
+                'metric': key,
+                'baseline': base_value,
+                'candidate': value,
+                'change_pct': (value - base_value) / base_value * 100 if base_value else None,
+                'limit': limit,
+                'passed': value <= max_value,
+            })
+        comparisons.append({
+            'candidate': candidate['name'],
+            'checks': checks,
+            'missing': missing,
+            'passed': all(check['passed'] for check in checks),
+        })
+
+    return {
+        'baseline': baseline['name'],
+        'summaries': summaries,
+        'comparisons': comparisons,
+        'passed': all(comparison['passed'] for comparison in comparisons),
+    }
+
+
+def format_report(report: Dict) -> str:
+    lines = ["Session comparison", "=" * 18, ""]
+    for summary in report['summaries']:
+        lines.append(f"{summary['name']}")
+        duration = summary.get('duration_s')
+        lines.append(f"  samples: {summary['samples']}"
+                     + (f" over {duration:.0f} s" if duration is not None else ""))
+        if 'cpu_seconds' in summary:
+            lines.append(f"  CPU-seconds: {summary['cpu_seconds']:.2f}")
+        if 'peak_rss_mb' in summary:
+            lines.append(f"  peak RSS: {summary['peak_rss_mb']:.1f} MB")
+        for column, seconds in summary.get('steady_state_s', {}).items():
+            settled = f"{seconds:.1f} s" if seconds is not None else "never"
+            lines.append(f"  steady state ({column}): {settled}")
+        lines.append(f"  {'metric':<18}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+        for column, stats in summary['metrics'].items():
+            lines.append(f"  {column:<18}" + ''.join(f"{stats[stat]:>10.2f}"
+                                                     for stat in ('mean', 'p50', 'p95', 'p99', 'max')))
+        for column in summary.get('missing', []):
+            lines.append(f"  {column:<18}{'missing (no samples)':>30}")
+        lines.append("")
+
+    for comparison in report['comparisons']:
+        lines.append(f"{comparison['candidate']} vs {report['baseline']}: "
+                     f"{'PASS' if comparison['passed'] else 'FAIL'}")
+        for check in comparison['checks']:
+            change = f"{check['change_pct']:+.1f}%" if check['change_pct'] is not None else "n/a"
+            lines.append(f"  [{'pass' if check['passed'] else 'FAIL'}] {check['metric']:<20}"
+                         f"{check['baseline']:>10.2f} -> {check['candidate']:>10.2f} ({change}, limit +{check['limit']})")
+        for key in comparison.get('missing', []):
+            lines.append(f"  [missing] {key:<20}only one of the sessions has samples for it")
+        lines.append("")
+    return '\n'.join(lines)
+
+
+def write_report(report: Dict, path: str):
+    with open(path, 'w') as f:
+        if os.path.splitext(path)[1] == '.json':
+            json.dump(report, f, indent=4)
+        else:
+            f.write(format_report(report))
+
+
+def parse_thresholds(specs: List[str]) -> Dict[str, str]:
+    """Parses ``metric=limit`` command-line arguments."""
+    thresholds = {}
+    for spec in specs or []:
+        key, _, limit = spec.partition('=')
+        if not limit:
+            raise ValueError(f"Threshold must look like metric=limit, got {spec!r}")
+        parse_threshold(limit)
+        thresholds[key.strip()] = limit.strip()
+    return thresholds
@@ -0,0 +1,201 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Sequence, Tuple
+
+from session_store import SampleBuffer
+
+PLOTLY_CDN = "https://cdn.plot.ly/plotly-2.35.2.min.js"
+
+# Series drawn on the dashboard, if the session records them
+LIVE_SERIES = [
+    ('cpu_percent', 'CPU %', 'y'),
+    ('memory_percent', 'Memory %', 'y'),
+    ('memory_rss_mb', 'RSS MB', 'y2'),
+]
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>GesturePlus live monitor</title>
+<script src="/plotly.js"></script>
+<style>
+body { font-family: Arial, sans-serif; background: #f0f2f5; margin: 20px; }
+#status { color: #2c3e50; font-size: 14px; }
+</style>
+</head>
+<body>
+<h2>Live resource usage</h2>
+<div id="status">Connecting...</div>
+<div id="chart" style="height: 600px;"></div>
+<script>
+const MAX_POINTS = __MAX_POINTS__;
+let names = [], traces = [];
+
+const events = new EventSource('/events');
+events.addEventListener('schema', (e) => {
+    const schema = JSON.parse(e.data);
+    names = schema.names;
+    traces = schema.series.filter(s => names.includes(s[0]));
+    Plotly.newPlot('chart', traces.map(s => ({x: [], y: [], name: s[1], yaxis: s[2], mode: 'lines'})), {
+        title: schema.title,
+        yaxis: {title: 'Percentage (%)'},
+        yaxis2: {title: 'MB', overlaying: 'y', side: 'right'},
+        legend: {orientation: 'h'},
+    });
+});
+events.addEventListener('samples', (e) => {
+    const delta = JSON.parse(e.data);
+    const t = names.indexOf('timestamp_ns');
+    const x = delta.rows.map(r => new Date(r[t] / 1e6));
+    Plotly.extendTraces('chart', {
+        x: traces.map(() => x),
+        y: traces.map(s => delta.rows.map(r => r[names.indexOf(s[0])])),
+    }, traces.map((_, i) => i), MAX_POINTS);
+    let status = 'Live: ' + delta.seq + ' samples';
+    if (delta.skipped) status += ' (' + delta.skipped + ' skipped while this client lagged)';
+    document.getElementById('status').textContent = status;
+});
+events.onerror = () => { document.getElementById('status').textContent = 'Disconnected, retrying...'; };
+</script>
+</body>
+</html>
+"""
+
+
+class LiveDashboard:
+    """Serves a live view of a monitoring session over HTTP with Server-Sent Events.
+
+    The collector loop calls ``publish()`` with every sample. Samples go into a
+    bounded ring; ``publish()`` only takes a lock long enough to append and
+    notify, and never touches a socket. Each client is served by its own
+    thread, which sends the samples added since the last sequence number that
+    client received. Clients that fall further behind than the ring holds skip
+    ahead and are told how many samples they missed. Reconnecting browsers
+    resume from their Last-Event-ID.
+    """
+
+    def __init__(self, fields: Sequence[Tuple[str, str]], port: int = 8050, host: str = '127.0.0.1',
+                 history: int = 3600, title: str = "Process monitor", heartbeat: float = 15.0):
+        self.ring = SampleBuffer(fields, history)
+        self.seq = 0
+        self.title = title
+        self.heartbeat = heartbeat
+        self.closed = False
+        self._condition = threading.Condition()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="dashboard", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread.start()
+        print(f"Live dashboard at {self.url}")
+
+    def publish(self, values: Sequence):
+        with self._condition:
+            self.ring.append(values)
+            self.seq += 1
+            self._condition.notify_all()
+
+    def delta(self, after: int, timeout: float = None):
+        """Waits for samples newer than sequence number ``after``.
+
+        Returns ``(seq, rows, skipped)``: the sequence number of the newest
+        sample, the samples after ``after`` that are still in the ring, and how
+        many newer samples had already been overwritten.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.seq > after or self.closed, timeout)
+            # A Last-Event-ID from an earlier session restarts from the beginning
+            pending = self.seq - after if after <= self.seq else self.seq
+            rows = self.ring.tail(pending)
+            return self.seq, rows, pending - len(rows)
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        dashboard = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, content_type: str, body: bytes):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/':
+                    page = PAGE.replace('__MAX_POINTS__', str(dashboard.ring.capacity))
+                    self._send(200, 'text/html; charset=utf-8', page.encode())
+                elif self.path == '/plotly.js':
+                    self._send_plotly()
+                elif self.path == '/schema':
+                    self._send(200, 'application/json', json.dumps(dashboard.schema()).encode())
+                elif self.path == '/events':
+                    self._stream()
+                else:
+                    self._send(404, 'text/plain', b'Not found')
+
+            def _send_plotly(self):
+                try:
+                    from plotly.offline import get_plotlyjs
+                    self._send(200, 'application/javascript', get_plotlyjs().encode())
+                except ImportError:
+                    self.send_response(302)
+                    self.send_header('Location', PLOTLY_CDN)
+                    self.end_headers()
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+
+                last_seen = self.headers.get('Last-Event-ID')
+                after = int(last_seen) if last_seen and last_seen.isdigit() else 0
+                try:
+                    self._event('schema', dashboard.schema())
+                    while not dashboard.closed:
+                        seq, rows, skipped = dashboard.delta(after, dashboard.heartbeat)
+                        if seq == after:
+                            # Keeps the connection alive and detects gone clients
+                            self.wfile.write(b': heartbeat\n\n')
+                            self.wfile.flush()
+                            continue
+                        self._event('samples', {'seq': seq, 'skipped': skipped, 'rows': rows}, seq)
+                        after = seq
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def _event(self, name: str, data, event_id: int = None):
+                message = f"event: {name}\n"
+                if event_id is not None:
+                    message += f"id: {event_id}\n"
+                message += f"data: {json.dumps(data)}\n\n"
+                self.wfile.write(message.encode())
+                self.wfile.flush()
+
+        return Handler
+
+    def schema(self):
+        return {
+            'title': self.title,
+            'names': self.ring.names,
+            'series': LIVE_SERIES,
+        }
+
@@ -0,0 +1,227 @@
+import json
+import os
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Names the shared memory segment of the bus run_parallel.py creates for its children
+BUS_VARIABLE = "GESTUREPLUS_BUS"
+
+MAGIC = b"GPBUS1\0\0"
+MAX_TOPIC_BYTES = 24
+# magic, capacity, record size
+SEGMENT_HEADER = struct.Struct("<8sII")
+SEGMENT_HEADER_SIZE = 64
+# Producer and consumer indexes sit on separate cache lines: head and dropped at 0, tail at 64
+CONTROL_SIZE = 128
+INDEX = struct.Struct("<Q")
+# sequence, timestamp_ns, topic, payload length
+RECORD_HEADER = struct.Struct(f"<Qq{MAX_TOPIC_BYTES}sH")
+
+DEFAULT_CAPACITY = 256
+DEFAULT_RECORD_SIZE = 256
+
+# Busy checks before a waiting side starts yielding; spinning only helps when both sides have a core
+SPIN_CHECKS = 200 if (os.cpu_count() or 1) > 1 else 0
+
+# Each side publishes on its own ring and consumes the other
+SIDES = {"gesture": (0, 1), "voice": (1, 0)}
+
+Event = Tuple[int, str, Dict]
+
+
+class EventRing:
+    """A single-producer/single-consumer ring of fixed-size records in shared memory.
+
+    The producer only ever writes ``head`` and the consumer only ``tail``, so
+    neither needs a lock. Every record carries the sequence number it was
+    written for; the consumer only takes a record once that number is in
+    place, so it never returns a slot the producer is still filling. A full
+    ring drops the new event and counts it instead of blocking the producer.
+    """
+
+    def __init__(self, buffer: memoryview, offset: int, capacity: int, record_size: int):
+        self.buffer = buffer
+        self.capacity = capacity
+        self.record_size = record_size
+        self.head_offset = offset
+        self.dropped_offset = offset + 8
+        self.tail_offset = offset + 64
+        self.slots_offset = offset + CONTROL_SIZE
+        self.max_payload = record_size - RECORD_HEADER.size
+
+    @staticmethod
+    def size(capacity: int, record_size: int) -> int:
+        return CONTROL_SIZE + capacity * record_size
+
+    def _load(self, offset: int) -> int:
+        return INDEX.unpack_from(self.buffer, offset)[0]
+
+    def _store(self, offset: int, value: int):
+        INDEX.pack_into(self.buffer, offset, value)
+
+    @property
+    def dropped(self) -> int:
+        return self._load(self.dropped_offset)
+
+    def __len__(self) -> int:
+        return self._load(self.head_offset) - self._load(self.tail_offset)
+
+    def put(self, topic: bytes, payload: bytes) -> bool:
+        if len(payload) > self.max_payload:
+            raise ValueError(f"Event payload is {len(payload)} bytes, records hold {self.max_payload}")
+        head = self._load(self.head_offset)
+        if head - self._load(self.tail_offset) >= self.capacity:
+            self._store(self.dropped_offset, self.dropped + 1)
+            return False
+        slot = self.slots_offset + head % self.capacity * self.record_size
+        # The payload goes in before the header that carries the sequence number, and the
+        # header before the head index moves, so a consumer never sees a half-written record
+        start = slot + RECORD_HEADER.size
+        self.buffer[start:start + len(payload)] = payload
+        RECORD_HEADER.pack_into(self.buffer, slot, head + 1, time.time_ns(), topic, len(payload))
+        self._store(self.head_offset, head + 1)
+        return True
+
+    def get(self) -> Optional[Tuple[int, bytes, bytes]]:
+        tail = self._load(self.tail_offset)
+        if tail == self._load(self.head_offset):
+            return None
+        slot = self.slots_offset + tail % self.capacity * self.record_size
+        sequence, timestamp, topic, length = RECORD_HEADER.unpack_from(self.buffer, slot)
+        if sequence != tail + 1:
+            # The head index became visible before the record did; take it on the next call
+            return None
+        start = slot + RECORD_HEADER.size
+        payload = bytes(self.buffer[start:start + length])
+        self._store(self.tail_offset, tail + 1)
+        return timestamp, topic.rstrip(b"\0"), payload
+
+
+class EventBus:
+    """Publish/subscribe between the gesture and voice processes over two EventRings.
+
+    One process creates the bus (run_parallel.py does, before starting the
+    modules) and the two sides attach to it by name. Events are a topic such as
+    ``gesture.pause`` and a small JSON-serializable dict. ``subscribe()``
+    registers a callback for a topic prefix and ``poll()`` delivers pending
+    events to it; call ``poll()`` from the loop the side already runs (a frame
+    loop or a Qt timer). Each side must publish from a single thread.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, side: str, owner: bool = False):
+        magic, capacity, record_size = SEGMENT_HEADER.unpack_from(memory.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Shared memory {memory.name} is not an event bus")
+        self.memory = memory
+        self.side = side
+        self.owner = owner
+        self.name = memory.name
+        rings = [EventRing(memory.buf, SEGMENT_HEADER_SIZE + index * EventRing.size(capacity, record_size),
+                           capacity, record_size) for index in range(2)]
+        outgoing, incoming = SIDES[side]
+        self.outgoing, self.incoming = rings[outgoing], rings[incoming]
+        self.subscriptions: List[Tuple[str, Callable[[Event], None]]] = []
+
+    @classmethod
+    def create(cls, name: str = None, capacity: int = DEFAULT_CAPACITY,
+               record_size: int = DEFAULT_RECORD_SIZE) -> "EventBus":
+        """Creates a bus; the creator unlinks it on close. Its side is only used if it publishes."""
+        size = SEGMENT_HEADER_SIZE + 2 * EventRing.size(capacity, record_size)
+        memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        memory.buf[:size] = bytes(size)
+        SEGMENT_HEADER.pack_into(memory.buf, 0, MAGIC, capacity, record_size)
+        return cls(memory, "voice", owner=True)
+
+    @classmethod
+    def attach(cls, name: str, side: str, shared_tracker: bool = False) -> "EventBus":
+        """Attaches to an existing bus as ``side``.
+
+        Before Python 3.13 attaching also registers the segment with this process's
+        resource tracker, which would unlink it from under the other side when we
+        exit, so the registration is undone. Processes forked by the creator share
+        its tracker and must pass ``shared_tracker=True`` to leave it alone.
+        """
+        memory = shared_memory.SharedMemory(name=name)
+        if not shared_tracker:
+            resource_tracker.unregister(memory._name, "shared_memory")
+        return cls(memory, side)
+
+    @classmethod
+    def from_env(cls, side: str) -> Optional["EventBus"]:
+        """The bus run_parallel.py started us with, or None when run on our own."""
+        name = os.environ.get(BUS_VARIABLE)
+        if name is None:
+            return None
+        try:
+            return cls.attach(name, side)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"Event bus {name} unavailable: {e}")
+            return None
+
+    def publish(self, topic: str, data: Dict = None) -> bool:
+        """Queues an event for the other side; False if its ring is full and the event was dropped."""
+        encoded = topic.encode()
+        if len(encoded) > MAX_TOPIC_BYTES:
+            raise ValueError(f"Event topic {topic!r} is longer than {MAX_TOPIC_BYTES} bytes")
+        payload = json.dumps(data, separators=(",", ":")).encode() if data else b""
+        return self.outgoing.put(encoded, payload)
+
+    def subscribe(self, prefix: str, callback: Callable[[Event], None]):
+        """Calls ``callback((timestamp_ns, topic, data))`` for every event whose topic starts with ``prefix``."""
+        self.subscriptions.append((prefix, callback))
+
+    def receive(self) -> Optional[Event]:
+        record = self.incoming.get()
+        if record is None:
+            return None
+        timestamp, topic, payload = record
+        return timestamp, topic.decode(), json.loads(payload) if payload else {}
+
+    def poll(self, limit: int = 64) -> int:
+        """Delivers up to ``limit`` pending events to subscribers; returns how many were taken."""
+        count = 0
+        while count < limit:
+            event = self.receive()
+            if event is None:
+                break
+            count += 1
+            for prefix, callback in self.subscriptions:
+                if event[1].startswith(prefix):
+                    callback(event)
+        return count
+
+    def wait(self, timeout: float = None, spin: int = SPIN_CHECKS, yields: int = 1000,
+             sleep: float = 0.0005) -> Optional[Event]:
+        """Waits for the next event.
+
+        Checks ``spin`` times back to back, then ``yields`` times giving up the CPU
+        in between (which lets the other side run when both share a core), then
+        sleeps ``sleep`` seconds between checks.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        checks = 0
+        while True:
+            event = self.receive()
+            if event is not None:
+                return event
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            checks += 1
+            if checks <= spin:
+                continue
+            if checks <= spin + yields and hasattr(os, "sched_yield"):
+                os.sched_yield()
+            else:
+                time.sleep(sleep)
+
+    def stats(self) -> Dict:
+        return {"pending_in": len(self.incoming), "pending_out": len(self.outgoing),
+                "dropped_out": self.outgoing.dropped}
+
+    def close(self):
+        self.outgoing = self.incoming = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
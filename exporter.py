@@ -0,0 +1,150 @@
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Sequence, Tuple
+
+PREFIX = "gestureplus"
+
+PROMETHEUS_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+OPENMETRICS_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Cumulative fields exported as counters: field -> (family, extra labels, help)
+COUNTERS = {
+    'cpu_user': ('cpu_seconds', {'mode': 'user'}, 'CPU time consumed by the monitored process.'),
+    'cpu_system': ('cpu_seconds', {'mode': 'system'}, 'CPU time consumed by the monitored process.'),
+    'io_read_bytes': ('io_bytes', {'direction': 'read'}, 'Storage I/O of the monitored process.'),
+    'io_write_bytes': ('io_bytes', {'direction': 'write'}, 'Storage I/O of the monitored process.'),
+}
+
+# Rates derived from the counters above; scrapers compute their own with rate()
+DERIVED_FIELDS = {'io_read_mb', 'io_write_mb'}
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+def format_value(value) -> str:
+    """A sample value as both exposition formats spell it; Python's repr gives inf and nan."""
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+class MetricsExporter:
+    """Serves the latest sample of a session on ``/metrics`` for Prometheus.
+
+    Cumulative CPU-seconds and I/O bytes are exported as counters; every other
+    field is a gauge. ``publish()`` only swaps in the new sample. The page is
+    rendered by the first scrape after a sample arrives and served from cache
+    to every later scrape until the next sample, so scraping more often than
+    the sampling interval costs no extra rendering.
+    """
+
+    def __init__(self, fields: Sequence[Tuple[str, str]], port: int = 9108, host: str = '127.0.0.1',
+                 labels: Dict[str, str] = None):
+        self.names = [name for name, _ in fields]
+        self.labels = labels or {}
+        self.latest = None
+        self.version = 0
+        self.renders = 0
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="exporter", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self):
+        self._thread.start()
+        print(f"Metrics exporter at {self.url}")
+
+    def publish(self, values: Sequence):
+        self.latest = values
+        self.version += 1
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def page(self, openmetrics: bool = False) -> bytes:
+        """Returns the exposition page for the latest sample, rendering it at most once per sample."""
+        version = self.version
+        cached = self._cache.get(openmetrics)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with self._lock:
+            cached = self._cache.get(openmetrics)
+            if cached is None or cached[0] != version:
+                cached = (version, self.render(self.latest, openmetrics).encode())
+                self._cache[openmetrics] = cached
+                self.renders += 1
+            return cached[1]
+
+    def render(self, values: Sequence, openmetrics: bool = False) -> str:
+        families = {}
+        up = 0 if values is None else 1
+        families[f'{PREFIX}_up'] = ('gauge', 'Whether the monitored process is being sampled.',
+                                    [('', self.labels, up)])
+        for name, value in zip(self.names, values or ()):
+            if name in DERIVED_FIELDS:
+                continue
+            if name == 'timestamp_ns':
+                family, kind, labels, help_text = ('last_sample_timestamp_seconds', 'gauge', {},
+                                                   'Time of the latest sample.')
+                value = value / 1e9
+            elif name in COUNTERS:
+                family, labels, help_text = COUNTERS[name]
+                kind = 'counter'
+            else:
+                family, kind, labels, help_text = name, 'gauge', {}, f'Latest {name} sample.'
+            metric = f'{PREFIX}_{family}'
+            suffix = '_total' if kind == 'counter' else ''
+            families.setdefault(metric, (kind, help_text, []))[2].append(
+                (suffix, dict(self.labels, **labels), value))
+
+        lines = []
+        for metric, (kind, help_text, samples) in families.items():
+            # OpenMetrics names the counter family without _total, the Prometheus text format with it
+            family = metric if openmetrics else metric + samples[0][0]
+            lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {kind}')
+            for suffix, labels, value in samples:
+                lines.append(f'{metric}{suffix}{format_labels(labels)} {format_value(value)}')
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def _handler_class(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+                body = exporter.page(openmetrics)
+                self.send_response(200)
+                self.send_header('Content-Type', OPENMETRICS_TYPE if openmetrics else PROMETHEUS_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
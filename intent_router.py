@@ -0,0 +1,129 @@
+import re
+from itertools import islice
+from typing import Dict, List, Tuple
+
+# Words are matched whole; apostrophes stay inside them ("what's", "don't")
+WORD = re.compile(r"[\w']+")
+
+# Intent name and its argument: None, the text after the phrase or a number
+Route = Tuple[str, object]
+
+# Name of the route for utterances no intent matches
+UNKNOWN = 'unknown'
+
+
+class Intent:
+    """One command the assistant understands.
+
+    ``phrases`` are sequences of whole words. By default they match anywhere
+    in the utterance; ``anchored`` intents only match at its start and
+    ``exact`` ones only when the phrase is the whole utterance. ``argument``
+    is what the intent takes from the words after its phrase: None, 'text'
+    (the rest of the utterance, possibly empty) or 'number' (a single
+    integer; without one the intent does not match). When several intents
+    match, the highest ``priority`` wins, then the earliest phrase, then the
+    longest, then the intent registered first.
+    """
+
+    def __init__(self, name: str, phrases: List[str], priority: int = 0, anchored: bool = False,
+                 exact: bool = False, argument: str = None):
+        if argument not in (None, 'text', 'number'):
+            raise ValueError(f"Intent {name} has unknown argument kind {argument!r}")
+        self.name = name
+        self.phrases = [tuple(WORD.findall(phrase.lower())) for phrase in phrases]
+        self.priority = priority
+        self.anchored = anchored or exact
+        self.exact = exact
+        self.argument = argument
+
+
+class IntentRouter:
+    """Routes an utterance to an intent with one pass over its words.
+
+    The phrases of every intent are compiled into a trie keyed by word.
+    Routing walks the trie from each word of the utterance, so its cost
+    depends on the length of the utterance and of the longest phrase, not on
+    how many intents there are or the order they are registered in; and
+    since only whole words match, "this" is not "hi" and "update" is not
+    "date". Utterances are lowercased, and so are the arguments taken from
+    them.
+    """
+
+    def __init__(self, intents: List[Intent]):
+        self.intents = intents
+        # Each node maps a word to its child; the None key holds what ends there:
+        # (-priority, registration order, intent), so candidates sort best first
+        self.trie: Dict = {}
+        for order, intent in enumerate(intents):
+            for phrase in intent.phrases:
+                if not phrase:
+                    raise ValueError(f"Intent {intent.name} has an empty phrase")
+                node = self.trie
+                for word in phrase:
+                    node = node.setdefault(word, {})
+                node.setdefault(None, []).append((-intent.priority, order, intent))
+
+    def route(self, text: str) -> Route:
+        """The best intent for ``text`` and its argument, or ``(UNKNOWN, None)``."""
+        text = text.lower()
+        words = WORD.findall(text)
+        count = len(words)
+        trie = self.trie
+        candidates = []
+        for start in range(count):
+            node = trie.get(words[start])
+            position = start
+            while node is not None:
+                for rank, order, intent in node.get(None, ()):
+                    if intent.anchored and start or intent.exact and position + 1 != count:
+                        continue
+                    candidates.append((rank, start, start - position, order, intent, position + 1))
+                position += 1
+                if position == count:
+                    break
+                node = node.get(words[position])
+        if not candidates:
+            return UNKNOWN, None
+        if len(candidates) > 1:
+            candidates.sort()
+
+        for _, _, _, _, intent, rest in candidates:
+            if intent.argument is None:
+                return intent.name, None
+            if intent.argument == 'number':
+                if count == rest + 1 and words[rest].isdigit():
+                    return intent.name, int(words[rest])
+                continue
+            # Text arguments keep everything after the phrase, punctuation included
+            phrase_end = next(islice(WORD.finditer(text), rest - 1, None)).end()
+            return intent.name, text[phrase_end:].strip()
+        return UNKNOWN, None
+
+
+# The commands of proton.py's VoiceAssistant. Priorities keep the precedence
+# the assistant always had: leaving and sleeping first, then commands that
+# take an argument, then the rest.
+ASSISTANT_INTENTS = [
+    Intent('exit', ['exit', 'terminate'], priority=100),
+    Intent('sleep', ['bye', 'goodbye'], priority=90),
+    Intent('wake', ['wake up'], priority=80),
+    Intent('search', ['search', 'search for'], priority=70, argument='text'),
+    Intent('location', ['location'], priority=65),
+    Intent('launch_gesture', ['launch gesture recognition'], priority=60),
+    Intent('stop_gesture', ['stop gesture recognition'], priority=60),
+    Intent('copy', ['copy'], priority=50),
+    # Speech recognition often hears "paste" as one of these
+    Intent('paste', ['paste', 'page', 'pest'], priority=50),
+    Intent('list', ['list'], exact=True, priority=40),
+    Intent('back', ['back'], exact=True, priority=40),
+    Intent('open_item', ['open'], anchored=True, argument='number', priority=35),
+    Intent('open_app', ['open'], anchored=True, argument='text', priority=30),
+    Intent('time', ['time'], priority=20),
+    Intent('date', ['date'], priority=20),
+    Intent('clear', ['clear'], priority=20),
+    Intent('greeting', ['hi', 'hello', 'hey'], priority=10),
+    Intent('how_are_you', ['how are you'], priority=10),
+    Intent('thanks', ['thank', 'thanks'], priority=10),
+]
+
+ASSISTANT_ROUTER = IntentRouter(ASSISTANT_INTENTS)
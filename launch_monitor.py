@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import psutil
+
+from monitor import CUMULATIVE_FIELDS, TIMESTAMP_FIELD, OverheadMonitor, SessionManager, SystemMetricsCollector, timestamp_ns
+from probes import PROBES, DEFAULT_PROBES
+
+EVENTS_NAME = "events.jsonl"
+
+
+class LaunchMonitor:
+    """Samples the modules run_parallel.py starts into one session, from the moment each is spawned.
+
+    The launcher calls ``track()`` as soon as it has a child's pid and
+    ``event()`` when the child starts, exits, hangs or is restarted. Both only
+    hand work over under a lock; sampling happens on the monitor's own thread,
+    so the launcher's wait and supervision loop is never held up by it. A newly
+    tracked child is sampled right away rather than at the next tick, which
+    catches its startup.
+
+    The session looks like one from ``monitor.py --tree``: every child's rows
+    in ``process_metrics``, their rolled-up total in ``metrics`` and the
+    monitor's own cost in ``monitor``. Events go to ``events.jsonl`` and
+    ``session_info['events']`` and are drawn as markers in the report.
+    """
+
+    def __init__(self, session_manager: SessionManager, interval: float = 1.0, probes: List[str] = None,
+                 chunk_size: int = 500):
+        self.session_manager = session_manager
+        self.interval = interval
+        # Children do not exist yet, so probes are detected against the launcher itself
+        self.probe_set = PROBES.detect(psutil.Process(), probes or DEFAULT_PROBES)
+        fields = [TIMESTAMP_FIELD] + self.probe_set.fields
+        self.fields = fields + [('process_count', 'i')]
+        self.process_fields = [('pid', 'i')] + fields
+        self.device_wide_indexes = [[name for name, _ in fields].index(name)
+                                    for name in self.probe_set.device_wide_fields]
+        self.metrics_writer = session_manager.create_writer("metrics", self.fields, chunk_size)
+        self.process_writer = session_manager.create_writer("process_metrics", self.process_fields, chunk_size)
+        self.series_writers = {series: session_manager.create_writer(
+                                   series, [TIMESTAMP_FIELD, ('pid', 'i')] + series_fields, chunk_size)
+                               for series, series_fields in self.probe_set.series.items()}
+        self.overhead = OverheadMonitor(self.probe_set, interval)
+        self.monitor_writer = session_manager.create_writer("monitor", self.overhead.fields, chunk_size)
+        names = [name for name, _ in self.fields]
+        self.cpu_index = names.index('cpu_percent') if 'cpu_percent' in names else None
+        self.cumulative_indexes = [index for index, name in enumerate(names) if name in CUMULATIVE_FIELDS]
+        self.exited_totals = [0] * len(self.cumulative_indexes)
+        self.last_values: Dict[int, Tuple] = {}
+        self.ticks = 0
+        self.missed_deadlines = 0
+
+        self.collectors: Dict[int, SystemMetricsCollector] = {}
+        self.process_info: Dict[int, Dict] = {}
+        self.events: List[Dict] = []
+        self.events_path = os.path.join(session_manager.session_dir, EVENTS_NAME)
+        self.session_info = {
+            'start_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'mode': 'launch',
+            'process_name': 'run_parallel.py',
+            'command_line': psutil.Process().cmdline(),
+            'probes': self.probe_set.describe(),
+            'status': 'running',
+        }
+        session_manager.save_session_info(self.session_info)
+
+        self._pending: List[Tuple[str, int]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="launch-monitor", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        print(f"Monitoring the modules into {self.session_manager.session_dir}")
+
+    def track(self, name: str, pid: int):
+        """Starts sampling a child; safe to call from any thread."""
+        with self._lock:
+            self._pending.append((name, pid))
+        self._wake.set()
+
+    def event(self, kind: str, name: str, pid: int = None, **details):
+        """Records a start, exit, hung or restart marker; safe to call from any thread."""
+        event = dict({'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 'timestamp_ns': timestamp_ns(),
+                      'kind': kind, 'name': name, 'pid': pid}, **details)
+        with self._lock:
+            self.events.append(event)
+            with open(self.events_path, 'a') as f:
+                f.write(json.dumps(event) + '\n')
+
+    def _attach(self) -> List[int]:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        attached = []
+        for name, pid in pending:
+            try:
+                process = psutil.Process(pid)
+                self.collectors[pid] = SystemMetricsCollector(process, self.probe_set)
+                command_line = process.cmdline()
+            except psutil.Error:
+                # Exited before we got to it; its exit event still marks the session
+                continue
+            self.process_info[pid] = {
+                'pid': pid,
+                'process_name': name,
+                'command_line': command_line,
+                'first_seen': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'last_seen': None,
+            }
+            attached.append(pid)
+        return attached
+
+    def _run(self):
+        """Samples on a fixed grid of deadlines, like SampleScheduler, but wakes early for new children."""
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            if self._wake.wait(max(0.0, deadline - time.monotonic())):
+                self._wake.clear()
+                attached = self._attach()
+                if time.monotonic() < deadline:
+                    # An extra sample of just the new children, so their startup is in the session
+                    self.sample(attached)
+                    continue
+            self.ticks += 1
+            self.sample()
+            deadline += self.interval
+            now = time.monotonic()
+            if now > deadline:
+                skipped = int((now - deadline) // self.interval) + 1
+                self.missed_deadlines += skipped
+                deadline += skipped * self.interval
+
+    def sample(self, pids: List[int] = None):
+        """Samples every child, or only ``pids`` outside the regular ticks."""
+        tick_start = time.perf_counter_ns()
+        now = time.monotonic()
+        rows = []
+        for pid in list(self.collectors if pids is None else pids):
+            collector = self.collectors.get(pid)
+            if collector is None:
+                continue
+            values = collector.collect_values(now)
+            if values is None:
+                del self.collectors[pid]
+                self.process_info[pid]['last_seen'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                last = self.last_values.pop(pid, None)
+                if last is not None:
+                    for position, index in enumerate(self.cumulative_indexes):
+                        self.exited_totals[position] += last[index]
+                continue
+            self.last_values[pid] = values
+            rows.append((pid,) + values)
+            for series, row in collector.series_values:
+                self.series_writers[series].append(row)
+        if not rows:
+            return
+        collect_end = time.perf_counter_ns()
+        self.process_writer.extend(rows)
+        if pids is not None:
+            return
+        # Totals and the monitor's cost are only kept for regular ticks, which are an interval apart
+        total = self.aggregate([row[1:] for row in rows])
+        self.metrics_writer.append(total)
+        cpu_percent = total[self.cpu_index] if self.cpu_index is not None else 0.0
+        self.monitor_writer.append(self.overhead.record(tick_start, collect_end, cpu_percent))
+
+    def aggregate(self, samples: List[Tuple]) -> Tuple:
+        columns = list(zip(*samples))
+        total = [sum(column) for column in columns]
+        total[0] = columns[0][0]
+        for index in self.device_wide_indexes:
+            total[index] = max(columns[index])
+        # Counters keep what exited (or restarted) children had used, as in monitor.py --tree
+        for position, index in enumerate(self.cumulative_indexes):
+            total[index] += self.exited_totals[position]
+        return tuple(total) + (len(samples),)
+
+    def close(self, report: bool = True):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self.probe_set.close()
+        for writer in [self.metrics_writer, self.process_writer, self.monitor_writer] + list(self.series_writers.values()):
+            writer.close()
+        info = self.session_info
+        info['end_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        info['status'] = 'completed'
+        info['sampling'] = {'interval_s': self.interval, 'ticks': self.ticks,
+                            'missed_deadlines': self.missed_deadlines}
+        info['samples'] = self.metrics_writer.rows_written
+        info['monitor_overhead'] = self.overhead.summary()
+        info['processes'] = list(self.process_info.values())
+        info['events'] = self.events
+        if self.series_writers:
+            info['series'] = self.probe_set.series_info()
+        self.session_manager.save_session_info(info)
+        if report and info['samples']:
+            from report import render_session
+            render_session(self.session_manager.session_dir)
+            self.session_manager.catalog()
+        else:
+            print(f"Render the report later with: monitor.py report {self.session_manager.session_dir}")
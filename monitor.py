@@ -3,12 +3,15 @@ import time
 import subprocess
 import argparse
 from datetime import datetime
-import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import os
 import json
-from typing import Dict, List
+import signal
+import sys
+from typing import Dict, List, Tuple
+from session_store import SeriesWriter, read_series, series_path, convert_csv, convert_session
+from probes import PROBES, DEFAULT_PROBES, ProbeSet
+from rolling_stats import AlertEngine, AlertRule, RollingStats
+from catalog import CATALOG_NAME, catalog_session
 
 class SessionManager:
     def __init__(self, base_dir="monitoring_sessions"):
@@ -17,9 +20,15 @@ class SessionManager:
         self.session_dir = os.path.join(base_dir, self.session_id)
         os.makedirs(self.session_dir, exist_ok=True)
         
-    def get_data_path(self) -> str:
-        return os.path.join(self.session_dir, "metrics.csv")
+    def get_data_path(self, series: str = "metrics") -> str:
+        return series_path(self.session_dir, series)
     
+    def create_writer(self, series: str, fields: List[Tuple[str, str]], chunk_size: int = 500) -> SeriesWriter:
+        return SeriesWriter(self.session_dir, series, fields, chunk_size=chunk_size)
+
+    def load_series(self, series: str = "metrics"):
+        return read_series(self.session_dir, series)
+
     def get_info_path(self) -> str:
         return os.path.join(self.session_dir, "session_info.json")
     
@@ -27,133 +36,343 @@ class SessionManager:
         with open(self.get_info_path(), 'w') as f:
             json.dump(info, f, indent=4)
 
+    def get_catalog_path(self) -> str:
+        return os.path.join(self.base_dir, CATALOG_NAME)
+
+    def catalog(self):
+        """Records the finished session and its summary statistics in the catalog."""
+        try:
+            catalog_session(self.session_dir, self.get_catalog_path())
+        except Exception as e:
+            print(f"Could not catalog session {self.session_id}: {e}")
+
+# Sample timestamps come from the monotonic clock, so they never jump with NTP
+# or DST changes, anchored once to the wall clock so they still read as
+# epoch nanoseconds.
+_WALL_ANCHOR_NS = time.time_ns()
+_MONOTONIC_ANCHOR_NS = time.monotonic_ns()
+
+def timestamp_ns() -> int:
+    return _WALL_ANCHOR_NS + (time.monotonic_ns() - _MONOTONIC_ANCHOR_NS)
+
+# Every sample starts with its timestamp in epoch nanoseconds, followed by the
+# fields of the session's probes (see probes.py).
+TIMESTAMP_FIELD = ('timestamp_ns', 'q')
+
+# Fields that only ever grow over a process's life; a tree's total of them keeps
+# what exited processes had used, so it never goes down
+CUMULATIVE_FIELDS = ('cpu_user', 'cpu_system', 'io_read_bytes', 'io_write_bytes')
+
 class SystemMetricsCollector:
-    def __init__(self, process):
+    """Samples one process through a set of probes detected at startup.
+
+    ``fields`` is the fixed schema of the samples returned by
+    ``collect_values()``, as (name, struct code) pairs.
+    """
+
+    def __init__(self, process, probe_set: ProbeSet = None):
         self.process = process
-        self.has_io_counters = hasattr(process, 'io_counters')
-        if self.has_io_counters:
-            try:
-                self.io_counters_prev = process.io_counters()
-                self.timestamp_prev = time.time()
-            except (psutil.AccessDenied, AttributeError):
-                self.has_io_counters = False
+        self.owns_probe_set = probe_set is None
+        self.probe_set = probe_set or PROBES.detect(process, DEFAULT_PROBES)
+        self.probes = self.probe_set.bind(process)
+        self.fields = [TIMESTAMP_FIELD] + self.probe_set.fields
+        self.names = [name for name, _ in self.fields]
+        self.series_probes = [probe for probe in self.probes if probe.series]
+        self.series_values = []
+        self.timings_ns = self.probe_set.timings_ns
 
     def collect_metrics(self) -> Dict:
+        values = self.collect_values()
+        return dict(zip(self.names, values)) if values is not None else None
+
+    def collect_values(self, now: float = None) -> Tuple:
+        """Samples the process once, returning values in ``fields`` order.
+
+        ``now`` is the monotonic time of the tick; collectors sharing a
+        ProbeSet must be given the same one within a tick, so shared
+        (system-scope) probes are read once and not re-read over the
+        microseconds between processes. Returns None once the process has exited.
+        """
         try:
-            metrics = {
-                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'cpu_percent': self.process.cpu_percent(),
-                'memory_percent': self.process.memory_percent()
-            }
-            
-            # Memory metrics
-            memory_info = self.process.memory_info()
-            metrics.update({
-                'memory_rss_mb': memory_info.rss / 1024 / 1024,
-                'memory_vms_mb': memory_info.vms / 1024 / 1024,
-            })
-            
-            # CPU times
-            try:
-                cpu_times = self.process.cpu_times()
-                metrics.update({
-                    'cpu_user': cpu_times.user,
-                    'cpu_system': cpu_times.system,
-                })
-            except (psutil.AccessDenied, AttributeError):
-                metrics.update({
-                    'cpu_user': 0,
-                    'cpu_system': 0,
-                })
-
-            # I/O metrics
-            if self.has_io_counters:
-                try:
-                    io_counters = self.process.io_counters()
-                    io_delta = time.time() - self.timestamp_prev
-                    
-                    read_speed = (io_counters.read_bytes - self.io_counters_prev.read_bytes) / io_delta / 1024 / 1024
-                    write_speed = (io_counters.write_bytes - self.io_counters_prev.write_bytes) / io_delta / 1024 / 1024
-                    
-                    self.io_counters_prev = io_counters
-                    self.timestamp_prev = time.time()
-                    
-                    metrics.update({
-                        'io_read_mb': read_speed,
-                        'io_write_mb': write_speed,
-                    })
-                except (psutil.AccessDenied, AttributeError):
-                    self.has_io_counters = False
-            
-            if not self.has_io_counters:
-                metrics.update({
-                    'io_read_mb': 0,
-                    'io_write_mb': 0,
-                })
+            # oneshot() makes psutil read each /proc file once per tick and
+            # serve every probe from that snapshot.
+            with self.process.oneshot():
+                # An exited child stays a zombie until its parent reaps it and
+                # reports zeroed counters meanwhile; treat it as gone.
+                if self.process.status() == psutil.STATUS_ZOMBIE:
+                    return None
 
-            # GPU metrics
-            try:
-                import GPUtil
-                gpus = GPUtil.getGPUs()
-                metrics.update({
-                    'gpu_usage': gpus[0].load * 100 if gpus else 0,
-                    'gpu_memory_mb': gpus[0].memoryUsed if gpus else 0,
-                })
-            except:
-                metrics.update({
-                    'gpu_usage': 0,
-                    'gpu_memory_mb': 0,
-                })
-            
-            return metrics
+                values = [timestamp_ns()]
+                if now is None:
+                    now = time.monotonic()
+                timings_ns = self.timings_ns
+                for index, probe in enumerate(self.probes):
+                    start = time.perf_counter_ns()
+                    values.extend(probe.sample(now))
+                    timings_ns[index] += time.perf_counter_ns() - start
+            if self.series_probes:
+                # Rows of probes with their own series, as (series, (timestamp, pid, ...))
+                prefix = (values[0], self.process.pid)
+                self.series_values = [(probe.series, prefix + row)
+                                      for probe in self.series_probes for row in probe.rows]
+            return tuple(values)
             
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             return None
 
-# def create_visualizations(df: pd.DataFrame, session_dir: str):
-#     fig = make_subplots(
-#         rows=3, cols=1,
-#         subplot_titles=('CPU & Memory Usage', 'I/O Activity', 'GPU Metrics'),
-#         vertical_spacing=0.1,
-#         heights=[0.4, 0.3, 0.3]
-#     )
-    
-#     # CPU and Memory plot
-#     fig.add_trace(
-#         go.Scatter(x=df['timestamp'], y=df['cpu_percent'], name='CPU %'),
-#         row=1, col=1
-#     )
-#     fig.add_trace(
-#         go.Scatter(x=df['timestamp'], y=df['memory_percent'], name='Memory %'),
-#         row=1, col=1
-#     )
-    
-#     # I/O plot
-#     if 'io_read_mb' in df.columns:
-#         fig.add_trace(
-#             go.Scatter(x=df['timestamp'], y=df['io_read_mb'], name='Read MB/s'),
-#             row=2, col=1
-#         )
-#         fig.add_trace(
-#             go.Scatter(x=df['timestamp'], y=df['io_write_mb'], name='Write MB/s'),
-#             row=2, col=1
-#         )
-    
-#     # GPU plot
-#     if 'gpu_usage' in df.columns:
-#         fig.add_trace(
-#             go.Scatter(x=df['timestamp'], y=df['gpu_usage'], name='GPU %'),
-#             row=3, col=1
-#         )
-#         fig.add_trace(
-#             go.Scatter(x=df['timestamp'], y=df['gpu_memory_mb'], name='GPU Memory MB'),
-#             row=3, col=1
-#         )
-    
-#     fig.update_layout(height=1200, title_text="System Resource Usage")
-#     fig.write_html(os.path.join(session_dir, 'visualization.html'))
+    def close(self):
+        if self.owns_probe_set:
+            self.probe_set.close()
+
+class ProcessTreeCollector:
+    """Collects metrics for a root process and all of its descendants.
+
+    Children are discovered on every sample, so processes spawned after the
+    monitor attached (e.g. the gesture and voice modules started by
+    run_parallel.py) are picked up, and exited ones are dropped. Each process
+    keeps its own SystemMetricsCollector so CPU and I/O deltas stay per process,
+    while all of them share one ProbeSet and therefore one schema.
+
+    ``fields`` is the schema of the rolled-up total (the per-process schema
+    plus ``process_count``), ``process_fields`` that of the per-process rows
+    (``pid`` plus the per-process schema).
+    """
+
+    def __init__(self, root, probe_set: ProbeSet = None, discovery_interval: float = 0.25):
+        self.root = root
+        self.owns_probe_set = probe_set is None
+        self.probe_set = probe_set or PROBES.detect(root, DEFAULT_PROBES)
+        # Walking the tree reads /proc for every process on the host, so at
+        # short sampling intervals children are looked up less often than
+        # they are sampled.
+        self.discovery_interval = discovery_interval
+        self._last_discovery = None
+        root_collector = SystemMetricsCollector(root, self.probe_set)
+        self.collectors = {root.pid: root_collector}
+        self.fields = root_collector.fields + [('process_count', 'i')]
+        self.names = [name for name, _ in self.fields]
+        self.process_fields = [('pid', 'i')] + root_collector.fields
+        # Host-wide metrics are the same for every process, so they are not
+        # summed when rolling the tree up into a total.
+        self.device_wide_indexes = [root_collector.names.index(name)
+                                    for name in self.probe_set.device_wide_fields]
+        self.cumulative_indexes = [index for index, name in enumerate(root_collector.names)
+                                   if name in CUMULATIVE_FIELDS]
+        self.exited_totals = [0] * len(self.cumulative_indexes)
+        self.last_values = {}
+        self.process_info = {}
+        self.process_values = []
+        self.series_values = []
+        self._register(root)
+
+    def _register(self, process):
+        try:
+            name = process.name()
+            cmdline = process.cmdline()
+            ppid = process.ppid()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            name, cmdline, ppid = '?', [], None
+        self.process_info[process.pid] = {
+            'pid': process.pid,
+            'ppid': ppid,
+            'process_name': name,
+            'command_line': cmdline,
+            'first_seen': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'last_seen': None,
+        }
+
+    def refresh_children(self):
+        now = time.monotonic()
+        if self._last_discovery is not None and now - self._last_discovery < self.discovery_interval:
+            return
+        self._last_discovery = now
+        try:
+            children = self.root.children(recursive=True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            # The root is gone; keep sampling the descendants we already know.
+            return
+
+        for child in children:
+            known = self.collectors.get(child.pid)
+            # psutil.Process equality includes create_time, so a recycled PID
+            # is treated as a new process.
+            if known is not None and known.process == child:
+                continue
+            try:
+                self.collectors[child.pid] = SystemMetricsCollector(child, self.probe_set)
+            except psutil.NoSuchProcess:
+                continue
+            self._register(child)
+            print(f"Child process started: {child.pid} ({self.process_info[child.pid]['process_name']})")
+
+    def collect_metrics(self) -> Dict:
+        values = self.collect_values()
+        return dict(zip(self.names, values)) if values is not None else None
+
+    def collect_values(self) -> Tuple:
+        """Samples every process in the tree.
 
-def monitor_process(pid: int, session_manager: SessionManager):
+        Returns the rolled-up total for the tree in ``fields`` order, or None
+        once no process in the tree is alive. The per-process rows of the same
+        sample, in ``process_fields`` order, are left in ``self.process_values``.
+        """
+        self.refresh_children()
+        self.process_values = []
+        self.series_values = []
+
+        now = time.monotonic()
+        for pid, collector in list(self.collectors.items()):
+            values = collector.collect_values(now)
+            if values is None:
+                del self.collectors[pid]
+                self.process_info[pid]['last_seen'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                print(f"Process exited: {pid} ({self.process_info[pid]['process_name']})")
+                last = self.last_values.pop(pid, None)
+                if last is not None:
+                    for position, index in enumerate(self.cumulative_indexes):
+                        self.exited_totals[position] += last[index]
+                continue
+            self.last_values[pid] = values
+            self.process_values.append((pid,) + values)
+            self.series_values.extend(collector.series_values)
+
+        if not self.process_values:
+            return None
+
+        return self.aggregate([values[1:] for values in self.process_values])
+
+    def aggregate(self, samples: List[Tuple]) -> Tuple:
+        """Rolls per-process samples up into one total in ``fields`` order.
+
+        Cumulative counters include the last values of processes that have
+        exited, so the total stays monotonic as children come and go.
+        """
+        columns = list(zip(*samples))
+        total = [sum(column) for column in columns]
+        total[0] = columns[0][0]
+        for index in self.device_wide_indexes:
+            total[index] = max(columns[index])
+        for position, index in enumerate(self.cumulative_indexes):
+            total[index] += self.exited_totals[position]
+        return tuple(total) + (len(samples),)
+
+    def close(self):
+        if self.owns_probe_set:
+            self.probe_set.close()
+
+class SampleScheduler:
+    """Paces sampling on a fixed grid of deadlines instead of sleeping a fixed time.
+
+    Deadlines are ``start + n * interval`` on the monotonic clock, so the cost
+    of a sample never accumulates into drift. If a sample overruns one or more
+    deadlines they are counted as missed and skipped, and sampling resumes at
+    the next deadline on the grid rather than bursting to catch up.
+    """
+
+    def __init__(self, interval: float):
+        self.interval_ns = int(interval * 1e9)
+        self.next_deadline = None
+        self.ticks = 0
+        self.missed_deadlines = 0
+        self.max_overrun_ns = 0
+
+    def wait(self):
+        now = time.monotonic_ns()
+        if self.next_deadline is None:
+            self.next_deadline = now
+        else:
+            self.next_deadline += self.interval_ns
+            if now > self.next_deadline:
+                overrun = now - self.next_deadline
+                self.max_overrun_ns = max(self.max_overrun_ns, overrun)
+                skipped = overrun // self.interval_ns + 1
+                self.missed_deadlines += skipped
+                self.next_deadline += skipped * self.interval_ns
+            time.sleep((self.next_deadline - now) / 1e9)
+        self.ticks += 1
+
+    def stats(self) -> Dict:
+        return {
+            'interval_s': self.interval_ns / 1e9,
+            'ticks': self.ticks,
+            'missed_deadlines': self.missed_deadlines,
+            'max_overrun_ms': self.max_overrun_ns / 1e6,
+        }
+
+class OverheadMonitor:
+    """Accounts for what the monitor itself costs, so its numbers can be trusted.
+
+    Every tick ``record()`` returns a row for the 'monitor' series: the
+    monitor's cumulative CPU time (all of its threads, from os.times()), its
+    RSS, the wall time of the whole tick and of collection, and the time spent
+    in each probe during the tick. ``summary()`` relates the monitor's CPU time
+    to the CPU time of the target it watched.
+    """
+
+    def __init__(self, probe_set: ProbeSet, interval: float):
+        self.probe_set = probe_set
+        self.interval = interval
+        self.process = psutil.Process()
+        self.fields = [TIMESTAMP_FIELD, ('monitor_cpu_user', 'd'), ('monitor_cpu_system', 'd'),
+                       ('monitor_rss_mb', 'd'), ('tick_ms', 'd'), ('collect_ms', 'd')]
+        self.fields += [(f'probe_{name}_ms', 'd') for name in probe_set.names]
+        self.previous_ns = list(probe_set.timings_ns)
+        self.start_times = os.times()
+        self.start = time.monotonic()
+        # The target's CPU % covers the time since the previous tick, which is
+        # the interval only when no tick ran late or was skipped
+        self.previous_tick_ns = time.perf_counter_ns()
+        self.ticks = 0
+        self.tick_ns_total = 0
+        self.tick_ns_max = 0
+        self.max_rss_mb = 0.0
+        self.target_cpu_seconds = 0.0
+
+    def record(self, tick_start_ns: int, collect_end_ns: int, target_cpu_percent: float) -> Tuple:
+        tick_ns = time.perf_counter_ns() - tick_start_ns
+        timings_ns = self.probe_set.timings_ns
+        probe_ms = [(total - previous) / 1e6 for total, previous in zip(timings_ns, self.previous_ns)]
+        self.previous_ns = list(timings_ns)
+        times = os.times()
+        rss_mb = self.process.memory_info().rss / 1024 / 1024
+
+        self.ticks += 1
+        self.tick_ns_total += tick_ns
+        self.tick_ns_max = max(self.tick_ns_max, tick_ns)
+        self.max_rss_mb = max(self.max_rss_mb, rss_mb)
+        self.target_cpu_seconds += target_cpu_percent / 100 * (tick_start_ns - self.previous_tick_ns) / 1e9
+        self.previous_tick_ns = tick_start_ns
+        return (timestamp_ns(), times.user - self.start_times.user, times.system - self.start_times.system,
+                rss_mb, tick_ns / 1e6, (collect_end_ns - tick_start_ns) / 1e6, *probe_ms)
+
+    def summary(self) -> Dict:
+        times = os.times()
+        cpu_seconds = (times.user - self.start_times.user) + (times.system - self.start_times.system)
+        wall_seconds = time.monotonic() - self.start
+        ticks = max(self.ticks, 1)
+        return {
+            'cpu_seconds': cpu_seconds,
+            'cpu_percent': cpu_seconds / wall_seconds * 100 if wall_seconds > 0 else 0,
+            'max_rss_mb': self.max_rss_mb,
+            'mean_tick_ms': self.tick_ns_total / ticks / 1e6,
+            'max_tick_ms': self.tick_ns_max / 1e6,
+            'probe_ms_per_tick': {name: total / ticks / 1e6
+                                  for name, total in zip(self.probe_set.names, self.probe_set.timings_ns)},
+            'background_read_ms': self.probe_set.background_read_ms(),
+            'target_cpu_seconds': self.target_cpu_seconds,
+            'fraction_of_target': cpu_seconds / self.target_cpu_seconds if self.target_cpu_seconds else None,
+        }
+
+def monitor_process(pid: int, session_manager: SessionManager, tree: bool = False,
+                    chunk_size: int = 500, interval: float = 1.0, probes: List[str] = None,
+                    dashboard_port: int = None, exporter_port: int = None, alert_rules: List[str] = None,
+                    alert_hook=None, report: bool = True):
+    collector = probe_set = metrics_writer = process_metrics_writer = dashboard = exporter = None
+    stats = alerts = overhead = monitor_writer = None
+    series_writers = {}
+    scheduler = SampleScheduler(interval)
+    # Console output is limited to about one line per second at any interval
+    print_every = max(1, round(1 / interval))
     try:
         process = psutil.Process(pid)
         session_info = {
@@ -161,120 +380,297 @@ def monitor_process(pid: int, session_manager: SessionManager):
             'pid': pid,
             'process_name': process.name(),
             'command_line': process.cmdline(),
+            'mode': 'tree' if tree else 'process',
             'status': 'running'
         }
+        probe_set = PROBES.detect(process, probes or DEFAULT_PROBES)
+        session_info['probes'] = probe_set.describe()
+        print(f"Probes: {', '.join(probe_set.describe()['enabled'])}")
+        # Written up front so a killed session still records what it was watching
+        session_manager.save_session_info(session_info)
         
-        collector = SystemMetricsCollector(process)
-        metrics_list = []
+        if tree:
+            collector = ProcessTreeCollector(process, probe_set)
+            process_metrics_writer = session_manager.create_writer("process_metrics", collector.process_fields, chunk_size)
+        else:
+            collector = SystemMetricsCollector(process, probe_set)
+        metrics_writer = session_manager.create_writer("metrics", collector.fields, chunk_size)
+        for series, fields in probe_set.series.items():
+            series_writers[series] = session_manager.create_writer(
+                series, [TIMESTAMP_FIELD, ('pid', 'i')] + fields, chunk_size)
+        if dashboard_port is not None:
+            from dashboard import LiveDashboard
+            dashboard = LiveDashboard(collector.fields, dashboard_port,
+                                      title=f"{session_info['process_name']} ({pid})")
+            dashboard.start()
+        if exporter_port is not None:
+            from exporter import MetricsExporter
+            exporter = MetricsExporter(collector.fields, exporter_port,
+                                       labels={'pid': str(pid), 'process': session_info['process_name']})
+            exporter.start()
+        overhead = OverheadMonitor(probe_set, interval)
+        monitor_writer = session_manager.create_writer("monitor", overhead.fields, chunk_size)
+        # Rolling statistics and alerts are updated as samples arrive, without keeping them
+        stats = RollingStats(collector.fields)
+        if alert_rules:
+            alerts = AlertEngine([AlertRule(rule) for rule in alert_rules], stats,
+                                 os.path.join(session_manager.session_dir, "alerts.jsonl"), alert_hook)
+        cpu_percent = collector.names.index('cpu_percent')
+        memory_percent = collector.names.index('memory_percent')
+        memory_rss_mb = collector.names.index('memory_rss_mb')
         
         while True:
-            metrics = collector.collect_metrics()
-            if metrics is None:
+            scheduler.wait()
+            tick_start = time.perf_counter_ns()
+            values = collector.collect_values()
+            if values is None:
                 break
+            collect_end = time.perf_counter_ns()
                 
-            metrics_list.append(metrics)
-            print(f"CPU: {metrics['cpu_percent']}% | Memory: {metrics['memory_percent']}% | "
-                  f"RSS: {metrics['memory_rss_mb']:.1f} MB")
-            
-            time.sleep(1)
+            metrics_writer.append(values)
+            elapsed = stats.update(values)
+            if alerts is not None:
+                alerts.check(elapsed)
+            if dashboard is not None:
+                dashboard.publish(values)
+            if exporter is not None:
+                exporter.publish(values)
+            if tree:
+                process_metrics_writer.extend(collector.process_values)
+            for series, row in collector.series_values:
+                series_writers[series].append(row)
+            monitor_writer.append(overhead.record(tick_start, collect_end, values[cpu_percent]))
+            if scheduler.ticks % print_every:
+                continue
+            if tree:
+                print(f"Processes: {values[-1]} | "
+                      f"CPU: {values[cpu_percent]:.1f}% | Memory: {values[memory_percent]:.1f}% | "
+                      f"RSS: {values[memory_rss_mb]:.1f} MB")
+            else:
+                print(f"CPU: {values[cpu_percent]}% | Memory: {values[memory_percent]}% | "
+                      f"RSS: {values[memory_rss_mb]:.1f} MB")
+            if scheduler.missed_deadlines:
+                print(f"Missed deadlines: {scheduler.missed_deadlines} "
+                      f"(max overrun {scheduler.max_overrun_ns / 1e6:.1f} ms)")
             
     except psutil.NoSuchProcess:
         print(f"Process {pid} not found")
         return
     finally:
+        if probe_set is not None:
+            probe_set.close()
+        if dashboard is not None:
+            dashboard.close()
+        if exporter is not None:
+            exporter.close()
         if 'session_info' in locals():
             session_info['end_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             session_info['status'] = 'completed'
+            session_info['sampling'] = scheduler.stats()
+            if stats is not None:
+                session_info['rolling_stats'] = stats.summary()
+            if alerts is not None:
+                session_info['alerts_fired'] = alerts.fired
+            if monitor_writer is not None:
+                monitor_writer.close()
+                session_info['monitor_overhead'] = overhead.summary()
+            if metrics_writer is not None:
+                metrics_writer.close()
+                session_info['samples'] = metrics_writer.rows_written
+            if process_metrics_writer is not None:
+                process_metrics_writer.close()
+                session_info['processes'] = list(collector.process_info.values())
+            for writer in series_writers.values():
+                writer.close()
+            if series_writers:
+                session_info['series'] = probe_set.series_info()
             session_manager.save_session_info(session_info)
             
-            if metrics_list:
-                df = pd.DataFrame(metrics_list)
-                df.to_csv(session_manager.get_data_path(), index=False)
-                create_visualizations(df, session_manager.session_dir)
-
-
-def create_visualizations(df: pd.DataFrame, session_dir: str):
-    # Create subplots with correct height specifications
-    fig = make_subplots(
-        rows=3, cols=1,
-        subplot_titles=('CPU & Memory Usage', 'I/O Activity', 'GPU Metrics'),
-        vertical_spacing=0.2,
-        row_heights=[0.4, 0.3, 0.3]  # Changed from 'heights' to 'row_heights'
-    )
-    
-    # CPU and Memory plot
-    fig.add_trace(
-        go.Scatter(x=df['timestamp'], y=df['cpu_percent'], name='CPU %'),
-        row=1, col=1
-    )
-    fig.add_trace(
-        go.Scatter(x=df['timestamp'], y=df['memory_percent'], name='Memory %'),
-        row=1, col=1
-    )
-    
-    # I/O plot
-    if 'io_read_mb' in df.columns:
-        fig.add_trace(
-            go.Scatter(x=df['timestamp'], y=df['io_read_mb'], name='Read MB/s'),
-            row=2, col=1
-        )
-        fig.add_trace(
-            go.Scatter(x=df['timestamp'], y=df['io_write_mb'], name='Write MB/s'),
-            row=2, col=1
-        )
-    
-    # GPU plot
-    if 'gpu_usage' in df.columns:
-        fig.add_trace(
-            go.Scatter(x=df['timestamp'], y=df['gpu_usage'], name='GPU %'),
-            row=3, col=1
-        )
-        fig.add_trace(
-            go.Scatter(x=df['timestamp'], y=df['gpu_memory_mb'], name='GPU Memory MB'),
-            row=3, col=1
-        )
-    
-    # Update layout
-    fig.update_layout(
-        height=1200,
-        title_text="System Resource Usage",
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
-    )
-
-    # Update y-axes labels
-    fig.update_yaxes(title_text="Percentage (%)", row=1, col=1)
-    fig.update_yaxes(title_text="MB/s", row=2, col=1)
-    fig.update_yaxes(title_text="Usage", row=3, col=1)
-
-    # Save the figure
-    fig.write_html(os.path.join(session_dir, 'visualization.html'))
-
-def run_and_monitor(command: str, session_manager: SessionManager):
+            if report:
+                # Rebuilt from the series on disk once sampling has stopped.
+                # Imports pandas and plotly, which collection never needs.
+                from report import render_session
+                render_session(session_manager.session_dir)
+                session_manager.catalog()
+            else:
+                print(f"Render the report later with: monitor.py report {session_manager.session_dir}")
+
+
+def run_and_monitor(command: str, session_manager: SessionManager, tree: bool = False,
+                    chunk_size: int = 500, interval: float = 1.0, probes: List[str] = None,
+                    dashboard_port: int = None, exporter_port: int = None, alert_rules: List[str] = None,
+                    report: bool = True):
     process = subprocess.Popen(command.split())
     print(f"Started process with PID: {process.pid}")
-    monitor_process(process.pid, session_manager)
+    monitor_process(process.pid, session_manager, tree, chunk_size, interval, probes, dashboard_port,
+                    exporter_port, alert_rules, report=report)
     process.wait()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Monitor process resource usage')
     parser.add_argument('--command', type=str, help='Command to run and monitor')
     parser.add_argument('--pid', type=int, help='PID of existing process to monitor')
+    parser.add_argument('--tree', action='store_true',
+                        help='Also monitor child processes, with per-process and total series')
+    parser.add_argument('--chunk-size', type=int, default=500,
+                        help='Samples buffered in memory before being flushed to disk')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='Sampling interval in seconds (down to 0.01)')
+    parser.add_argument('--probes', type=str, default=','.join(DEFAULT_PROBES),
+                        help=f"Comma-separated probes or groups to enable "
+                             f"(available: {', '.join(list(PROBES.probes) + list(PROBES.groups))})")
+    parser.add_argument('--dashboard', type=int, metavar='PORT',
+                        help='Serve a live dashboard on http://127.0.0.1:PORT/ while monitoring')
+    parser.add_argument('--exporter', type=int, metavar='PORT',
+                        help='Serve the latest sample for Prometheus on http://127.0.0.1:PORT/metrics')
+    parser.add_argument('--alert', action='append', metavar='RULE',
+                        help="Alert while monitoring, e.g. 'cpu_percent.ewma > 90 for 10s', "
+                             "'memory_rss_mb.slope > 0.5 for 60s' or 'cpu_percent.zscore > 4' (repeatable)")
+    parser.add_argument('--headless', action='store_true',
+                        help='Only collect samples; render the report later with the report subcommand')
+
+    subparsers = parser.add_subparsers(dest='action')
+    convert_parser = subparsers.add_parser(
+        'convert', help='Convert CSV sessions and Process Monitor Tool CSVs to the binary format')
+    convert_parser.add_argument('paths', nargs='+', help='CSV files or session directories')
+    compare_parser = subparsers.add_parser(
+        'compare', help='Compare sessions against the first one and check regression thresholds')
+    compare_parser.add_argument('paths', nargs='+',
+                                help='Session directories, .bin series or CSVs; the first is the baseline')
+    compare_parser.add_argument('--threshold', action='append', metavar='METRIC=LIMIT',
+                                help='Allowed increase over the baseline, e.g. cpu_percent.p95=10%% or '
+                                     'peak_rss_mb=50 (repeatable)')
+    compare_parser.add_argument('--output', type=str, help='Also write the report to a .txt or .json file')
+    watch_parser = subparsers.add_parser(
+        'watch', help='Monitor many processes at once, selected by PID, name pattern or cgroup')
+    watch_parser.add_argument('--target-pid', type=int, action='append', default=[], metavar='PID',
+                              help='PID to watch (repeatable)')
+    watch_parser.add_argument('--name', action='append', default=[], metavar='PATTERN',
+                              help="Process name or script pattern, e.g. 'proton*' (repeatable)")
+    watch_parser.add_argument('--cgroup', action='append', default=[], metavar='PATH',
+                              help='cgroup whose processes to watch, relative to /sys/fs/cgroup (repeatable)')
+    watch_parser.add_argument('--duration', type=float, help='Stop after this many seconds')
+    report_parser = subparsers.add_parser(
+        'report', help='Render visualization.html for recorded sessions and add them to the catalog')
+    report_parser.add_argument('paths', nargs='+', help='Session directories')
+    report_parser.add_argument('--point-budget', type=int, default=5000,
+                               help='Points per trace after decimation (0 plots every sample)')
+    report_parser.add_argument('--max-overhead', type=float, default=0.05, metavar='FRACTION',
+                               help="Flag sessions where the monitor's CPU time exceeds this fraction of the target's")
+    catalog_parser = subparsers.add_parser('catalog', help='Query or backfill the catalog of past sessions')
+    catalog_parser.add_argument('--base-dir', type=str, default='monitoring_sessions',
+                                help='Directory holding the sessions and catalog.sqlite')
+    catalog_actions = catalog_parser.add_subparsers(dest='catalog_action', required=True)
+    backfill_parser = catalog_actions.add_parser('backfill', help='Catalog existing session directories')
+    backfill_parser.add_argument('--force', action='store_true', help='Re-catalog sessions already present')
+    query_parser = catalog_actions.add_parser('query', help='List cataloged sessions')
+    query_parser.add_argument('--process', type=str, help="Process name or script, e.g. 'proton.py'")
+    query_parser.add_argument('--command-contains', type=str, help='Substring of the command line')
+    query_parser.add_argument('--since', type=str, help="Date, datetime or relative time such as '7d'")
+    query_parser.add_argument('--until', type=str, help='Date, datetime or relative time')
+    query_parser.add_argument('--min-peak-rss', type=float, metavar='MB')
+    query_parser.add_argument('--min-cpu-p95', type=float, metavar='PERCENT')
+    query_parser.add_argument('--order-by', type=str, default='start_time')
+    query_parser.add_argument('--limit', type=int, default=50)
+    query_parser.add_argument('--json', action='store_true', help='Print the rows as JSON')
     
     args = parser.parse_args()
+
+    if args.action == 'convert':
+        for path in args.paths:
+            if os.path.isdir(path):
+                converted = convert_session(path)
+                print(f"{path}: converted {', '.join(converted) if converted else 'nothing'}")
+            else:
+                out_path = os.path.splitext(path)[0] + '.bin'
+                samples = convert_csv([path], out_path)
+                print(f"{path}: {samples} samples -> {out_path}")
+        sys.exit(0)
+
+    if args.action == 'compare':
+        from compare import compare_sessions, format_report, parse_thresholds, write_report
+        if len(args.paths) < 2:
+            parser.error('compare needs at least two sessions')
+        try:
+            thresholds = parse_thresholds(args.threshold)
+        except ValueError as e:
+            parser.error(str(e))
+        report = compare_sessions(args.paths, thresholds)
+        print(format_report(report))
+        if args.output:
+            write_report(report, args.output)
+        sys.exit(0 if report['passed'] else 1)
+
+    if args.action == 'report':
+        from report import render_session
+        for path in args.paths:
+            stats = render_session(path, args.point_budget, args.max_overhead)
+            if stats is None:
+                print(f"{path}: no metrics recorded")
+                continue
+            catalog_session(path)
+            print(f"{path}: {stats['plotted_points']:,} of {stats['raw_points']:,} points plotted")
+        sys.exit(0)
+
+    if args.action == 'catalog':
+        from catalog import backfill, format_rows, query
+        catalog_path = os.path.join(args.base_dir, CATALOG_NAME)
+        if args.catalog_action == 'backfill':
+            added = backfill(args.base_dir, catalog_path, args.force)
+            print(f"Cataloged {added} session(s) in {catalog_path}")
+        else:
+            try:
+                rows = query(catalog_path, args.process, args.command_contains, args.since, args.until,
+                             args.min_peak_rss, args.min_cpu_p95, args.order_by, args.limit)
+            except ValueError as e:
+                parser.error(str(e))
+            print(json.dumps(rows, indent=4) if args.json else format_rows(rows))
+        sys.exit(0)
+
+    if args.interval < 0.01:
+        parser.error('--interval must be at least 0.01 seconds')
+    probes = [name.strip() for name in args.probes.split(',') if name.strip()]
+    unknown = [name for name in probes if name not in PROBES.probes and name not in PROBES.groups]
+    if unknown:
+        parser.error(f"unknown probe(s): {', '.join(unknown)}")
+    rules = []
+    for rule in args.alert or []:
+        try:
+            rules.append(AlertRule(rule))
+        except ValueError as e:
+            parser.error(str(e))
+    if rules and args.action != 'watch':
+        # Probes are detected again on the target; a launched command runs on this host as this
+        # user, so the monitor itself stands in for it here, before anything is started
+        try:
+            probe_set = PROBES.detect(psutil.Process(args.pid) if args.pid and not args.command else psutil.Process(),
+                                      probes)
+        except psutil.Error as e:
+            parser.error(f"cannot monitor PID {args.pid}: {e}")
+        metrics = [name for name, _ in probe_set.fields]
+        probe_set.close()
+        for rule in rules:
+            if rule.metric not in metrics:
+                parser.error(f"Alert rule {rule.text!r}: no metric {rule.metric} in this session "
+                             f"(recorded: {', '.join(metrics)})")
+
+    # Let SIGTERM unwind through monitor_process so the session is finalized
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     
     session_manager = SessionManager()
     print(f"Starting new monitoring session: {session_manager.session_id}")
     
-    if args.command:
-        run_and_monitor(args.command, session_manager)
+    if args.action == 'watch':
+        from multi_target import TargetSelector, monitor_targets
+        if not (args.target_pid or args.name or args.cgroup):
+            parser.error('watch needs at least one --target-pid, --name or --cgroup')
+        selector = TargetSelector(args.target_pid, args.name, args.cgroup)
+        monitor_targets(selector, session_manager, args.interval, args.chunk_size, args.duration)
+    elif args.command:
+        run_and_monitor(args.command, session_manager, args.tree, args.chunk_size, args.interval, probes,
+                        args.dashboard, args.exporter, args.alert, report=not args.headless)
     elif args.pid:
-        monitor_process(args.pid, session_manager)
+        monitor_process(args.pid, session_manager, args.tree, args.chunk_size, args.interval, probes,
+                        args.dashboard, args.exporter, args.alert, report=not args.headless)
     else:
         print("Please provide either --command or --pid")
\ No newline at end of file
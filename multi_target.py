@@ -0,0 +1,280 @@
+import asyncio
+import fnmatch
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Sequence, Set, Tuple
+
+import psutil
+
+from catalog import script_name
+from monitor import TIMESTAMP_FIELD, SessionManager, timestamp_ns
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# One row per target per tick, in the 'targets' series
+TARGET_FIELDS = [
+    TIMESTAMP_FIELD,
+    ('pid', 'i'),
+    ('cpu_percent', 'd'),
+    ('memory_percent', 'd'),
+    ('memory_rss_mb', 'd'),
+    ('io_read_mb', 'd'),
+    ('io_write_mb', 'd'),
+]
+
+# Read with one oneshot() per target where /proc cannot be read directly
+SAMPLE_ATTRS = ['status', 'cpu_times', 'memory_info', 'io_counters']
+
+HAS_PROCFS = os.path.exists('/proc/self/stat')
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if HAS_PROCFS else 100
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if HAS_PROCFS else 4096
+
+# CPU seconds, RSS bytes, bytes read and bytes written by one target
+Reading = Tuple[float, int, int, int]
+
+
+class TargetState:
+    """What is kept between ticks for one target: its handle and previous counters."""
+
+    __slots__ = ('process', 'name', 'start_ticks', 'cpu_prev', 'read_prev', 'write_prev', 'time_prev')
+
+    def __init__(self, process: psutil.Process, name: str):
+        self.process = process
+        self.name = name
+        self.start_ticks = None
+        self.cpu_prev = None
+        self.read_prev = 0
+        self.write_prev = 0
+        self.time_prev = 0.0
+
+
+class TargetSelector:
+    """Resolves PIDs, process name patterns and cgroups to the set of PIDs to watch.
+
+    Name patterns are shell-style (``proton*``) and match the process name or,
+    for interpreters, the script they run (as ``catalog.script_name`` gives
+    it), so ``proton.py`` finds the Python process running it but ``sleep*``
+    does not find ``timeout 60 sleep 10``. The monitor and the processes it
+    was started from never match. Cgroups are directories under /sys/fs/cgroup
+    (relative paths are resolved against it); every process listed in their
+    ``cgroup.procs`` is a target.
+    """
+
+    def __init__(self, pids: Sequence[int] = (), names: Sequence[str] = (), cgroups: Sequence[str] = ()):
+        self.pids = set(pids)
+        self.names = list(names)
+        self.cgroups = [cgroup if os.path.isabs(cgroup) else os.path.join(CGROUP_ROOT, cgroup)
+                        for cgroup in cgroups]
+        own = psutil.Process()
+        self.excluded = {own.pid} | {parent.pid for parent in own.parents()}
+
+    def matches(self, info: Dict) -> bool:
+        candidates = [info['name'] or '', script_name(info['cmdline']) or '']
+        return any(fnmatch.fnmatch(candidate, pattern) for pattern in self.names for candidate in candidates)
+
+    def resolve(self) -> Set[int]:
+        pids = set(self.pids)
+        if self.names:
+            # One pass over the process table for all patterns
+            for process in psutil.process_iter(['name', 'cmdline']):
+                if process.pid not in self.excluded and self.matches(process.info):
+                    pids.add(process.pid)
+        for cgroup in self.cgroups:
+            try:
+                with open(os.path.join(cgroup, 'cgroup.procs')) as f:
+                    pids.update(int(line) for line in f if line.strip())
+            except OSError as e:
+                print(f"Cannot read cgroup {cgroup}: {e}")
+        return pids
+
+
+class MultiTargetMonitor:
+    """Samples many processes from a single asyncio event loop.
+
+    Targets are re-resolved every ``discovery_interval`` seconds, so instances
+    started later are picked up and exited ones dropped. Each tick reads every
+    target's counters and derives CPU and I/O rates from those kept in its
+    TargetState, instead of running a full probe set per process. psutil has
+    no call that reads many processes at once (``process_iter`` reads the whole
+    process table), so on Linux each target costs two reads, of
+    ``/proc/<pid>/stat`` and ``/proc/<pid>/io``, and elsewhere one
+    ``oneshot()``. ``overhead`` tracks how long ticks take against the number
+    of targets they sampled.
+    """
+
+    def __init__(self, selector: TargetSelector, interval: float = 1.0, discovery_interval: float = 1.0,
+                 procfs: bool = HAS_PROCFS, verbose: bool = True):
+        self.selector = selector
+        self.read = self.read_procfs if procfs else self.read_psutil
+        self.verbose = verbose
+        self.interval = interval
+        self.discovery_interval = discovery_interval
+        self.targets: Dict[int, TargetState] = {}
+        self.seen: Dict[int, Dict] = {}
+        self.memory_total = psutil.virtual_memory().total
+        self._next_discovery = 0.0
+        self.ticks = 0
+        self.missed_deadlines = 0
+        self.tick_ns_total = 0
+        self.tick_ns_max = 0
+        self.target_ticks = 0
+
+    def discover(self, now: float):
+        if now < self._next_discovery:
+            return
+        self._next_discovery = now + self.discovery_interval
+        pids = self.selector.resolve()
+        for pid in pids - self.targets.keys():
+            try:
+                process = psutil.Process(pid)
+                state = TargetState(process, process.name())
+            except psutil.NoSuchProcess:
+                continue
+            self.targets[pid] = state
+            self.seen.setdefault(pid, {'pid': pid, 'process_name': state.name,
+                                       'first_seen': datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+            if self.verbose:
+                print(f"Target added: {state.name} ({pid})")
+        for pid in self.targets.keys() - pids:
+            self.drop(pid)
+
+    def drop(self, pid: int):
+        state = self.targets.pop(pid)
+        self.seen[pid]['last_seen'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if self.verbose:
+            print(f"Target gone: {state.name} ({pid})")
+
+    def read_procfs(self, pid: int, state: TargetState) -> Reading:
+        """Counters of a target from /proc, or None once it has exited or its PID was reused."""
+        try:
+            with open(f'/proc/{pid}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            return None
+        # The command name in parentheses may itself contain spaces and parentheses
+        fields = stat[stat.rindex(b')') + 2:].split()
+        start_ticks = int(fields[19])
+        if state.start_ticks is None:
+            state.start_ticks = start_ticks
+        if fields[0] == b'Z' or start_ticks != state.start_ticks:
+            return None
+        cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        read_bytes = write_bytes = 0
+        try:
+            with open(f'/proc/{pid}/io', 'rb') as f:
+                for line in f:
+                    if line.startswith(b'read_bytes:'):
+                        read_bytes = int(line[11:])
+                    elif line.startswith(b'write_bytes:'):
+                        write_bytes = int(line[12:])
+        except OSError:
+            # Other users' processes do not expose their I/O
+            pass
+        return cpu, int(fields[21]) * PAGE_SIZE, read_bytes, write_bytes
+
+    def read_psutil(self, pid: int, state: TargetState) -> Reading:
+        """Counters of a target through psutil, or None once it has exited."""
+        try:
+            info = state.process.as_dict(SAMPLE_ATTRS)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+        if info['status'] == psutil.STATUS_ZOMBIE:
+            return None
+        cpu_times = info['cpu_times']
+        io = info['io_counters']
+        read_bytes, write_bytes = (io.read_bytes, io.write_bytes) if io else (0, 0)
+        return cpu_times.user + cpu_times.system, info['memory_info'].rss, read_bytes, write_bytes
+
+    def sample(self) -> List[tuple]:
+        """Samples every current target once, returning rows in TARGET_FIELDS order."""
+        now = time.monotonic()
+        self.discover(now)
+        timestamp = timestamp_ns()
+        rows, gone = [], []
+        read = self.read
+        for pid, state in self.targets.items():
+            reading = read(pid, state)
+            if reading is None:
+                gone.append(pid)
+                continue
+
+            cpu, rss, read_bytes, write_bytes = reading
+            if state.cpu_prev is None:
+                # Rates need two readings; the first tick only primes the counters
+                cpu_percent = read_mb = write_mb = 0.0
+            else:
+                elapsed = now - state.time_prev
+                cpu_percent = (cpu - state.cpu_prev) / elapsed * 100 if elapsed > 0 else 0.0
+                read_mb = (read_bytes - state.read_prev) / elapsed / 1024 / 1024 if elapsed > 0 else 0.0
+                write_mb = (write_bytes - state.write_prev) / elapsed / 1024 / 1024 if elapsed > 0 else 0.0
+            state.cpu_prev, state.read_prev, state.write_prev, state.time_prev = cpu, read_bytes, write_bytes, now
+            rows.append((timestamp, pid, cpu_percent, rss / self.memory_total * 100, rss / 1024 / 1024,
+                         read_mb, write_mb))
+        for pid in gone:
+            self.drop(pid)
+        return rows
+
+    async def run(self, writer=None, duration: float = None):
+        """Samples on a fixed deadline grid until cancelled or ``duration`` elapses."""
+        loop = asyncio.get_running_loop()
+        start = deadline = loop.time()
+        print_every = max(1, round(1 / self.interval))
+        while duration is None or deadline - start < duration:
+            tick_start = time.perf_counter_ns()
+            rows = self.sample()
+            tick_ns = time.perf_counter_ns() - tick_start
+            self.ticks += 1
+            self.tick_ns_total += tick_ns
+            self.tick_ns_max = max(self.tick_ns_max, tick_ns)
+            self.target_ticks += len(rows)
+
+            if writer is not None:
+                writer.extend(rows)
+            if self.ticks % print_every == 0:
+                print(f"Targets: {len(rows)} | CPU: {sum(row[2] for row in rows):.1f}% | "
+                      f"RSS: {sum(row[4] for row in rows):.1f} MB | tick {tick_ns / 1e6:.2f} ms")
+
+            deadline += self.interval
+            now = loop.time()
+            if now > deadline:
+                skipped = int((now - deadline) // self.interval) + 1
+                self.missed_deadlines += skipped
+                deadline += skipped * self.interval
+            await asyncio.sleep(deadline - now)
+
+    def overhead(self) -> Dict:
+        return {
+            'ticks': self.ticks,
+            'missed_deadlines': self.missed_deadlines,
+            'mean_targets': self.target_ticks / self.ticks if self.ticks else 0,
+            'mean_tick_ms': self.tick_ns_total / self.ticks / 1e6 if self.ticks else 0,
+            'max_tick_ms': self.tick_ns_max / 1e6,
+            'us_per_target': self.tick_ns_total / self.target_ticks / 1e3 if self.target_ticks else 0,
+        }
+
+
+def monitor_targets(selector: TargetSelector, session_manager: SessionManager, interval: float = 1.0,
+                    chunk_size: int = 500, duration: float = None):
+    monitor = MultiTargetMonitor(selector, interval)
+    session_info = {
+        'start_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'mode': 'targets',
+        'selectors': {'pids': sorted(selector.pids), 'names': selector.names, 'cgroups': selector.cgroups},
+        'status': 'running'
+    }
+    session_manager.save_session_info(session_info)
+    writer = session_manager.create_writer("targets", TARGET_FIELDS, chunk_size)
+    try:
+        asyncio.run(monitor.run(writer, duration))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+        session_info['end_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        session_info['status'] = 'completed'
+        session_info['samples'] = writer.rows_written
+        session_info['overhead'] = monitor.overhead()
+        session_info['processes'] = list(monitor.seen.values())
+        session_manager.save_session_info(session_info)
+        session_manager.catalog()
@@ -9,10 +9,12 @@ from plotly.subplots import make_subplots
 import os
 import json
 from typing import Dict, List
+from report import DEFAULT_POINT_BUDGET, add_series
 
 # [Previous SessionManager and SystemMetricsCollector classes remain the same]
 
-def create_visualizations(df: pd.DataFrame, session_dir: str):
+def create_visualizations(df: pd.DataFrame, session_dir: str,
+                          point_budget: int = DEFAULT_POINT_BUDGET) -> Dict:
     # Create subplots with correct height specifications
     fig = make_subplots(
         rows=3, cols=1,
@@ -20,43 +22,33 @@ def create_visualizations(df: pd.DataFrame, session_dir: str):
         vertical_spacing=0.2,
         row_heights=[0.4, 0.3, 0.3]  # Changed from 'heights' to 'row_heights'
     )
+    stats = {'point_budget': point_budget}
     
-    # CPU and Memory plot
-    fig.add_trace(
-        go.Scatter(x=df['timestamp'], y=df['cpu_percent'], name='CPU %'),
-        row=1, col=1
-    )
-    fig.add_trace(
-        go.Scatter(x=df['timestamp'], y=df['memory_percent'], name='Memory %'),
-        row=1, col=1
-    )
+    # CPU and Memory plot (decimated to the point budget, WebGL when large)
+    add_series(fig, df['timestamp'], df['cpu_percent'], 'CPU %', 1, stats, point_budget)
+    add_series(fig, df['timestamp'], df['memory_percent'], 'Memory %', 1, stats, point_budget)
     
     # I/O plot
     if 'io_read_mb' in df.columns:
-        fig.add_trace(
-            go.Scatter(x=df['timestamp'], y=df['io_read_mb'], name='Read MB/s'),
-            row=2, col=1
-        )
-        fig.add_trace(
-            go.Scatter(x=df['timestamp'], y=df['io_write_mb'], name='Write MB/s'),
-            row=2, col=1
-        )
+        add_series(fig, df['timestamp'], df['io_read_mb'], 'Read MB/s', 2, stats, point_budget)
+        add_series(fig, df['timestamp'], df['io_write_mb'], 'Write MB/s', 2, stats, point_budget)
     
     # GPU plot
     if 'gpu_usage' in df.columns:
-        fig.add_trace(
-            go.Scatter(x=df['timestamp'], y=df['gpu_usage'], name='GPU %'),
-            row=3, col=1
-        )
-        fig.add_trace(
-            go.Scatter(x=df['timestamp'], y=df['gpu_memory_mb'], name='GPU Memory MB'),
-            row=3, col=1
-        )
+        add_series(fig, df['timestamp'], df['gpu_usage'], 'GPU %', 3, stats, point_budget)
+        add_series(fig, df['timestamp'], df['gpu_memory_mb'], 'GPU Memory MB', 3, stats, point_budget)
+
+    stats['decimation_ratio'] = stats['raw_points'] / max(stats['plotted_points'], 1)
+    title = "System Resource Usage"
+    if stats['decimation_ratio'] > 1:
+        title += (f" (decimated {stats['raw_points']:,} to {stats['plotted_points']:,} points, "
+                  f"{stats['decimation_ratio']:.1f}x, min/max per bucket)")
     
     # Update layout
     fig.update_layout(
         height=1200,
-        title_text="System Resource Usage",
+        title_text=title,
+        meta=stats,
         showlegend=True,
         legend=dict(
             orientation="h",
@@ -74,5 +66,6 @@ def create_visualizations(df: pd.DataFrame, session_dir: str):
 
     # Save the figure
     fig.write_html(os.path.join(session_dir, 'visualization.html'))
+    return stats
 
 # [Rest of the code remains the same]
\ No newline at end of file
@@ -0,0 +1,544 @@
+import os
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+import psutil
+
+
+class Probe:
+    """One group of metrics read together.
+
+    Subclasses declare their ``fields`` as ``(name, struct_code)`` pairs and
+    implement ``read()``. ``available()`` is called once at startup; probes that
+    cannot work on this host are left out of the session entirely instead of
+    failing on every sample.
+
+    ``scope`` is 'process' for probes that measure the monitored process (one
+    instance per process) or 'system' for host-wide metrics (one instance
+    shared by every process in a session). A probe is read at most every
+    ``interval`` seconds, and at most once per tick, and repeats its last
+    values in between; a shared probe sampled for several processes with the
+    same tick time therefore reads once and gives each the same row. Probes with
+    ``background`` set are read in their own thread so a slow read never
+    delays the sample.
+
+    Probes that measure a varying number of things per process (such as its
+    threads) also set ``series``: each read leaves one row per item in
+    ``rows``, in ``series_fields`` order, and the session writes them to a
+    series of that name next to the fixed-schema samples.
+    """
+
+    name = None
+    fields = []
+    scope = 'process'
+    interval = 0.0
+    background = False
+    series = None
+    series_fields = []
+
+    def __init__(self, process: psutil.Process = None):
+        self.process = process
+        self.latest = tuple(0 for _ in self.fields)
+        self.rows = []
+        self._next_read = 0.0
+        self._read_at = None
+
+    @classmethod
+    def available(cls, process: psutil.Process) -> bool:
+        return True
+
+    def read(self) -> Tuple:
+        raise NotImplementedError
+
+    def sample(self, now: float) -> Tuple:
+        """Returns the probe's values for the tick at monotonic time ``now``."""
+        if not self.background and now >= self._next_read and now != self._read_at:
+            self.latest = self.read()
+            self._read_at = now
+            self._next_read = now + self.interval
+        return self.latest
+
+    def start(self):
+        pass
+
+    def series_info(self):
+        """What the session should record about this probe's series rows, if anything."""
+        return None
+
+    def close(self):
+        pass
+
+
+class BackgroundProbe(Probe):
+    """A probe whose reads run in a daemon thread; ``sample()`` only returns the cache."""
+
+    background = True
+
+    def __init__(self, process: psutil.Process = None):
+        super().__init__(process)
+        self._stop = threading.Event()
+        self._thread = None
+        # Time spent reading, which never shows up in the sampling loop
+        self.read_ns = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"probe-{self.name}", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            start = time.perf_counter_ns()
+            try:
+                self.latest = self.read()
+            except Exception as e:
+                print(f"Probe {self.name} failed: {e}")
+            self.read_ns += time.perf_counter_ns() - start
+            self._stop.wait(self.interval)
+
+    def close(self):
+        self._stop.set()
+
+
+class ProbeRegistry:
+    """Known probe classes, by name, and named groups of them."""
+
+    def __init__(self):
+        self.probes = {}
+        self.groups = {}
+
+    def register(self, probe_class):
+        self.probes[probe_class.name] = probe_class
+        return probe_class
+
+    def expand(self, names: Sequence[str]) -> List[str]:
+        """Replaces group names with their probes, keeping order and dropping repeats."""
+        expanded = []
+        for name in names:
+            for member in self.groups.get(name, [name]):
+                if member not in expanded:
+                    expanded.append(member)
+        return expanded
+
+    def detect(self, process: psutil.Process, names: Sequence[str]) -> 'ProbeSet':
+        """Checks once which of the requested probes work for this process and host."""
+        enabled, disabled = [], []
+        for name in self.expand(names):
+            probe_class = self.probes.get(name)
+            if probe_class is None:
+                raise ValueError(f"Unknown probe: {name} (known: {', '.join(self.probes)})")
+            try:
+                works = probe_class.available(process)
+            except (psutil.Error, OSError):
+                works = False
+            (enabled if works else disabled).append(probe_class)
+        return ProbeSet(process, enabled, [probe_class.name for probe_class in disabled])
+
+
+class ProbeSet:
+    """The probes detected for a session, bound to each monitored process.
+
+    System-scope probes are instantiated once here and shared; process-scope
+    probes get a fresh instance per process from ``bind()``. ``timings_ns``
+    accumulates the time collectors spend in each probe, in probe order,
+    across every process bound to the set.
+    """
+
+    def __init__(self, process: psutil.Process, probe_classes: List[type], disabled: List[str]):
+        self.probe_classes = probe_classes
+        self.names = [probe_class.name for probe_class in probe_classes]
+        self.timings_ns = [0] * len(probe_classes)
+        self.disabled = disabled
+        self.shared = {}
+        self.series = {probe_class.series: probe_class.series_fields
+                       for probe_class in probe_classes if probe_class.series}
+        self._series_probes = []
+        for probe_class in probe_classes:
+            if probe_class.scope == 'system':
+                probe = probe_class(process)
+                probe.start()
+                self.shared[probe_class.name] = probe
+
+        self.fields = []
+        self.device_wide_fields = []
+        for probe_class in probe_classes:
+            fields = self.shared[probe_class.name].fields if probe_class.scope == 'system' else probe_class.fields
+            self.fields.extend(fields)
+            if probe_class.scope == 'system':
+                self.device_wide_fields.extend(name for name, _ in fields)
+
+    def bind(self, process: psutil.Process) -> List[Probe]:
+        probes = []
+        for probe_class in self.probe_classes:
+            if probe_class.scope == 'system':
+                probes.append(self.shared[probe_class.name])
+            else:
+                probe = probe_class(process)
+                probe.start()
+                probes.append(probe)
+                if probe.series:
+                    self._series_probes.append(probe)
+        return probes
+
+    def describe(self) -> Dict:
+        return {
+            'enabled': [probe_class.name for probe_class in self.probe_classes],
+            'disabled': self.disabled,
+        }
+
+    def background_read_ms(self) -> Dict[str, float]:
+        """Total time spent by background probes reading, by probe."""
+        return {name: probe.read_ns / 1e6 for name, probe in self.shared.items() if probe.background}
+
+    def series_info(self) -> Dict:
+        """``series_info()`` of every probe with a series, by series and PID."""
+        info = {}
+        for probe in self._series_probes:
+            info.setdefault(probe.series, {})[probe.process.pid] = probe.series_info()
+        return info
+
+    def close(self):
+        for probe in self.shared.values():
+            probe.close()
+
+
+PROBES = ProbeRegistry()
+DEFAULT_PROBES = ['cpu', 'memory', 'io', 'gpu']
+
+
+@PROBES.register
+class CpuProbe(Probe):
+    name = 'cpu'
+    fields = [('cpu_percent', 'd'), ('cpu_user', 'd'), ('cpu_system', 'd')]
+
+    def read(self) -> Tuple:
+        cpu_percent = self.process.cpu_percent()
+        try:
+            cpu_times = self.process.cpu_times()
+            return cpu_percent, cpu_times.user, cpu_times.system
+        except (psutil.AccessDenied, AttributeError):
+            return cpu_percent, 0, 0
+
+
+@PROBES.register
+class MemoryProbe(Probe):
+    name = 'memory'
+    fields = [('memory_percent', 'd'), ('memory_rss_mb', 'd'), ('memory_vms_mb', 'd')]
+
+    def read(self) -> Tuple:
+        memory_info = self.process.memory_info()
+        return (
+            self.process.memory_percent(),
+            memory_info.rss / 1024 / 1024,
+            memory_info.vms / 1024 / 1024,
+        )
+
+
+@PROBES.register
+class IoProbe(Probe):
+    name = 'io'
+    # Rates for plotting, plus the cumulative byte counters they are derived from
+    fields = [('io_read_mb', 'd'), ('io_write_mb', 'd'), ('io_read_bytes', 'q'), ('io_write_bytes', 'q')]
+
+    def __init__(self, process: psutil.Process = None):
+        super().__init__(process)
+        self.has_io_counters = hasattr(process, 'io_counters')
+        if self.has_io_counters:
+            try:
+                self.io_counters_prev = process.io_counters()
+                self.timestamp_prev = time.monotonic()
+            except (psutil.AccessDenied, AttributeError):
+                self.has_io_counters = False
+
+    @classmethod
+    def available(cls, process: psutil.Process) -> bool:
+        # io_counters() does not exist on macOS, and is denied for other users' processes
+        if not hasattr(process, 'io_counters'):
+            return False
+        try:
+            process.io_counters()
+        except psutil.Error:
+            return False
+        return True
+
+    def read(self) -> Tuple:
+        if not self.has_io_counters:
+            return 0, 0, 0, 0
+        try:
+            io_counters = self.process.io_counters()
+        except (psutil.AccessDenied, AttributeError):
+            self.has_io_counters = False
+            return 0, 0, 0, 0
+
+        now = time.monotonic()
+        io_delta = now - self.timestamp_prev
+        if io_delta <= 0:
+            return self.latest
+        read_speed = (io_counters.read_bytes - self.io_counters_prev.read_bytes) / io_delta / 1024 / 1024
+        write_speed = (io_counters.write_bytes - self.io_counters_prev.write_bytes) / io_delta / 1024 / 1024
+        self.io_counters_prev = io_counters
+        self.timestamp_prev = now
+        return read_speed, write_speed, io_counters.read_bytes, io_counters.write_bytes
+
+
+@PROBES.register
+class GpuProbe(BackgroundProbe):
+    """GPU load and memory of the first GPU.
+
+    GPUtil shells out to nvidia-smi on every call, so it is polled in the
+    background every two seconds.
+    """
+
+    name = 'gpu'
+    fields = [('gpu_usage', 'd'), ('gpu_memory_mb', 'd')]
+    scope = 'system'
+    interval = 2.0
+
+    @classmethod
+    def available(cls, process: psutil.Process) -> bool:
+        try:
+            import GPUtil
+            return bool(GPUtil.getGPUs())
+        except Exception:
+            return False
+
+    def read(self) -> Tuple:
+        import GPUtil
+        gpus = GPUtil.getGPUs()
+        return (gpus[0].load * 100, gpus[0].memoryUsed) if gpus else (0, 0)
+
+
+@PROBES.register
+class PerCoreProbe(Probe):
+    """Utilization of every logical CPU on the host."""
+
+    name = 'per_core'
+    scope = 'system'
+
+    def __init__(self, process: psutil.Process = None):
+        self.fields = [(f'core{i}_percent', 'd') for i in range(psutil.cpu_count() or 1)]
+        super().__init__(process)
+        psutil.cpu_percent(percpu=True)
+
+    def read(self) -> Tuple:
+        return tuple(psutil.cpu_percent(percpu=True))
+
+
+@PROBES.register
+class NetworkProbe(Probe):
+    """Host-wide network throughput."""
+
+    name = 'network'
+    fields = [('net_sent_mb', 'd'), ('net_recv_mb', 'd')]
+    scope = 'system'
+
+    def __init__(self, process: psutil.Process = None):
+        super().__init__(process)
+        self.counters_prev = psutil.net_io_counters()
+        self.timestamp_prev = time.monotonic()
+
+    @classmethod
+    def available(cls, process: psutil.Process) -> bool:
+        return psutil.net_io_counters() is not None
+
+    def read(self) -> Tuple:
+        counters = psutil.net_io_counters()
+        now = time.monotonic()
+        delta = now - self.timestamp_prev
+        if delta <= 0:
+            return self.latest
+        sent = (counters.bytes_sent - self.counters_prev.bytes_sent) / delta / 1024 / 1024
+        recv = (counters.bytes_recv - self.counters_prev.bytes_recv) / delta / 1024 / 1024
+        self.counters_prev = counters
+        self.timestamp_prev = now
+        return sent, recv
+
+
+@PROBES.register
+class ThreadProbe(Probe):
+    """CPU used by each thread of the process, written to the 'threads' series.
+
+    Thread CPU times come from ``Process.threads()``; the percentage is their
+    change since the previous read. Native thread IDs are named from
+    /proc/<pid>/task/<tid>/comm, which carries the names Qt gives QThreads
+    (their objectName) and the names set with pthread_setname_np, so the Qt
+    GUI thread, SpeechThread and the TTS engine can be told apart. Each row
+    carries the index of its thread's name in ``thread_names``, so a tid the
+    kernel reuses for another thread keeps both names apart; the names of
+    live threads are read once, when their tid appears.
+    """
+
+    name = 'threads'
+    fields = [('thread_count', 'i')]
+    series = 'threads'
+    series_fields = [('tid', 'i'), ('name_index', 'i'), ('thread_cpu_percent', 'd'), ('thread_user', 'd'),
+                     ('thread_system', 'd')]
+
+    def __init__(self, process: psutil.Process = None):
+        super().__init__(process)
+        # Every distinct name seen, and the index of the name of each live thread
+        self.names = []
+        self.name_indexes = {}
+        self.live = {}
+        self.cpu_prev = {}
+        self.timestamp_prev = None
+
+    @classmethod
+    def available(cls, process: psutil.Process) -> bool:
+        return hasattr(process, 'threads') and bool(process.threads())
+
+    def thread_name(self, tid: int) -> str:
+        try:
+            with open(f'/proc/{self.process.pid}/task/{tid}/comm') as f:
+                name = f.read().strip()
+        except OSError:
+            name = str(tid)
+        return f'{name} (main)' if tid == self.process.pid else name
+
+    def read(self) -> Tuple:
+        try:
+            threads = self.process.threads()
+        except psutil.AccessDenied:
+            # No rows this tick rather than the previous tick's again
+            self.rows = []
+            return self.latest
+        now = time.monotonic()
+        elapsed = now - self.timestamp_prev if self.timestamp_prev is not None else 0
+
+        rows, cpu_prev, live = [], {}, {}
+        for thread in threads:
+            tid = thread.id
+            # A tid that was not there last tick is a new thread, even if the id was used before
+            name_index = self.live.get(tid)
+            if name_index is None:
+                name = self.thread_name(tid)
+                name_index = self.name_indexes.get(name)
+                if name_index is None:
+                    name_index = self.name_indexes[name] = len(self.names)
+                    self.names.append(name)
+            live[tid] = name_index
+            cpu = thread.user_time + thread.system_time
+            previous = self.cpu_prev.get(tid)
+            cpu_percent = (cpu - previous) / elapsed * 100 if previous is not None and elapsed > 0 else 0.0
+            cpu_prev[tid] = cpu
+            rows.append((tid, name_index, cpu_percent, thread.user_time, thread.system_time))
+
+        # Threads that exited are forgotten; their names stay for the rows already written
+        self.rows = rows
+        self.live = live
+        self.cpu_prev = cpu_prev
+        self.timestamp_prev = now
+        return (len(threads),)
+
+    def series_info(self):
+        return {'thread_names': self.names}
+
+
+@PROBES.register
+class ContextSwitchProbe(Probe):
+    """Voluntary and involuntary context switches of the process, per second.
+
+    Many involuntary switches mean the process was runnable but preempted,
+    i.e. it is competing for CPU rather than waiting on I/O or a lock.
+    """
+
+    name = 'ctx_switches'
+    fields = [('ctx_voluntary_per_s', 'd'), ('ctx_involuntary_per_s', 'd')]
+
+    def __init__(self, process: psutil.Process = None):
+        super().__init__(process)
+        self.counters_prev = process.num_ctx_switches()
+        self.timestamp_prev = time.monotonic()
+
+    def read(self) -> Tuple:
+        counters = self.process.num_ctx_switches()
+        now = time.monotonic()
+        delta = now - self.timestamp_prev
+        if delta <= 0:
+            return self.latest
+        voluntary = (counters.voluntary - self.counters_prev.voluntary) / delta
+        involuntary = (counters.involuntary - self.counters_prev.involuntary) / delta
+        self.counters_prev = counters
+        self.timestamp_prev = now
+        return voluntary, involuntary
+
+
+PRESSURE_DIR = "/proc/pressure"
+
+
+@PROBES.register
+class HostContextProbe(Probe):
+    """Host-wide CPU contention: load, runnable tasks, CPU frequency and pressure stalls.
+
+    Pressure stall information (Linux 4.20+) is the share of the last interval
+    in which some (or all) runnable tasks were stalled waiting for CPU,
+    memory or I/O, computed from the cumulative stall counters so it lines up
+    with the sampling interval. Fields the host cannot provide are left out.
+    """
+
+    name = 'host'
+    scope = 'system'
+
+    def __init__(self, process: psutil.Process = None):
+        self.pressure = []
+        for resource in ('cpu', 'memory', 'io'):
+            for kind in self.read_pressure(resource):
+                self.pressure.append((resource, kind))
+        self.has_freq = psutil.cpu_freq() is not None
+        self.fields = [('load_1m', 'd'), ('load_5m', 'd'), ('runnable_tasks', 'i')]
+        if self.has_freq:
+            self.fields.append(('cpu_freq_mhz', 'd'))
+        self.fields += [(f'psi_{resource}_{kind}', 'd') for resource, kind in self.pressure]
+        super().__init__(process)
+        self.stall_prev = self.read_stalls()
+        self.timestamp_prev = time.monotonic()
+
+    @classmethod
+    def available(cls, process: psutil.Process) -> bool:
+        return hasattr(os, 'getloadavg')
+
+    @staticmethod
+    def read_pressure(resource: str) -> Dict[str, int]:
+        """Cumulative stall microseconds by kind ('some', 'full') for one resource."""
+        try:
+            with open(os.path.join(PRESSURE_DIR, resource)) as f:
+                lines = f.read().split('\n')
+        except OSError:
+            return {}
+        totals = {}
+        for line in lines:
+            if line:
+                kind, *pairs = line.split()
+                totals[kind] = int(dict(pair.split('=') for pair in pairs)['total'])
+        return totals
+
+    def read_stalls(self) -> List[int]:
+        totals = {resource: self.read_pressure(resource) for resource in ('cpu', 'memory', 'io')}
+        return [totals[resource].get(kind, 0) for resource, kind in self.pressure]
+
+    def runnable_tasks(self) -> int:
+        try:
+            with open('/proc/loadavg') as f:
+                return int(f.read().split()[3].split('/')[0])
+        except (OSError, IndexError, ValueError):
+            return 0
+
+    def read(self) -> Tuple:
+        load_1m, load_5m, _ = os.getloadavg()
+        values = [load_1m, load_5m, self.runnable_tasks()]
+        if self.has_freq:
+            values.append(psutil.cpu_freq().current)
+
+        stalls = self.read_stalls()
+        now = time.monotonic()
+        elapsed_us = (now - self.timestamp_prev) * 1e6
+        values += [(stall - previous) / elapsed_us * 100 if elapsed_us > 0 else 0.0
+                   for stall, previous in zip(stalls, self.stall_prev)]
+        self.stall_prev = stalls
+        self.timestamp_prev = now
+        return tuple(values)
+
+
+# Everything needed to tell contention from the target's own load
+PROBES.groups['host_context'] = ['per_core', 'host', 'ctx_switches']
@@ -18,6 +18,21 @@ from pynput.keyboard import Controller, Key
 #     from Gesture_Controller import GestureController
 # except ImportError:
 #     GestureController = None
+# Gesture recognition runs as its own process under run_parallel.py and is
+# controlled over the event bus instead
+GestureController = None
+
+from intent_router import ASSISTANT_ROUTER
+
+try:
+    from event_bus import EventBus
+except ImportError:
+    EventBus = None
+
+# How often the UI thread delivers events from the gesture process
+BUS_POLL_MS = 20
+# How long the gesture process gets to acknowledge a pause or resume
+GESTURE_ACK_TIMEOUT_MS = 2000
 
 
 class SpeechThread(QThread):
@@ -27,6 +42,9 @@ class SpeechThread(QThread):
     
     def __init__(self):
         super().__init__()
+        # Qt names the native thread after the objectName, which lets the
+        # monitor's threads probe attribute CPU time to speech recognition
+        self.setObjectName("SpeechThread")
         self.is_listening = True
         self.recognizer = sr.Recognizer()
         # Improve noise handling
@@ -76,12 +94,45 @@ class VoiceAssistant(QMainWindow):
         # For gesture recognition
         self.gesture_active = False
         self.gesture_controller = None
+        # Gesture commands sent over the bus and not acknowledged yet, by id
+        self.pending_gesture_commands = {}
+        self.gesture_command_id = 0
+        self.bus = EventBus.from_env("voice") if EventBus is not None else None
+        if self.bus is not None:
+            self.bus.subscribe("assistant.", self.handle_bus_event)
+            self.bus.subscribe("gesture.ack", self.handle_gesture_ack)
+            self.bus_timer = QTimer(self)
+            self.bus_timer.timeout.connect(self.bus.poll)
+            self.bus_timer.start(BUS_POLL_MS)
         
         # For clipboard operations
         self.keyboard = Controller()
         
         # System active flag (for sleep/wake functionality)
         self.active = True
+
+        # Handlers by intent name; the phrases for each are in intent_router.ASSISTANT_INTENTS
+        self.command_handlers = {
+            'exit': self.exit_assistant,
+            'sleep': self.go_to_sleep,
+            'wake': self.wake_up,
+            'search': self.search_web,
+            'location': self.look_up_location,
+            'launch_gesture': self.launch_gesture,
+            'stop_gesture': self.stop_gesture,
+            'copy': self.copy_selection,
+            'paste': self.paste_clipboard,
+            'list': self.list_directory,
+            'back': self.go_back,
+            'open_item': self.open_item,
+            'open_app': self.open_named_application,
+            'time': self.tell_time,
+            'date': self.tell_date,
+            'clear': self.clear_log,
+            'greeting': lambda command, argument: self.speak("Hello there! How can I assist you today?"),
+            'how_are_you': lambda command, argument: self.speak("I'm doing great, thank you! How can I help you?"),
+            'thanks': lambda command, argument: self.speak("You're welcome!"),
+        }
         
         self.setWindowTitle("Proton Voice Assistant")
         self.setGeometry(100, 100, 800, 900)
@@ -189,10 +240,52 @@ class VoiceAssistant(QMainWindow):
     def update_level_bar(self, level):
         self.level_bar.setValue(int(level * 100))
 
+    def handle_bus_event(self, event):
+        """Acts on events the gesture process sends: wake, sleep or a command to run."""
+        _, topic, data = event
+        if topic == "assistant.wake" and not self.is_listening:
+            self.toggle_voice_input()
+        elif topic == "assistant.sleep" and self.is_listening:
+            self.toggle_voice_input()
+        elif topic == "assistant.command" and data.get("text"):
+            self.execute_command(data["text"].lower())
+
+    def send_gesture_command(self, topic):
+        """Sends gesture.pause or gesture.resume; the outcome is spoken once the gesture process answers.
+
+        The gesture process is expected to reply with ``gesture.ack`` carrying
+        the same ``id``. Without a reply within GESTURE_ACK_TIMEOUT_MS the
+        command is reported as not acknowledged.
+        """
+        self.gesture_command_id += 1
+        command_id = self.gesture_command_id
+        if not self.bus.publish(topic, {"id": command_id}):
+            self.speak("Gesture recognition is not responding.")
+            return
+        self.pending_gesture_commands[command_id] = topic
+        QTimer.singleShot(GESTURE_ACK_TIMEOUT_MS, lambda: self.gesture_command_timed_out(command_id))
+
+    def handle_gesture_ack(self, event):
+        _, _, data = event
+        topic = self.pending_gesture_commands.pop(data.get("id"), None)
+        if topic == "gesture.resume":
+            self.gesture_active = True
+            self.speak("Gesture recognition resumed.")
+        elif topic == "gesture.pause":
+            self.gesture_active = False
+            self.speak("Gesture recognition paused.")
+
+    def gesture_command_timed_out(self, command_id):
+        if self.pending_gesture_commands.pop(command_id, None) is not None:
+            self.speak("Gesture recognition did not acknowledge the command.")
+
     def closeEvent(self, event):
         if self.speech_thread:
             self.speech_thread.stop()
             self.speech_thread.wait()
+        if self.bus is not None:
+            self.bus_timer.stop()
+            self.bus.close()
         event.accept()
 
     def init_speech_engine(self):
@@ -347,180 +440,180 @@ Available Commands:
 
     def execute_command(self, command):
         try:
+            intent, argument = ASSISTANT_ROUTER.route(command)
+
             # If Proton is asleep, ignore commands except "wake up"
-            if not self.active and "wake up" not in command:
+            if not self.active and intent != 'wake':
                 self.speak("I am sleeping. Please say 'wake up' to reactivate me.")
                 return
 
-            # System Control: exit/terminate
-            if any(word in command for word in ['exit', 'terminate']):
-                self.speak("Goodbye! Have a great day!")
-                QTimer.singleShot(2000, self.close)
-            
-            # Sleep and wake commands
-            elif "bye" in command:
-                self.active = False
-                self.speak("Going to sleep. Say 'wake up' to reactivate me.")
-            
-            elif "wake up" in command:
-                self.active = True
-                self.wish()
-            
-            elif 'search' in command:
-                query = command.split("search", 1)[1].strip()
-                if query:
-                    url = f"https://google.com/search?q={query}"
-                    webbrowser.open(url)
-                    self.speak(f"Searching for {query}")
-                else:
-                    self.speak("Please specify what you want to search for.")
-            
-            elif 'location' in command:
-                # Prompt user for location using a dialog box
-                location, ok = QInputDialog.getText(self, "Location Lookup", "Enter the location:")
-                if ok and location:
-                    url = f"https://google.nl/maps/place/{location}"
-                    webbrowser.open(url)
-                    self.speak(f"Looking up the location: {location}")
-                else:
-                    self.speak("No location provided.")
-            
-            elif "launch gesture recognition" in command:
-                if not self.gesture_active:
-                    if GestureController is not None:
-                        try:
-                            self.gesture_controller = GestureController()
-                            self.gesture_controller.start()
-                            self.gesture_active = True
-                            self.speak("Gesture recognition launched.")
-                        except Exception as e:
-                            self.speak(f"Failed to launch gesture recognition: {str(e)}")
-                    else:
-                        self.speak("Gesture recognition module is not available.")
-                else:
-                    self.speak("Gesture recognition is already active.")
-            
-            elif "stop gesture recognition" in command:
-                if self.gesture_active:
-                    try:
-                        if self.gesture_controller:
-                            self.gesture_controller.stop()  # assuming a stop method or control flag
-                        self.gesture_active = False
-                        self.speak("Gesture recognition stopped.")
-                    except Exception as e:
-                        self.speak(f"Failed to stop gesture recognition: {str(e)}")
-                else:
-                    self.speak("Gesture recognition is not active.")
-            
-            elif "copy" in command:
-                # Simulate Ctrl+C for copy
-                self.keyboard.press(Key.ctrl)
-                self.keyboard.press('c')
-                self.keyboard.release('c')
-                self.keyboard.release(Key.ctrl)
-                self.speak("Copied to clipboard.")
-            
-            elif any(word in command for word in ["paste", "page", "pest"]):
-                # Simulate Ctrl+V for paste
-                self.keyboard.press(Key.ctrl)
-                self.keyboard.press('v')
-                self.keyboard.release('v')
-                self.keyboard.release(Key.ctrl)
-                self.speak("Pasted from clipboard.")
-            
-            elif command.strip() == "list":
-                # List files/folders in the current directory
+            self.command_handlers.get(intent, self.answer_unknown)(command, argument)
+        
+        except Exception as e:
+            self.speak(f"I encountered an error: {str(e)}")
+            print(f"Error executing command: {str(e)}")
+
+    # Command handlers, called by execute_command with the utterance and the
+    # argument intent_router extracted from it
+
+    def exit_assistant(self, command, argument):
+        self.speak("Goodbye! Have a great day!")
+        QTimer.singleShot(2000, self.close)
+
+    def go_to_sleep(self, command, argument):
+        self.active = False
+        self.speak("Going to sleep. Say 'wake up' to reactivate me.")
+
+    def wake_up(self, command, argument):
+        self.active = True
+        self.wish()
+
+    def search_web(self, command, query):
+        if query:
+            url = f"https://google.com/search?q={query}"
+            webbrowser.open(url)
+            self.speak(f"Searching for {query}")
+        else:
+            self.speak("Please specify what you want to search for.")
+
+    def look_up_location(self, command, argument):
+        # Prompt user for location using a dialog box
+        location, ok = QInputDialog.getText(self, "Location Lookup", "Enter the location:")
+        if ok and location:
+            url = f"https://google.nl/maps/place/{location}"
+            webbrowser.open(url)
+            self.speak(f"Looking up the location: {location}")
+        else:
+            self.speak("No location provided.")
+
+    def launch_gesture(self, command, argument):
+        if self.bus is not None:
+            # The gesture process may have been paused from elsewhere, so always send it
+            self.send_gesture_command("gesture.resume")
+        elif not self.gesture_active:
+            if GestureController is not None:
                 try:
-                    self.file_list = os.listdir(self.current_path)
-                    if not self.file_list:
-                        self.speak("The directory is empty.")
-                    else:
-                        response = "Listing files and folders:\n"
-                        for idx, item in enumerate(self.file_list, start=1):
-                            response += f"{idx}. {item}\n"
-                        self.speak(response)
+                    self.gesture_controller = GestureController()
+                    self.gesture_controller.start()
+                    self.gesture_active = True
+                    self.speak("Gesture recognition launched.")
                 except Exception as e:
-                    self.speak(f"Failed to list directory: {str(e)}")
-            
-            elif command.startswith("open "):
-                # Check if a number is provided to open an item from the list
-                parts = command.split()
-                if len(parts) == 2 and parts[1].isdigit():
-                    index = int(parts[1]) - 1
-                    if 0 <= index < len(self.file_list):
-                        item = self.file_list[index]
-                        item_path = os.path.join(self.current_path, item)
-                        if os.path.isdir(item_path):
-                            self.current_path = item_path
-                            try:
-                                self.file_list = os.listdir(self.current_path)
-                                response = f"Opened folder {item}. Listing contents:\n"
-                                for idx, sub_item in enumerate(self.file_list, start=1):
-                                    response += f"{idx}. {sub_item}\n"
-                                self.speak(response)
-                            except Exception as e:
-                                self.speak(f"Failed to open folder: {str(e)}")
-                        else:
-                            try:
-                                if platform.system() == "Windows":
-                                    os.startfile(item_path)
-                                elif platform.system() == "Darwin":
-                                    subprocess.Popen(["open", item_path])
-                                else:
-                                    subprocess.Popen(["xdg-open", item_path])
-                                self.speak(f"Opened file {item}.")
-                            except Exception as e:
-                                self.speak(f"Failed to open file: {str(e)}")
-                    else:
-                        self.speak("Invalid file number.")
-                else:
-                    # Fallback: try opening the command as an application name
-                    app = command.replace('open', '').strip()
-                    self.open_application(app)
-            
-            elif command.strip() == "back":
-                parent = os.path.dirname(self.current_path.rstrip(os.sep))
-                if parent and parent != self.current_path:
-                    self.current_path = parent
-                    try:
-                        self.file_list = os.listdir(self.current_path)
-                        response = "Moved back. Listing contents:\n"
-                        for idx, item in enumerate(self.file_list, start=1):
-                            response += f"{idx}. {item}\n"
-                        self.speak(response)
-                    except Exception as e:
-                        self.speak(f"Failed to list directory: {str(e)}")
-                else:
-                    self.speak("Already at the root directory.")
-            
-            elif 'time' in command:
-                current_time = datetime.now().strftime('%I:%M %p')
-                self.speak(f"The current time is {current_time}")
-            
-            elif 'date' in command:
-                current_date = datetime.now().strftime('%B %d, %Y')
-                self.speak(f"Today is {current_date}")
-            
-            elif 'clear' in command:
-                self.conversation_log.clear()
-                self.speak("I've cleared the conversation log")
-            
-            elif any(greet in command for greet in ['hi', 'hello', 'hey']):
-                self.speak("Hello there! How can I assist you today?")
-            
-            elif "how are you" in command:
-                self.speak("I'm doing great, thank you! How can I help you?")
-            
-            elif "thank" in command:
-                self.speak("You're welcome!")
-            
+                    self.speak(f"Failed to launch gesture recognition: {str(e)}")
             else:
-                response = self.generate_response(command)
+                self.speak("Gesture recognition module is not available.")
+        else:
+            self.speak("Gesture recognition is already active.")
+
+    def stop_gesture(self, command, argument):
+        if self.bus is not None:
+            self.send_gesture_command("gesture.pause")
+        elif self.gesture_active:
+            try:
+                if self.gesture_controller:
+                    self.gesture_controller.stop()  # assuming a stop method or control flag
+                self.gesture_active = False
+                self.speak("Gesture recognition stopped.")
+            except Exception as e:
+                self.speak(f"Failed to stop gesture recognition: {str(e)}")
+        else:
+            self.speak("Gesture recognition is not active.")
+
+    def copy_selection(self, command, argument):
+        # Simulate Ctrl+C for copy
+        self.keyboard.press(Key.ctrl)
+        self.keyboard.press('c')
+        self.keyboard.release('c')
+        self.keyboard.release(Key.ctrl)
+        self.speak("Copied to clipboard.")
+
+    def paste_clipboard(self, command, argument):
+        # Simulate Ctrl+V for paste
+        self.keyboard.press(Key.ctrl)
+        self.keyboard.press('v')
+        self.keyboard.release('v')
+        self.keyboard.release(Key.ctrl)
+        self.speak("Pasted from clipboard.")
+
+    def list_directory(self, command, argument):
+        # List files/folders in the current directory
+        try:
+            self.file_list = os.listdir(self.current_path)
+            if not self.file_list:
+                self.speak("The directory is empty.")
+            else:
+                response = "Listing files and folders:\n"
+                for idx, item in enumerate(self.file_list, start=1):
+                    response += f"{idx}. {item}\n"
                 self.speak(response)
-        
         except Exception as e:
-            self.speak(f"I encountered an error: {str(e)}")
-            print(f"Error executing command: {str(e)}")
+            self.speak(f"Failed to list directory: {str(e)}")
+
+    def open_item(self, command, number):
+        # Open a file/folder by its number in the last listing
+        index = number - 1
+        if 0 <= index < len(self.file_list):
+            item = self.file_list[index]
+            item_path = os.path.join(self.current_path, item)
+            if os.path.isdir(item_path):
+                self.current_path = item_path
+                try:
+                    self.file_list = os.listdir(self.current_path)
+                    response = f"Opened folder {item}. Listing contents:\n"
+                    for idx, sub_item in enumerate(self.file_list, start=1):
+                        response += f"{idx}. {sub_item}\n"
+                    self.speak(response)
+                except Exception as e:
+                    self.speak(f"Failed to open folder: {str(e)}")
+            else:
+                try:
+                    if platform.system() == "Windows":
+                        os.startfile(item_path)
+                    elif platform.system() == "Darwin":
+                        subprocess.Popen(["open", item_path])
+                    else:
+                        subprocess.Popen(["xdg-open", item_path])
+                    self.speak(f"Opened file {item}.")
+                except Exception as e:
+                    self.speak(f"Failed to open file: {str(e)}")
+        else:
+            self.speak("Invalid file number.")
+
+    def open_named_application(self, command, app):
+        if app:
+            self.open_application(app)
+        else:
+            self.speak("Please specify what you want to open.")
+
+    def go_back(self, command, argument):
+        parent = os.path.dirname(self.current_path.rstrip(os.sep))
+        if parent and parent != self.current_path:
+            self.current_path = parent
+            try:
+                self.file_list = os.listdir(self.current_path)
+                response = "Moved back. Listing contents:\n"
+                for idx, item in enumerate(self.file_list, start=1):
+                    response += f"{idx}. {item}\n"
+                self.speak(response)
+            except Exception as e:
+                self.speak(f"Failed to list directory: {str(e)}")
+        else:
+            self.speak("Already at the root directory.")
+
+    def tell_time(self, command, argument):
+        current_time = datetime.now().strftime('%I:%M %p')
+        self.speak(f"The current time is {current_time}")
+
+    def tell_date(self, command, argument):
+        current_date = datetime.now().strftime('%B %d, %Y')
+        self.speak(f"Today is {current_date}")
+
+    def clear_log(self, command, argument):
+        self.conversation_log.clear()
+        self.speak("I've cleared the conversation log")
+
+    def answer_unknown(self, command, argument):
+        response = self.generate_response(command)
+        self.speak(response)
 
     def open_application(self, app_name):
         try:
@@ -551,12 +644,35 @@ Available Commands:
                 return True
         return super().eventFilter(source, event)
 
+def start_heartbeat(app, interval_ms=1000):
+    """Beats on the heartbeat pipe run_parallel.py's supervisor passes us, if any.
+
+    The beat comes from the Qt event loop, so it stops when the UI thread hangs.
+    """
+    fd = os.environ.get("GESTUREPLUS_HEARTBEAT_FD")
+    if fd is None:
+        return None
+    timer = QTimer(app)
+
+    def beat():
+        try:
+            os.write(int(fd), b".")
+        except OSError:
+            # The supervisor is gone; nobody is listening any more
+            timer.stop()
+
+    timer.timeout.connect(beat)
+    timer.start(interval_ms)
+    beat()
+    return timer
+
 def main():
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
     app.setFont(QFont('Arial', 10))
     assistant = VoiceAssistant()
     assistant.show()
+    heartbeat = start_heartbeat(app)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
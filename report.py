@@ -0,0 +1,284 @@
+import os
+import json
+import re
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from session_store import epoch_to_local, read_series
+
+# Long sessions are reduced to about this many points per trace before
+# plotting, and traces of series longer than WEBGL_THRESHOLD points (before
+# decimation) are drawn with WebGL instead of SVG.
+DEFAULT_POINT_BUDGET = 5000
+WEBGL_THRESHOLD = 10000
+
+# Sessions where the monitor used more CPU than this fraction of the CPU the
+# target used are flagged in the report, since the observer may have skewed them.
+MAX_OVERHEAD_FRACTION = 0.05
+
+def decimate_minmax(x, y, budget: int):
+    """Reduces a series to at most ``budget`` points, keeping spikes.
+
+    The series is cut into ``budget // 2`` equal buckets and the minimum and
+    maximum of each bucket are kept in time order, so short bursts survive
+    decimation instead of being averaged away.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    buckets = max(budget // 2, 1)
+    if n <= budget:
+        return x, y
+
+    bucket_size = -(-n // buckets)
+    # Padding repeats the last value, so a pick inside the padding can be
+    # clipped back to the last real point.
+    filled = np.nan_to_num(y)
+    padded = np.pad(filled, (0, buckets * bucket_size - n), mode='edge').reshape(buckets, bucket_size)
+    offsets = np.arange(buckets) * bucket_size
+    picks = np.concatenate([padded.argmin(axis=1) + offsets, padded.argmax(axis=1) + offsets])
+    indices = np.unique(np.clip(picks, 0, n - 1))
+    return x[indices], y[indices]
+
+def add_series(fig, x, y, name: str, row: int, stats: Dict,
+               point_budget: int = DEFAULT_POINT_BUDGET, secondary_y: bool = False, **trace_kwargs):
+    """Adds one series to a subplot, decimated to the point budget.
+
+    Point counts are accumulated in ``stats`` so the decimation applied can
+    be reported with the figure.
+    """
+    raw_points = len(y)
+    if point_budget:
+        x, y = decimate_minmax(x, y, point_budget)
+    # Decided on the raw length: after decimation no trace is longer than the budget
+    trace_class = go.Scattergl if raw_points > WEBGL_THRESHOLD else go.Scatter
+    placement = {'secondary_y': True} if secondary_y else {}
+    fig.add_trace(trace_class(x=x, y=y, name=name, **trace_kwargs), row=row, col=1, **placement)
+
+    stats['raw_points'] = stats.get('raw_points', 0) + raw_points
+    stats['plotted_points'] = stats.get('plotted_points', 0) + len(y)
+    stats['webgl_traces'] = stats.get('webgl_traces', 0) + (trace_class is go.Scattergl)
+
+# Columns recorded by the host and ctx_switches probes
+CONTEXT_COLUMNS = ('load_1m', 'runnable_tasks', 'psi_cpu_some', 'ctx_involuntary_per_s')
+
+def add_contention(fig, df: pd.DataFrame, core_columns, stats: Dict, point_budget: int):
+    """Fills the host contention panel: what else competed for the CPU while the target ran.
+
+    Percentages share the left axis: the target's CPU, the busiest and the
+    average core, load per core and the CPU pressure stall share. Context
+    switch rates of the target go on the right axis.
+    """
+    x = df['timestamp']
+    add_series(fig, x, df['cpu_percent'], 'Target CPU %', 4, stats, point_budget)
+    if core_columns:
+        cores = df[core_columns]
+        add_series(fig, x, cores.max(axis=1), 'Busiest core %', 4, stats, point_budget)
+        add_series(fig, x, cores.mean(axis=1), 'Mean core %', 4, stats, point_budget)
+    if 'load_1m' in df.columns:
+        core_count = len(core_columns) or os.cpu_count() or 1
+        add_series(fig, x, df['load_1m'] / core_count * 100, 'Load (1m) per core %', 4, stats, point_budget,
+                   line=dict(dash='dot'))
+    if 'psi_cpu_some' in df.columns:
+        add_series(fig, x, df['psi_cpu_some'], 'CPU pressure stall %', 4, stats, point_budget,
+                   line=dict(dash='dash'))
+    if 'ctx_involuntary_per_s' in df.columns:
+        add_series(fig, x, df['ctx_involuntary_per_s'], 'Involuntary switches/s', 4, stats, point_budget,
+                   secondary_y=True, line=dict(dash='dot'))
+        add_series(fig, x, df['ctx_voluntary_per_s'], 'Voluntary switches/s', 4, stats, point_budget,
+                   secondary_y=True, line=dict(dash='dot'))
+
+# Line colors of the launch events run_parallel.py --monitor records
+EVENT_COLORS = {'start': 'green', 'restart': 'orange', 'exit': 'gray', 'hung': 'red', 'shutdown': 'black'}
+
+def add_events(fig, events: List[Dict]):
+    """Marks module starts, exits and restarts on the CPU & Memory panel.
+
+    Each event gets a vertical line; a marker per event at the top of the
+    panel carries the module, pid and exit code on hover.
+    """
+    frame = pd.DataFrame(events)
+    # Plotly keeps microseconds at most
+    frame['timestamp'] = epoch_to_local(frame['timestamp_ns'], unit='ns').dt.floor('us')
+    for kind, group in frame.groupby('kind'):
+        color = EVENT_COLORS.get(kind, 'purple')
+        for timestamp in group['timestamp']:
+            fig.add_vline(x=timestamp, line=dict(color=color, width=1, dash='dot'), row=1, col=1)
+        hover = [f"{kind}: {event['name']} (pid {event['pid']})"
+                 + (f", exit code {event['returncode']}" if pd.notna(event.get('returncode')) else '')
+                 for event in group.to_dict('records')]
+        fig.add_trace(go.Scatter(x=group['timestamp'], y=[100] * len(group), mode='markers', name=f'{kind} events',
+                                 marker=dict(color=color, symbol='triangle-down', size=9),
+                                 hovertext=hover, hoverinfo='text'), row=1, col=1)
+
+def monitor_cpu_percent(monitor_df: pd.DataFrame) -> pd.Series:
+    """The monitor's own CPU % per tick, from its cumulative CPU time."""
+    cpu = monitor_df['monitor_cpu_user'] + monitor_df['monitor_cpu_system']
+    elapsed = monitor_df['timestamp_ns'].diff() / 1e9
+    return (cpu.diff() / elapsed * 100).fillna(0)
+
+def check_overhead(df: pd.DataFrame, monitor_df: pd.DataFrame,
+                   max_fraction: float = MAX_OVERHEAD_FRACTION) -> Dict:
+    """Compares the monitor's CPU time with the target's over the same session.
+
+    Returns None when either series has no samples to compare. ``fraction``
+    is None, and the session not flagged, when the target used no CPU.
+    """
+    if df.empty or monitor_df.empty:
+        return None
+    monitor_cpu = float(monitor_df['monitor_cpu_user'].iloc[-1] + monitor_df['monitor_cpu_system'].iloc[-1])
+    elapsed = (df['timestamp_ns'] - df['timestamp_ns'].iloc[0]).to_numpy() / 1e9
+    cpu = df['cpu_percent'].to_numpy(dtype=float) / 100
+    target_cpu = float(np.sum((cpu[1:] + cpu[:-1]) / 2 * np.diff(elapsed)))
+    fraction = monitor_cpu / target_cpu if target_cpu > 0 else None
+    return {
+        'monitor_cpu_seconds': monitor_cpu,
+        'target_cpu_seconds': target_cpu,
+        'fraction': fraction,
+        'max_fraction': max_fraction,
+        'mean_tick_ms': float(monitor_df['tick_ms'].mean()),
+        'max_monitor_rss_mb': float(monitor_df['monitor_rss_mb'].max()),
+        'flagged': fraction is not None and fraction > max_fraction,
+    }
+
+def format_fraction(fraction: float) -> str:
+    return 'n/a' if fraction is None else f'{fraction:.1%}'
+
+def create_visualizations(df: pd.DataFrame, session_dir: str, process_df: pd.DataFrame = None,
+                          point_budget: int = DEFAULT_POINT_BUDGET, monitor_df: pd.DataFrame = None,
+                          overhead: Dict = None, events: List[Dict] = None) -> Dict:
+    """Writes visualization.html for a session and returns the decimation stats."""
+    core_columns = [column for column in df.columns if re.fullmatch(r'core\d+_percent', column)]
+    host_context = bool(core_columns) or any(column in df.columns for column in CONTEXT_COLUMNS)
+
+    # Create subplots with correct height specifications
+    if host_context:
+        fig = make_subplots(
+            rows=4, cols=1,
+            subplot_titles=('CPU & Memory Usage', 'I/O Activity', 'GPU Metrics', 'Host Contention'),
+            vertical_spacing=0.12,
+            row_heights=[0.3, 0.2, 0.2, 0.3],
+            specs=[[{}], [{}], [{}], [{'secondary_y': True}]]
+        )
+    else:
+        fig = make_subplots(
+            rows=3, cols=1,
+            subplot_titles=('CPU & Memory Usage', 'I/O Activity', 'GPU Metrics'),
+            vertical_spacing=0.2,
+            row_heights=[0.4, 0.3, 0.3]  # Changed from 'heights' to 'row_heights'
+        )
+    stats = {'point_budget': point_budget}
+    
+    # CPU and Memory plot
+    add_series(fig, df['timestamp'], df['cpu_percent'], 'CPU %', 1, stats, point_budget)
+    add_series(fig, df['timestamp'], df['memory_percent'], 'Memory %', 1, stats, point_budget)
+
+    # Per-process CPU in tree mode, so a spike can be traced to one module
+    if process_df is not None:
+        for (pid, name), group in process_df.groupby(['pid', 'process_name']):
+            add_series(fig, group['timestamp'], group['cpu_percent'], f'CPU % {name} ({pid})', 1,
+                       stats, point_budget, line=dict(dash='dot'))
+
+    # The monitor's own CPU, to judge how much it may have disturbed the target
+    if monitor_df is not None:
+        add_series(fig, monitor_df['timestamp'], monitor_cpu_percent(monitor_df), 'Monitor CPU %', 1,
+                   stats, point_budget, line=dict(dash='dash', color='gray'))
+
+    # Starts, exits and restarts of the modules in sessions recorded by run_parallel.py --monitor
+    if events:
+        add_events(fig, events)
+    
+    # I/O plot
+    if 'io_read_mb' in df.columns:
+        add_series(fig, df['timestamp'], df['io_read_mb'], 'Read MB/s', 2, stats, point_budget)
+        add_series(fig, df['timestamp'], df['io_write_mb'], 'Write MB/s', 2, stats, point_budget)
+    
+    # GPU plot
+    if 'gpu_usage' in df.columns:
+        add_series(fig, df['timestamp'], df['gpu_usage'], 'GPU %', 3, stats, point_budget)
+        add_series(fig, df['timestamp'], df['gpu_memory_mb'], 'GPU Memory MB', 3, stats, point_budget)
+
+    # Host contention, lined up against the target's CPU
+    if host_context:
+        add_contention(fig, df, core_columns, stats, point_budget)
+
+    stats['decimation_ratio'] = stats['raw_points'] / max(stats['plotted_points'], 1)
+    title = "System Resource Usage"
+    if stats['decimation_ratio'] > 1:
+        title += (f" (decimated {stats['raw_points']:,} to {stats['plotted_points']:,} points, "
+                  f"{stats['decimation_ratio']:.1f}x, min/max per bucket)")
+    if overhead is not None and overhead['flagged']:
+        title += (f"<br>Warning: monitor CPU was {format_fraction(overhead['fraction'])} of the target's "
+                  f"(limit {overhead['max_fraction'] * 100:g}%)")
+    
+    # Update layout
+    fig.update_layout(
+        height=1600 if host_context else 1200,
+        title_text=title,
+        meta=stats,
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+
+    # Update y-axes labels
+    fig.update_yaxes(title_text="Percentage (%)", row=1, col=1)
+    fig.update_yaxes(title_text="MB/s", row=2, col=1)
+    fig.update_yaxes(title_text="Usage", row=3, col=1)
+    if host_context:
+        fig.update_yaxes(title_text="Percentage (%)", row=4, col=1)
+        fig.update_yaxes(title_text="Switches/s", row=4, col=1, secondary_y=True)
+
+    # Save the figure
+    fig.write_html(os.path.join(session_dir, 'visualization.html'))
+    return stats
+
+def render_session(session_dir: str, point_budget: int = DEFAULT_POINT_BUDGET,
+                   max_overhead: float = MAX_OVERHEAD_FRACTION) -> Dict:
+    """Builds the DataFrames of a recorded session and writes its visualization.html.
+
+    Only reads the session directory, so it can run long after collection
+    and on another machine. Returns the decimation stats, or None if the
+    session has no metrics. Sessions where the monitor's own CPU time exceeds
+    ``max_overhead`` of the target's are flagged in the figure and in
+    ``overhead_check`` of the session info.
+    """
+    info_path = os.path.join(session_dir, "session_info.json")
+    info = {}
+    if os.path.exists(info_path):
+        with open(info_path) as f:
+            info = json.load(f)
+
+    df = read_series(session_dir, "metrics")
+    if df is None:
+        return None
+    process_df = read_series(session_dir, "process_metrics")
+    if process_df is not None:
+        names = {process['pid']: process['process_name'] for process in info.get('processes', [])}
+        process_df['process_name'] = process_df['pid'].map(names)
+
+    monitor_df = read_series(session_dir, "monitor")
+    overhead = None
+    if monitor_df is not None and 'cpu_percent' in df.columns:
+        overhead = check_overhead(df, monitor_df, max_overhead)
+    if overhead is not None:
+        info['overhead_check'] = overhead
+        if overhead['fraction'] is None:
+            print(f"Monitor CPU time: {format_fraction(None)} of the target's (the target used no CPU)")
+        elif overhead['flagged']:
+            print(f"Warning: monitor CPU time was {format_fraction(overhead['fraction'])} of the target's "
+                  f"({overhead['monitor_cpu_seconds']:.2f} s vs {overhead['target_cpu_seconds']:.2f} s), "
+                  f"above the {max_overhead * 100:g}% limit")
+
+    info['visualization'] = create_visualizations(df, session_dir, process_df, point_budget, monitor_df, overhead,
+                                                  info.get('events'))
+    with open(info_path, 'w') as f:
+        json.dump(info, f, indent=4)
+    return info['visualization']
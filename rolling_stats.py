@@ -0,0 +1,299 @@
+import json
+import math
+import operator
+import re
+import time
+from array import array
+from bisect import insort
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence, Tuple
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Statistics alert rules can use: the raw value, the rolling ones and the tracked quantiles
+STATISTICS = ('value', 'ewma', 'mean', 'std', 'slope', 'zscore', 'max') + tuple(f'p{q * 100:g}' for q in QUANTILES)
+
+# Columns that identify a sample rather than measure something
+SKIPPED_FIELDS = ('timestamp_ns', 'pid', 'process_count')
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile in constant memory (the P-squared algorithm).
+
+    Keeps five markers whose heights approximate the minimum, the p/2, p and
+    (1+p)/2 quantiles and the maximum, adjusting them with a parabolic fit as
+    values arrive, so no value has to be stored.
+    """
+
+    __slots__ = ('p', 'count', 'heights', 'positions', 'desired', 'increments')
+
+    def __init__(self, p: float):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x: float):
+        self.count += 1
+        q, n = self.heights, self.positions
+        if self.count <= 5:
+            insort(q, x)
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    q[i] += d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def value(self) -> float:
+        if not self.count:
+            return math.nan
+        if self.count <= 5:
+            return self.heights[round(self.p * (self.count - 1))]
+        return self.heights[2]
+
+
+class MetricStats:
+    """O(1)-per-update statistics of one metric.
+
+    An EWMA, the mean, standard deviation and least-squares slope (units per
+    second) over the last ``window`` samples from running sums, and streaming
+    quantiles over the whole session. Only the window itself is kept; the
+    running sums are recomputed from it once per window so rounding errors
+    cannot accumulate.
+    """
+
+    __slots__ = ('alpha', 'window', 'ewma', 'values', 'times', 'index', 'filled', 'updates',
+                 'sum', 'sum_sq', 'sum_t', 'sum_tt', 'sum_ty', 'sketches', 'last', 'zscore', 'max')
+
+    def __init__(self, window: int = 60, alpha: float = 0.1, quantiles: Sequence[float] = QUANTILES):
+        self.alpha = alpha
+        self.window = window
+        self.ewma = math.nan
+        self.values = array('d', bytes(8 * window))
+        self.times = array('d', bytes(8 * window))
+        self.index = self.filled = self.updates = 0
+        self.sum = self.sum_sq = self.sum_t = self.sum_tt = self.sum_ty = 0.0
+        self.sketches = [P2Quantile(q) for q in quantiles]
+        self.last = math.nan
+        self.zscore = 0.0
+        self.max = -math.inf
+
+    def update(self, t: float, x: float):
+        # Scored against the window before this sample joins it
+        std = self.std
+        self.zscore = (x - self.mean) / std if std > 0 else 0.0
+
+        self.last = x
+        self.max = max(self.max, x)
+        self.ewma = x if math.isnan(self.ewma) else self.ewma + self.alpha * (x - self.ewma)
+        for sketch in self.sketches:
+            sketch.add(x)
+
+        if self.filled == self.window:
+            old_t, old_x = self.times[self.index], self.values[self.index]
+            self.sum -= old_x
+            self.sum_sq -= old_x * old_x
+            self.sum_t -= old_t
+            self.sum_tt -= old_t * old_t
+            self.sum_ty -= old_t * old_x
+        else:
+            self.filled += 1
+        self.values[self.index] = x
+        self.times[self.index] = t
+        self.index = (self.index + 1) % self.window
+        self.sum += x
+        self.sum_sq += x * x
+        self.sum_t += t
+        self.sum_tt += t * t
+        self.sum_ty += t * x
+
+        self.updates += 1
+        if self.updates % self.window == 0:
+            values, times = self.values[:self.filled], self.times[:self.filled]
+            self.sum, self.sum_sq = math.fsum(values), math.fsum(x * x for x in values)
+            self.sum_t, self.sum_tt = math.fsum(times), math.fsum(t * t for t in times)
+            self.sum_ty = math.fsum(t * x for t, x in zip(times, values))
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.filled if self.filled else math.nan
+
+    @property
+    def std(self) -> float:
+        if self.filled < 2:
+            return 0.0
+        variance = (self.sum_sq - self.sum * self.sum / self.filled) / (self.filled - 1)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+    @property
+    def slope(self) -> float:
+        n = self.filled
+        denominator = n * self.sum_tt - self.sum_t * self.sum_t
+        if n < 2 or denominator <= 0:
+            return 0.0
+        return (n * self.sum_ty - self.sum_t * self.sum) / denominator
+
+    def get(self, stat: str) -> float:
+        if stat == 'value':
+            return self.last
+        if stat in ('ewma', 'mean', 'std', 'slope', 'zscore', 'max'):
+            return getattr(self, stat)
+        if stat.startswith('p'):
+            for sketch in self.sketches:
+                if stat == f'p{sketch.p * 100:g}':
+                    return sketch.value()
+        raise ValueError(f"Unknown statistic: {stat}")
+
+    def summary(self) -> Dict:
+        """Every statistic by name; all None before the first update, so the summary stays valid JSON."""
+        summary = {'ewma': self.ewma, 'mean': self.mean, 'std': self.std, 'slope': self.slope, 'max': self.max}
+        summary.update((f'p{sketch.p * 100:g}', sketch.value()) for sketch in self.sketches)
+        if self.updates == 0:
+            return dict.fromkeys(summary)
+        return summary
+
+
+class RollingStats:
+    """MetricStats for every numeric field of a session's samples."""
+
+    def __init__(self, fields: Sequence[Tuple[str, str]], window: int = 60, alpha: float = 0.1):
+        self.names = [name for name, _ in fields]
+        self.indexes = [(index, name) for index, name in enumerate(self.names) if name not in SKIPPED_FIELDS]
+        self.metrics = {name: MetricStats(window, alpha) for _, name in self.indexes}
+        self.start = time.monotonic()
+
+    def update(self, values: Sequence) -> float:
+        """Feeds one sample in; returns its time in seconds since the session started."""
+        t = time.monotonic() - self.start
+        metrics = self.metrics
+        for index, name in self.indexes:
+            metrics[name].update(t, values[index])
+        return t
+
+    def get(self, metric: str, stat: str = 'value') -> float:
+        return self.metrics[metric].get(stat)
+
+    def summary(self) -> Dict:
+        return {name: stats.summary() for name, stats in self.metrics.items()}
+
+
+OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le}
+RULE_PATTERN = re.compile(r'^\s*(\w+)(?:\.(\w+))?\s*(>=|<=|>|<)\s*(-?[\d.]+)\s*(?:for\s+([\d.]+)\s*s?)?\s*$')
+
+
+class AlertRule:
+    """A condition on one statistic of one metric, e.g. ``cpu_percent.ewma > 90 for 10s``.
+
+    Without a statistic the raw value is used. ``zscore`` makes an anomaly
+    rule (distance from the rolling mean in standard deviations) and ``slope``
+    a trend rule (change per second over the rolling window). The rule fires
+    once the condition has held for ``duration`` seconds and resolves as soon
+    as it stops holding.
+    """
+
+    def __init__(self, text: str):
+        match = RULE_PATTERN.match(text)
+        if match is None:
+            raise ValueError(f"Alert rules look like 'metric[.stat] > value [for N s]', got {text!r}")
+        self.text = text.strip()
+        self.metric, stat, self.op, threshold, duration = match.groups()
+        self.stat = stat or 'value'
+        if self.stat not in STATISTICS:
+            raise ValueError(f"Alert rule {self.text!r}: unknown statistic {self.stat} "
+                             f"(known: {', '.join(STATISTICS)})")
+        self.threshold = float(threshold)
+        self.duration = float(duration or 0)
+        self.pending_since = None
+        self.firing = False
+
+    def check(self, t: float, value: float):
+        """Returns 'firing' or 'resolved' when the rule changes state at time ``t``."""
+        if not math.isnan(value) and OPERATORS[self.op](value, self.threshold):
+            if self.pending_since is None:
+                self.pending_since = t
+            if not self.firing and t - self.pending_since >= self.duration:
+                self.firing = True
+                return 'firing'
+        else:
+            self.pending_since = None
+            if self.firing:
+                self.firing = False
+                return 'resolved'
+        return None
+
+
+class AlertEngine:
+    """Evaluates alert rules against RollingStats after every sample.
+
+    Each state change is printed, appended to ``path`` as a JSON line if
+    given, and passed to ``hook`` if given.
+    """
+
+    def __init__(self, rules: List[AlertRule], stats: RollingStats, path: str = None,
+                 hook: Callable[[Dict], None] = None):
+        for rule in rules:
+            if rule.metric not in stats.metrics:
+                raise ValueError(f"Alert rule {rule.text!r}: no metric {rule.metric} in this session")
+            stats.metrics[rule.metric].get(rule.stat)
+        self.rules = rules
+        self.stats = stats
+        self.path = path
+        self.hook = hook
+        self.fired = 0
+
+    def check(self, t: float) -> List[Dict]:
+        events = []
+        for rule in self.rules:
+            value = self.stats.get(rule.metric, rule.stat)
+            state = rule.check(t, value)
+            if state is None:
+                continue
+            event = {
+                'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'elapsed_s': round(t, 3),
+                'rule': rule.text,
+                'state': state,
+                'metric': rule.metric,
+                'stat': rule.stat,
+                'value': value,
+                'threshold': rule.threshold,
+            }
+            self.emit(event)
+            events.append(event)
+        return events
+
+    def emit(self, event: Dict):
+        if event['state'] == 'firing':
+            self.fired += 1
+        print(f"ALERT {event['state']}: {event['rule']} ({event['metric']}.{event['stat']} = {event['value']:.2f})")
+        if self.path is not None:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(event) + '\n')
+        if self.hook is not None:
+            self.hook(event)
@@ -1,14 +1,20 @@
 package main
 
 import (
+	"bufio"
 	"fmt"
+	"io"
 	"log"
 	"os"
 	"os/exec"
 	"path/filepath"
 	"sync"
+	"time"
 )
 
+// maxLineBytes bounds how much of a line is buffered; longer lines are printed in pieces
+const maxLineBytes = 64 * 1024
+
 // pythonRunner represents a Python script runner
 type pythonRunner struct {
 	filename string
@@ -46,6 +52,8 @@ func (pr *pythonRunner) run() {
 
 	// Create the command
 	pr.cmd = exec.Command("python", scriptPath)
+	// Python would otherwise block-buffer its output into our pipes
+	pr.cmd.Env = append(os.Environ(), "PYTHONUNBUFFERED=1")
 
 	// Create pipes for stdout and stderr
 	stdout, err := pr.cmd.StdoutPipe()
@@ -70,42 +78,16 @@ func (pr *pythonRunner) run() {
 	var outputWg sync.WaitGroup
 	outputWg.Add(2)
 
-	// Handle stdout in a goroutine
-	go func() {
-		defer outputWg.Done()
-		buffer := make([]byte, 1024)
-		for {
-			n, err := stdout.Read(buffer)
-			if n > 0 {
-				fmt.Printf("[%s] %s", pr.filename, buffer[:n])
-			}
-			if err != nil {
-				break
-			}
-		}
-	}()
-
-	// Handle stderr in a goroutine
-	go func() {
-		defer outputWg.Done()
-		buffer := make([]byte, 1024)
-		for {
-			n, err := stderr.Read(buffer)
-			if n > 0 {
-				fmt.Printf("[%s][ERROR] %s", pr.filename, buffer[:n])
-			}
-			if err != nil {
-				break
-			}
-		}
-	}()
+	// Stream stdout and stderr line by line in goroutines
+	go pr.streamLines(stdout, "", &outputWg)
+	go pr.streamLines(stderr, "[ERROR] ", &outputWg)
+
+	// Read the pipes to EOF before Wait, which closes them and would drop unread output
+	outputWg.Wait()
 
 	// Wait for the command to complete
 	err = pr.cmd.Wait()
 
-	// Wait for output handlers to finish
-	outputWg.Wait()
-
 	if err != nil {
 		log.Printf("%s completed with error: %v\n", pr.filename, err)
 	} else {
@@ -113,6 +95,28 @@ func (pr *pythonRunner) run() {
 	}
 }
 
+// streamLines prints each line of r as soon as it is complete, prefixed with the
+// script name, a timestamp and tag. Reading whole lines keeps a line that arrives
+// in several reads from being split across prefixed output lines.
+func (pr *pythonRunner) streamLines(r io.Reader, tag string, wg *sync.WaitGroup) {
+	defer wg.Done()
+	reader := bufio.NewReaderSize(r, maxLineBytes)
+	for {
+		line, err := reader.ReadSlice('\n')
+		if len(line) > 0 {
+			// line points into the reader's buffer, so the newline is added by the format
+			format := "[%s] %s %s%s"
+			if line[len(line)-1] != '\n' {
+				format += "\n"
+			}
+			fmt.Printf(format, pr.filename, time.Now().Format("15:04:05.000"), tag, line)
+		}
+		if err != nil && err != bufio.ErrBufferFull {
+			break
+		}
+	}
+}
+
 func main() {
 	// List of Python files to run
 	pythonFiles := []string{
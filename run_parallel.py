@@ -1,21 +1,309 @@
+import argparse
+import json
+import logging
+import logging.handlers
 import multiprocessing
+import queue
+import select
+import signal
 import subprocess
 import os
+import threading
+import time
 
-def run_python_file(file_path):
-    """Runs a Python file using subprocess."""
-    try:
+# Environment variables that cap the worker threads of common native libraries
+THREAD_CAP_VARIABLES = [
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "OPENCV_FOR_THREADS_NUM",
+]
+
+IONICE_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+
+# Longer lines are split, so a child that never prints a newline cannot grow our buffers
+MAX_LINE_BYTES = 64 * 1024
+
+# How long a child's output is drained after it exits. Pipes still open by then are
+# held by something it started (xdg-open, a daemon) and are closed instead of waited on.
+OUTPUT_DRAIN_TIMEOUT = 2.0
+READ_POLL_INTERVAL = 0.1
+
+# How a child's output is handled; see OutputMultiplexer
+DEFAULT_OUTPUT = {
+    "buffer_lines": 1000,
+    "drop_when_full": False,
+    "log_dir": None,
+    "log_max_mb": 10,
+    "log_backups": 5,
+}
+
+# Supervisor restart and liveness policy; profiles can override any key per child.
+# "restart" is "always", "on-failure" or "never"; "max_restarts" of None is unlimited.
+# A child is hung once "heartbeat_timeout" seconds pass without a beat on its heartbeat
+# pipe (see HEARTBEAT_FD_VARIABLE); "startup_grace" covers the time before its first beat.
+DEFAULT_POLICY = {
+    "restart": "on-failure",
+    "max_restarts": None,
+    "backoff_initial": 1.0,
+    "backoff_max": 60.0,
+    "stable_after": 30.0,
+    "heartbeat_timeout": None,
+    "startup_grace": 30.0,
+}
+
+# Tells a supervised child which file descriptor to write heartbeats to
+HEARTBEAT_FD_VARIABLE = "GESTUREPLUS_HEARTBEAT_FD"
+
+def builtin_profiles():
+    """Launch profiles available by name.
+
+    A profile maps child script names to settings, with "*" applying to every
+    child: "affinity" (list of CPU numbers), "nice", "ionice" ("idle",
+    "best-effort:<0-7>" or "realtime:<0-7>"), "threads" (caps every library
+    in THREAD_CAP_VARIABLES) and "env" (extra environment variables).
+    """
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    # Gesture recognition gets the first half of the CPUs (at least one), voice the rest
+    split = max(1, len(cpus) // 2)
+    return {
+        "default": {},
+        "gesture_first": {
+            "Gesture_Controller.py": {"nice": 0},
+            "proton.py": {"nice": 10, "ionice": "idle", "threads": 1},
+        },
+        "isolated": {
+            "Gesture_Controller.py": {"affinity": cpus[:split], "threads": split},
+            "proton.py": {"affinity": cpus[split:] or cpus[-1:], "nice": 5, "threads": 1},
+        },
+    }
+
+def load_profile(spec):
+    """Returns the profile named ``spec``, or the one in the JSON file at that path."""
+    if spec is None:
+        return {}
+    profiles = builtin_profiles()
+    if spec in profiles:
+        return profiles[spec]
+    with open(spec) as f:
+        return json.load(f)
+
+def child_settings(profile, file_name):
+    settings = dict(profile.get("*", {}))
+    settings.update(profile.get(file_name, {}))
+    return settings
+
+def check_settings(file_name, settings):
+    """Reports settings that cannot take effect here, before anything is launched."""
+    problems = []
+    if "affinity" in settings and hasattr(os, "sched_getaffinity"):
+        unavailable = set(settings["affinity"]) - os.sched_getaffinity(0)
+        if unavailable:
+            problems.append(f"CPUs {sorted(unavailable)} are not available")
+    if "ionice" in settings and settings["ionice"].partition(":")[0] not in IONICE_CLASSES:
+        problems.append(f"unknown ionice class in {settings['ionice']!r} (use {', '.join(IONICE_CLASSES)})")
+    if settings.get("nice", 0) < 0 and hasattr(os, "geteuid") and os.geteuid() != 0:
+        problems.append("negative nice values need root")
+    for problem in problems:
+        print(f"Warning: {file_name}: {problem}")
+
+def child_env(settings):
+    env = os.environ.copy()
+    # Python children would otherwise block-buffer their output into our pipes
+    env["PYTHONUNBUFFERED"] = "1"
+    if "threads" in settings:
+        for variable in THREAD_CAP_VARIABLES:
+            env[variable] = str(settings["threads"])
+    env.update({key: str(value) for key, value in settings.get("env", {}).items()})
+    return env
+
+def apply_settings(settings):
+    """Applies affinity, nice and IO priority to the current process.
+
+    Runs in the child between fork and exec, so the settings are in place
+    before the script runs its first line. Settings the OS or our privileges
+    do not allow are reported and skipped rather than failing the launch.
+    """
+    def warn(message):
+        os.write(2, f"run_parallel: {message}\n".encode())
+
+    if "affinity" in settings:
+        try:
+            os.sched_setaffinity(0, settings["affinity"])
+        except (AttributeError, OSError) as e:
+            warn(f"cannot set affinity {settings['affinity']}: {e}")
+    if "nice" in settings:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, settings["nice"])
+        except (AttributeError, OSError) as e:
+            warn(f"cannot set nice {settings['nice']}: {e}")
+    if "ionice" in settings:
+        io_class, _, level = settings["ionice"].partition(":")
+        try:
+            import psutil
+            psutil.Process().ionice(IONICE_CLASSES[io_class], int(level) if level else None)
+        except (ImportError, AttributeError, KeyError, ValueError, OSError) as e:
+            warn(f"cannot set ionice {settings['ionice']}: {e}")
+
+class OutputMultiplexer:
+    """Streams a child's stdout and stderr line by line as the child writes them.
+
+    Each line is printed with a timestamp and the child's name, and also written to
+    a rotating log file of its own if ``log_dir`` is set. Reader threads hand lines
+    to a single writer thread through a queue of at most ``buffer_lines`` lines. When
+    the queue is full the readers wait, which fills the pipe and in turn makes the
+    child wait on its writes; with ``drop_when_full`` lines are dropped and counted
+    instead, so a chatty child is never slowed down by its output.
+    """
+
+    def __init__(self, name, buffer_lines=1000, drop_when_full=False, log_dir=None, log_max_mb=10,
+                 log_backups=5):
+        self.name = name
+        self.drop_when_full = drop_when_full
+        self.lines = queue.Queue(maxsize=buffer_lines)
+        self.dropped = {"stdout": 0, "stderr": 0}
+        self.log = None
+        if log_dir is not None:
+            os.makedirs(log_dir, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                os.path.join(log_dir, f"{os.path.splitext(name)[0]}.log"),
+                maxBytes=int(log_max_mb * 1024 * 1024), backupCount=log_backups)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.log = logging.getLogger(f"run_parallel.{name}")
+            self.log.propagate = False
+            self.log.setLevel(logging.INFO)
+            self.log.addHandler(handler)
+        self._readers = []
+        self._abandoned = threading.Event()
+        self._writer = threading.Thread(target=self._write, name=f"{name}-output", daemon=True)
+
+    def attach(self, process):
+        for stream, label in ((process.stdout, "stdout"), (process.stderr, "stderr")):
+            reader = threading.Thread(target=self._read, args=(stream, label), name=f"{self.name}-{label}",
+                                      daemon=True)
+            reader.start()
+            self._readers.append(reader)
+        self._writer.start()
+
+    def _read(self, stream, label):
+        if os.name == "nt":
+            # select() cannot wait on pipes here, so these readers only end at EOF
+            for line in iter(lambda: stream.readline(MAX_LINE_BYTES), b""):
+                self._put(label, line.rstrip(b"\r\n"))
+            stream.close()
+            return
+        # Reading whatever is available rather than whole lines lets the reader
+        # notice between reads that close() stopped waiting for this pipe
+        fd = stream.fileno()
+        pending = b""
+        while not self._abandoned.is_set():
+            if not select.select([fd], [], [], READ_POLL_INTERVAL)[0]:
+                continue
+            chunk = os.read(fd, MAX_LINE_BYTES)
+            if not chunk:
+                break
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                self._put(label, line.rstrip(b"\r"))
+            if len(pending) >= MAX_LINE_BYTES:
+                self._put(label, pending)
+                pending = b""
+        if pending:
+            self._put(label, pending.rstrip(b"\r"))
+        stream.close()
+
+    def _put(self, label, line):
+        for start in range(0, max(len(line), 1), MAX_LINE_BYTES):
+            item = (time.time(), label, line[start:start + MAX_LINE_BYTES].decode(errors="replace"))
+            if self.drop_when_full:
+                try:
+                    self.lines.put_nowait(item)
+                except queue.Full:
+                    self.dropped[label] += 1
+                continue
+            # Blocks while the queue is full, unless the writer is gone
+            while True:
+                try:
+                    self.lines.put(item, timeout=READ_POLL_INTERVAL)
+                    break
+                except queue.Full:
+                    if self._abandoned.is_set():
+                        return
+
+    def _write(self):
+        while True:
+            item = self.lines.get()
+            if item is None:
+                break
+            stamp, label, text = item
+            tag = "[ERROR] " if label == "stderr" else ""
+            line = f"{time.strftime('%H:%M:%S', time.localtime(stamp))}.{int(stamp % 1 * 1000):03d} {tag}{text}"
+            print(f"[{self.name}] {line}", flush=True)
+            if self.log is not None:
+                self.log.info(line)
+
+    def close(self, timeout=OUTPUT_DRAIN_TIMEOUT):
+        """Waits for the child's output to be drained, then reports any dropped lines.
+
+        Called once the child has exited. Pipes still open ``timeout`` seconds later
+        are closed by their readers, and whatever is written to them after is lost.
+        """
+        deadline = time.monotonic() + timeout
+        for reader in self._readers:
+            reader.join(max(0.0, deadline - time.monotonic()))
+        if any(reader.is_alive() for reader in self._readers):
+            print(f"[{self.name}] output still open {timeout:g}s after exit (held by a process it started?), "
+                  f"closing it")
+            self._abandoned.set()
+            # Readers notice within a poll interval and hand over any partial last line
+            for reader in self._readers:
+                reader.join(2 * READ_POLL_INTERVAL)
+        if self._writer.is_alive():
+            self.lines.put(None)
+            self._writer.join()
+        for label, count in self.dropped.items():
+            if count:
+                print(f"[{self.name}] {count} {label} lines dropped (output buffer full)")
+        if self.log is not None:
+            # A restarted child gets a new multiplexer under the same logger name
+            for handler in list(self.log.handlers):
+                handler.close()
+                self.log.removeHandler(handler)
+
+def start_child(file_path, settings, output=None, env=None, pass_fds=(), zygote=None):
+    """Starts a Python file with its launch settings and streams its output.
+
+    With a ``zygote`` client the file runs in a worker forked from the
+    pre-warmed zygote process instead of a fresh interpreter.
+    """
+    env = dict(child_env(settings), **(env or {}))
+    if zygote is not None:
+        process = zygote.spawn(file_path, env=env, settings=settings, pass_fds=pass_fds)
+    else:
         # Construct the command to execute the Python file
         command = ["python", file_path]  # Or sys.executable for current Python
 
-        # Execute the command and capture output/errors (optional)
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        stdout, stderr = process.communicate()  # Wait for the process to finish
+        # Execute the command and stream output/errors while it runs
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   env=env, pass_fds=pass_fds,
+                                   preexec_fn=(lambda: apply_settings(settings)) if settings else None)
+    multiplexer = OutputMultiplexer(os.path.basename(file_path), **dict(DEFAULT_OUTPUT, **(output or {})))
+    multiplexer.attach(process)
+    return process, multiplexer
+
+def run_python_file(file_path, settings=None, output=None, zygote=None):
+    """Runs a Python file using subprocess, streaming its output as it runs."""
+    settings = settings or {}
+    try:
+        process, multiplexer = start_child(file_path, settings, output, zygote=zygote)
+        process.wait()  # Wait for the process to finish
+        multiplexer.close()
 
         if process.returncode != 0:
-            print(f"Error running {file_path}:\n{stderr.decode()}") # Decode if bytes
+            print(f"Error running {file_path}: exit code {process.returncode}")
         else:
-            print(f"{file_path} completed successfully:\n{stdout.decode()}") # Decode if bytes
+            print(f"{file_path} completed successfully")
         return process.returncode # Return the exit code
 
     except FileNotFoundError:
@@ -25,8 +313,261 @@ def run_python_file(file_path):
         print(f"An unexpected error occurred while running {file_path}:\n{e}")
         return 1
 
-def main():
+class SupervisedChild:
+    """One supervised module: its current process and its restart history."""
+
+    def __init__(self, file_path, settings, output, zygote=None, monitor=None):
+        self.file_path = file_path
+        self.zygote = zygote
+        self.monitor = monitor
+        self.name = os.path.basename(file_path)
+        self.settings = settings
+        self.policy = dict(DEFAULT_POLICY, **{key: settings[key] for key in DEFAULT_POLICY if key in settings})
+        self.output = output
+        self.process = None
+        self.running = False
+        self.multiplexer = None
+        self.heartbeat_fd = None
+        self.started_at = None
+        self.last_beat = None
+        self.up_since = None
+        self.failed_at = None
+        self.restart_at = None
+        self.backoff = self.policy["backoff_initial"]
+        self.starts = 0
+        self.uptime = 0.0
+        self.exits = []
+        self.recoveries = []
+
+    def start(self, now):
+        env, pass_fds = {}, ()
+        if self.policy["heartbeat_timeout"] is not None:
+            read_fd, write_fd = os.pipe()
+            os.set_blocking(read_fd, False)
+            env[HEARTBEAT_FD_VARIABLE] = str(write_fd)
+            pass_fds = (write_fd,)
+        self.process, self.multiplexer = start_child(self.file_path, self.settings, self.output, env, pass_fds,
+                                                        self.zygote)
+        if pass_fds:
+            os.close(write_fd)
+            self.heartbeat_fd = read_fd
+        self.running = True
+        self.starts += 1
+        self.started_at = now
+        self.last_beat = None
+        self.restart_at = None
+        print(f"Supervisor: started {self.name} (pid {self.process.pid}, start {self.starts})")
+        if self.monitor is not None:
+            self.monitor.track(self.name, self.process.pid)
+            self.monitor.event("start" if self.starts == 1 else "restart", self.name, self.process.pid)
+        if self.heartbeat_fd is None:
+            self.mark_up(now)
+
+    def mark_up(self, now):
+        self.up_since = now
+        if self.failed_at is not None:
+            self.recoveries.append(now - self.failed_at)
+            print(f"Supervisor: {self.name} recovered in {now - self.failed_at:.2f}s")
+            self.failed_at = None
+
+    def read_heartbeats(self, now):
+        try:
+            beats = os.read(self.heartbeat_fd, 4096)
+        except BlockingIOError:
+            return
+        if beats:
+            self.last_beat = now
+            if self.up_since is None:
+                self.mark_up(now)
+
+    def hung(self, now):
+        """True when the child has gone too long without a heartbeat."""
+        if self.heartbeat_fd is None:
+            return False
+        if self.last_beat is None:
+            return now - self.started_at > self.policy["startup_grace"]
+        return now - self.last_beat > self.policy["heartbeat_timeout"]
+
+    def stop(self, grace):
+        """Sends SIGTERM, then SIGKILL if the child is still running after ``grace`` seconds."""
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(grace)
+            except subprocess.TimeoutExpired:
+                print(f"Supervisor: {self.name} ignored SIGTERM for {grace}s, killing it")
+                self.process.kill()
+                self.process.wait()
+        return self.process.returncode
+
+    def ended(self, now, reason):
+        """Records the end of the current process and closes its pipes."""
+        if self.up_since is not None:
+            self.uptime += now - self.up_since
+        stable = self.up_since is not None and now - self.up_since >= self.policy["stable_after"]
+        self.up_since = None
+        self.running = False
+        self.multiplexer.close()
+        if self.heartbeat_fd is not None:
+            os.close(self.heartbeat_fd)
+            self.heartbeat_fd = None
+        self.exits.append({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "reason": reason,
+                           "returncode": self.process.returncode, "ran_s": round(now - self.started_at, 3)})
+        if self.monitor is not None:
+            self.monitor.event(reason, self.name, self.process.pid, returncode=self.process.returncode,
+                               ran_s=round(now - self.started_at, 3))
+        # A child that stayed up long enough starts over from the shortest backoff
+        if stable:
+            self.backoff = self.policy["backoff_initial"]
+
+    def should_restart(self, reason):
+        policy = self.policy
+        if policy["max_restarts"] is not None and self.starts > policy["max_restarts"]:
+            return False
+        if policy["restart"] == "always":
+            return True
+        return policy["restart"] == "on-failure" and (reason == "hung" or self.process.returncode != 0)
+
+    def schedule_restart(self, now):
+        if self.failed_at is None:
+            self.failed_at = now
+        self.restart_at = now + self.backoff
+        print(f"Supervisor: restarting {self.name} in {self.backoff:.1f}s")
+        self.backoff = min(self.backoff * 2, self.policy["backoff_max"])
+
+    def stats(self, supervised_s):
+        return {
+            "starts": self.starts,
+            "restarts": max(0, self.starts - 1),
+            "uptime_s": round(self.uptime, 3),
+            "availability": self.uptime / supervised_s if supervised_s > 0 else 0.0,
+            "time_to_recover_s": [round(seconds, 3) for seconds in self.recoveries],
+            "mean_time_to_recover_s": sum(self.recoveries) / len(self.recoveries) if self.recoveries else None,
+            "exits": self.exits,
+        }
+
+class Supervisor:
+    """Keeps the modules running: restarts them by policy and stops them in order.
+
+    Every ``check_interval`` seconds each child's process state is polled and
+    its heartbeats are read. A child that exited is restarted according to its
+    policy after an exponential backoff; one that stopped beating is treated as
+    hung and restarted the same way. On SIGTERM or Ctrl+C children are stopped
+    in the reverse of their launch order, each with SIGTERM and then SIGKILL
+    after ``grace`` seconds. ``stats()`` reports restarts, uptime, availability
+    and time-to-recover per child.
+    """
+
+    def __init__(self, children, grace=5.0, check_interval=0.2):
+        self.children = children
+        self.grace = grace
+        self.check_interval = check_interval
+        self.stopping = False
+        self.started_at = None
+        self.stopped_at = None
+
+    def request_stop(self, signum=None, frame=None):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.request_stop)
+        self.started_at = time.monotonic()
+        for child in self.children:
+            child.start(self.started_at)
+        try:
+            while not self.stopping and self.check(time.monotonic()):
+                time.sleep(self.check_interval)
+        except KeyboardInterrupt:
+            pass
+        self.shutdown()
+
+    def check(self, now):
+        """Handles exits, hangs and due restarts; False once no child will run again."""
+        active = False
+        for child in self.children:
+            if not child.running:
+                if child.restart_at is not None:
+                    active = True
+                    if now >= child.restart_at:
+                        child.start(now)
+                continue
+            if child.heartbeat_fd is not None:
+                child.read_heartbeats(now)
+            if child.process.poll() is not None:
+                reason = "exit"
+            elif child.hung(now):
+                reason = "hung"
+                print(f"Supervisor: {child.name} missed its heartbeat, stopping it")
+                child.stop(self.grace)
+            else:
+                active = True
+                continue
+            child.ended(now, reason)
+            print(f"Supervisor: {child.name} ended ({reason}, exit code {child.process.returncode})")
+            if child.should_restart(reason):
+                child.schedule_restart(now)
+                active = True
+        return active
+
+    def shutdown(self):
+        now = time.monotonic()
+        for child in reversed(self.children):
+            if not child.running:
+                continue
+            print(f"Supervisor: stopping {child.name}")
+            child.stop(self.grace)
+            child.ended(time.monotonic(), "shutdown")
+        self.stopped_at = now
+
+    def stats(self):
+        supervised_s = (self.stopped_at or time.monotonic()) - self.started_at
+        return {
+            "supervised_s": round(supervised_s, 3),
+            "children": {child.name: child.stats(supervised_s) for child in self.children},
+        }
+
+def main(argv=None):
     """Runs multiple Python files in parallel using multiprocessing."""
+    parser = argparse.ArgumentParser(description="Run the GesturePlus modules in parallel")
+    parser.add_argument("--profile", type=str,
+                        help=f"Launch profile: {', '.join(builtin_profiles())} or a JSON file")
+    parser.add_argument("--log-dir", type=str, help="Also write each child's output to a rotating log file here")
+    parser.add_argument("--log-max-mb", type=float, default=DEFAULT_OUTPUT["log_max_mb"],
+                        help="Size at which a child's log file is rotated")
+    parser.add_argument("--log-backups", type=int, default=DEFAULT_OUTPUT["log_backups"],
+                        help="Rotated log files kept per child")
+    parser.add_argument("--buffer-lines", type=int, default=DEFAULT_OUTPUT["buffer_lines"],
+                        help="Output lines buffered per child before it has to wait")
+    parser.add_argument("--drop-when-full", action="store_true",
+                        help="Drop and count output lines when the buffer is full instead of making the child wait")
+    parser.add_argument("--no-bus", action="store_true",
+                        help="Do not create the shared-memory event bus between the modules")
+    parser.add_argument("--zygote", nargs="?", const="", metavar="SOCKET",
+                        help="Start modules by forking a zygote that has their heavy imports done "
+                             "(started here unless one already listens on SOCKET). Thread caps in "
+                             "profiles do not reach libraries the zygote already initialized")
+    parser.add_argument("--supervise", action="store_true",
+                        help="Restart modules that exit or hang, following each child's restart policy")
+    parser.add_argument("--restart", choices=["always", "on-failure", "never"], default=DEFAULT_POLICY["restart"],
+                        help="Restart policy for children whose profile does not set one")
+    parser.add_argument("--grace", type=float, default=5.0,
+                        help="Seconds a child gets to exit after SIGTERM before it is killed")
+    parser.add_argument("--stats", type=str, help="Write supervisor restart and availability statistics to this file")
+    parser.add_argument("--monitor", action="store_true",
+                        help="Record every module's metrics from the moment it is spawned into one monitoring "
+                             "session, with markers for starts, exits and restarts")
+    parser.add_argument("--monitor-interval", type=float, default=1.0, help="Seconds between monitoring samples")
+    parser.add_argument("--monitor-dir", type=str, default="monitoring_sessions",
+                        help="Directory the monitoring session is written under")
+    args = parser.parse_args(argv)
+    profile = load_profile(args.profile)
+    output = {
+        "buffer_lines": args.buffer_lines,
+        "drop_when_full": args.drop_when_full,
+        "log_dir": args.log_dir,
+        "log_max_mb": args.log_max_mb,
+        "log_backups": args.log_backups,
+    }
 
     # Get the current directory (where the script is located)
     current_directory = os.path.dirname(os.path.abspath(__file__))
@@ -36,9 +577,88 @@ def main():
 
     full_paths = [os.path.join(current_directory, file) for file in python_files]
 
+    settings_by_file = []
+    for file_name in python_files:
+        settings = child_settings(profile, file_name)
+        if settings:
+            print(f"{file_name}: {json.dumps(settings)}")
+            check_settings(file_name, settings)
+        settings_by_file.append(settings)
+
+    bus = None if args.no_bus else create_bus()
+    zygote = zygote_server = monitor = None
+    try:
+        if args.zygote is not None:
+            zygote, zygote_server = connect_zygote(args.zygote)
+        if args.monitor:
+            monitor = create_monitor(args.monitor_dir, args.monitor_interval)
+        run_children(args, full_paths, settings_by_file, output, zygote, monitor)
+    finally:
+        if monitor is not None:
+            monitor.close()
+        if zygote_server is not None:
+            zygote_server.terminate()
+            zygote_server.wait()
+        if bus is not None:
+            bus.close()
+
+def connect_zygote(path):
+    """Returns a client for the zygote at ``path``, and the server if we had to start it."""
+    from zygote import DEFAULT_SOCKET, ZygoteClient, start_server
+
+    client = ZygoteClient(path or DEFAULT_SOCKET)
+    if client.available():
+        return client, None
+    print(f"Starting a zygote on {client.path}")
+    return client, start_server(client.path)
+
+def create_monitor(base_dir, interval):
+    """Starts sampling into a new monitoring session; the modules are added as they are spawned."""
+    from launch_monitor import LaunchMonitor
+    from monitor import SessionManager
+
+    monitor = LaunchMonitor(SessionManager(base_dir), interval)
+    monitor.start()
+    return monitor
+
+def create_bus():
+    """Creates the event bus the modules attach to, announcing it through their environment."""
+    try:
+        from event_bus import BUS_VARIABLE, EventBus
+    except ImportError:
+        print("event_bus.py not found, running the modules without an event bus")
+        return None
+    bus = EventBus.create()
+    os.environ[BUS_VARIABLE] = bus.name
+    return bus
+
+def run_children(args, full_paths, settings_by_file, output, zygote=None, monitor=None):
+    if args.supervise or monitor is not None:
+        # Monitored runs start the children from this process so their pids are known at spawn;
+        # without --supervise nothing is restarted
+        children = [SupervisedChild(file_path, dict({"restart": args.restart}, **settings) if args.supervise
+                                    else dict(settings, restart="never"), output, zygote, monitor)
+                    for file_path, settings in zip(full_paths, settings_by_file)]
+        supervisor = Supervisor(children, grace=args.grace)
+        supervisor.run()
+        stats = supervisor.stats()
+        if not args.supervise:
+            failed = [exit for child in stats["children"].values() for exit in child["exits"]
+                      if exit["returncode"] != 0]
+            print("Some Python files encountered errors." if failed else "All Python files executed successfully.")
+            return
+        for name, child in stats["children"].items():
+            recover = child["mean_time_to_recover_s"]
+            print(f"{name}: {child['restarts']} restarts, {child['availability']:.1%} available"
+                  + (f", {recover:.2f}s mean time to recover" if recover is not None else ""))
+        if args.stats:
+            with open(args.stats, "w") as f:
+                json.dump(stats, f, indent=4)
+        return
+
     processes = []
-    for file_path in full_paths:
-        process = multiprocessing.Process(target=run_python_file, args=(file_path,))
+    for file_path, settings in zip(full_paths, settings_by_file):
+        process = multiprocessing.Process(target=run_python_file, args=(file_path, settings, output, zygote))
         processes.append(process)
         process.start()
 
@@ -52,7 +672,7 @@ def main():
         if process.exitcode != 0:
             any_errors = True
             break
-    
+
     if any_errors:
         print("Some Python files encountered errors.")
     else:
@@ -0,0 +1,372 @@
+import glob
+import json
+import os
+import struct
+import time
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+CHUNK_DIR = "chunks"
+
+# struct format codes used in sample schemas and their NumPy equivalents.
+# Records are packed little-endian without padding, matching an unaligned
+# NumPy structured dtype, so a buffer can be viewed as an array as-is.
+NUMPY_TYPES = {'d': '<f8', 'f': '<f4', 'q': '<i8', 'i': '<i4', 'I': '<u4', 'B': 'u1'}
+
+
+def chunk_paths(session_dir: str, series: str) -> List[str]:
+    """Returns the CSV chunk files of a series recorded by older monitors, in write order."""
+    pattern = os.path.join(session_dir, CHUNK_DIR, f"{series}-*.csv")
+    return sorted(glob.glob(pattern))
+
+
+class SampleBuffer:
+    """Preallocated ring buffer of fixed-schema sample records.
+
+    ``fields`` is a list of ``(name, struct_code)`` pairs. Samples are packed in
+    place into one bytearray, so appending a sample allocates nothing beyond
+    the value tuple, and each sample costs ``record_size`` bytes. Once full,
+    the oldest sample is overwritten.
+
+    ``to_numpy()`` and ``to_dataframe()`` expose the samples as a structured
+    array and a DataFrame whose columns are views of the buffer; they only copy
+    when the ring has wrapped around. NumPy and pandas are imported on first
+    use, so filling the buffer needs nothing beyond the standard library.
+    """
+
+    def __init__(self, fields: Sequence[Tuple[str, str]], capacity: int):
+        self.fields = list(fields)
+        self.names = [name for name, _ in self.fields]
+        self._struct = struct.Struct('<' + ''.join(code for _, code in self.fields))
+        self.record_size = self._struct.size
+        self.capacity = capacity
+        self.data = bytearray(self.record_size * capacity)
+        self.start = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def is_full(self) -> bool:
+        return self.count == self.capacity
+
+    def append(self, values: Sequence):
+        if self.count < self.capacity:
+            index = (self.start + self.count) % self.capacity
+            self.count += 1
+        else:
+            index = self.start
+            self.start = (self.start + 1) % self.capacity
+        self._struct.pack_into(self.data, index * self.record_size, *values)
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+    def _segments(self) -> List[memoryview]:
+        view = memoryview(self.data)
+        end = self.start + self.count
+        if end <= self.capacity:
+            return [view[self.start * self.record_size:end * self.record_size]]
+        return [view[self.start * self.record_size:],
+                view[:(end - self.capacity) * self.record_size]]
+
+    def rows(self):
+        """Yields the samples, oldest first, as tuples."""
+        for segment in self._segments():
+            yield from self._struct.iter_unpack(segment)
+
+    def tail(self, count: int) -> List[Tuple]:
+        """Returns the newest ``count`` samples, oldest first."""
+        count = min(count, self.count)
+        return [self._struct.unpack_from(self.data, ((self.start + i) % self.capacity) * self.record_size)
+                for i in range(self.count - count, self.count)]
+
+    def last(self) -> Tuple:
+        if not self.count:
+            return None
+        index = (self.start + self.count - 1) % self.capacity
+        return self._struct.unpack_from(self.data, index * self.record_size)
+
+    def dtype(self):
+        import numpy as np
+        return np.dtype([(name, NUMPY_TYPES[code]) for name, code in self.fields])
+
+    def to_numpy(self):
+        import numpy as np
+        segments = [np.frombuffer(segment, dtype=self.dtype()) for segment in self._segments()]
+        return segments[0] if len(segments) == 1 else np.concatenate(segments)
+
+    def to_dataframe(self):
+        import pandas as pd
+        array = self.to_numpy()
+        return pd.DataFrame({name: array[name] for name in self.names}, copy=False)
+
+
+# Binary series files: an 8-byte preamble (magic, format version, header
+# size), a JSON header describing the record schema, then fixed-width
+# records exactly as packed by SampleBuffer.
+SERIES_SUFFIX = ".bin"
+MAGIC = b'GPMS'
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct('<4sHH')
+
+
+def series_path(session_dir: str, series: str) -> str:
+    return os.path.join(session_dir, series + SERIES_SUFFIX)
+
+
+def write_header(f, series: str, fields: Sequence[Tuple[str, str]], record_size: int):
+    header = json.dumps({
+        'series': series,
+        'fields': [list(field) for field in fields],
+        'record_size': record_size,
+    }).encode()
+    # Records start on an 8-byte boundary
+    size = _PREAMBLE.size + len(header)
+    header += b' ' * (-size % 8)
+    f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, _PREAMBLE.size + len(header)))
+    f.write(header)
+
+
+def read_header(path: str) -> Dict:
+    """Returns the schema of a binary series file, plus its data offset and record count."""
+    with open(path, 'rb') as f:
+        magic, version, header_size = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a session series file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has unsupported format version {version}")
+        header = json.loads(f.read(header_size - _PREAMBLE.size))
+    header['fields'] = [tuple(field) for field in header['fields']]
+    header['offset'] = header_size
+    # A record cut short by a crash is ignored
+    header['count'] = (os.path.getsize(path) - header_size) // header['record_size']
+    return header
+
+
+class SeriesWriter:
+    """Streams sample records of one series to a binary series file.
+
+    Samples are packed into a SampleBuffer of ``chunk_size`` records and only
+    held in memory until the buffer is full or the oldest buffered sample is
+    ``max_chunk_age`` seconds old; the chunk is then appended to
+    ``<series>.bin``, fsynced, and the buffer reused. The header is written
+    up front, so the file can be read while the session is still running,
+    and a crash or SIGKILL loses at most the chunk in progress.
+    """
+
+    def __init__(self, session_dir: str, series: str, fields: Sequence[Tuple[str, str]],
+                 chunk_size: int = 500, max_chunk_age: float = 30.0):
+        self.path = series_path(session_dir, series)
+        self.series = series
+        self.buffer = SampleBuffer(fields, chunk_size)
+        self.max_chunk_age = max_chunk_age
+        self.rows_written = 0
+        self._chunk_started = None
+        self._file = open(self.path, 'wb')
+        write_header(self._file, series, self.buffer.fields, self.buffer.record_size)
+        self._file.flush()
+
+    def append(self, values: Sequence):
+        if not self.buffer.count:
+            self._chunk_started = time.monotonic()
+        self.buffer.append(values)
+        if (self.buffer.is_full()
+                or time.monotonic() - self._chunk_started >= self.max_chunk_age):
+            self.flush()
+
+    def extend(self, rows: Sequence[Sequence]):
+        for values in rows:
+            self.append(values)
+
+    def flush(self):
+        if not self.buffer.count:
+            return
+
+        for segment in self.buffer._segments():
+            self._file.write(segment)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        self.rows_written += self.buffer.count
+        self.buffer.clear()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def open_series(path: str):
+    """Memory-maps a binary series file as a NumPy structured array.
+
+    Columns of the returned array (``array['cpu_percent']``) are views of the
+    mapped file; nothing is read until it is accessed.
+    """
+    import numpy as np
+
+    header = read_header(path)
+    dtype = np.dtype([(name, NUMPY_TYPES[code]) for name, code in header['fields']])
+    if not header['count']:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=header['offset'], shape=(header['count'],))
+
+
+def read_series(session_dir: str, series: str = "metrics"):
+    """Rebuilds a series of a session as a DataFrame.
+
+    Reads the binary series file written by SeriesWriter, whose columns stay
+    memory-mapped, falling back to the CSV chunks and the single
+    ``<series>.csv`` written by older versions of the monitor. Epoch
+    timestamps are converted to a local ``timestamp`` column. Returns None if
+    the session has no data for the series.
+    """
+    import pandas as pd
+
+    path = series_path(session_dir, series)
+    if os.path.exists(path):
+        array = open_series(path)
+        df = pd.DataFrame({name: array[name] for name in array.dtype.names}, copy=False)
+    else:
+        paths = chunk_paths(session_dir, series)
+        if not paths:
+            legacy_path = os.path.join(session_dir, f"{series}.csv")
+            if not os.path.exists(legacy_path):
+                return None
+            paths = [legacy_path]
+        df = pd.concat((pd.read_csv(path) for path in paths), ignore_index=True)
+
+    if 'timestamp_ns' in df.columns:
+        df['timestamp'] = epoch_to_local(df['timestamp_ns'], unit='ns')
+    elif 'timestamp' in df.columns and pd.api.types.is_numeric_dtype(df['timestamp']):
+        df['timestamp'] = epoch_to_local(df['timestamp'], unit='s')
+    return df
+
+
+def epoch_to_local(values, unit: str = 's'):
+    """Converts epoch timestamps to naive datetimes in the local timezone."""
+    import pandas as pd
+
+    local_tz = datetime.now().astimezone().tzinfo
+    return pd.to_datetime(values, unit=unit, utc=True).dt.tz_convert(local_tz).dt.tz_localize(None)
+
+
+def series_names(session_dir: str) -> List[str]:
+    """Names of the series recorded in a session, in any of the storage formats."""
+    names = {os.path.basename(path)[:-len(SERIES_SUFFIX)]
+             for path in glob.glob(os.path.join(session_dir, "*" + SERIES_SUFFIX))}
+    names.update(os.path.basename(path).rsplit('-', 1)[0]
+                 for path in glob.glob(os.path.join(session_dir, CHUNK_DIR, "*-*.csv")))
+    names.update(os.path.splitext(os.path.basename(path))[0]
+                 for path in glob.glob(os.path.join(session_dir, "*.csv")))
+    return sorted(names)
+
+
+def load_session(session_dir: str) -> Dict:
+    """Loads the session info and every recorded series of a session."""
+    info_path = os.path.join(session_dir, "session_info.json")
+    info = {}
+    if os.path.exists(info_path):
+        with open(info_path) as f:
+            info = json.load(f)
+
+    return {
+        'info': info,
+        'series': {name: read_series(session_dir, name) for name in series_names(session_dir)},
+    }
+
+
+# Column names used by the CSVs of Process Monitor Tool.py (python_usage.csv,
+# go_usage.csv) mapped to the monitor's field names.
+LEGACY_COLUMNS = {
+    'Timestamp': 'timestamp',
+    'CPU %': 'cpu_percent',
+    'Memory (MB)': 'memory_rss_mb',
+}
+INTEGER_COLUMNS = ('pid', 'process_count')
+
+
+def load_samples(path: str):
+    """Loads samples from a session directory, a binary series file or a CSV.
+
+    CSVs may be any format convert_csv() accepts; the columns of Process
+    Monitor Tool.py are renamed to the monitor's field names. The result
+    always has a local ``timestamp`` column when the source has timestamps.
+    """
+    import pandas as pd
+
+    if os.path.isdir(path):
+        df = read_series(path)
+        if df is None:
+            raise ValueError(f"{path} has no recorded metrics")
+        return df
+    if path.endswith(SERIES_SUFFIX):
+        array = open_series(path)
+        df = pd.DataFrame({name: array[name] for name in array.dtype.names}, copy=False)
+        df['timestamp'] = epoch_to_local(df['timestamp_ns'], unit='ns')
+        return df
+
+    df = pd.read_csv(path).rename(columns=LEGACY_COLUMNS)
+    if 'timestamp_ns' in df.columns:
+        df['timestamp'] = epoch_to_local(df['timestamp_ns'], unit='ns')
+    elif 'timestamp' in df.columns:
+        if pd.api.types.is_numeric_dtype(df['timestamp']):
+            df['timestamp'] = epoch_to_local(df['timestamp'], unit='s')
+        else:
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+
+def convert_csv(csv_paths: Sequence[str], out_path: str, series: str = "metrics") -> int:
+    """Converts CSV samples into a binary series file.
+
+    Accepts the CSVs of Process Monitor Tool.py, the metrics.csv of older
+    monitor sessions, and CSV chunks. Formatted timestamps become
+    ``timestamp_ns``; non-numeric columns such as ``process_name`` are
+    dropped. Returns the number of samples written.
+    """
+    import pandas as pd
+
+    df = pd.concat((pd.read_csv(path) for path in csv_paths), ignore_index=True)
+    df = df.rename(columns=LEGACY_COLUMNS)
+
+    if 'timestamp' in df.columns and 'timestamp_ns' not in df.columns:
+        if pd.api.types.is_numeric_dtype(df['timestamp']):
+            df['timestamp_ns'] = (df['timestamp'] * 1e9).astype('int64')
+        else:
+            # Formatted timestamps were written in local time
+            local_tz = datetime.now().astimezone().tzinfo
+            parsed = pd.to_datetime(df['timestamp']).dt.tz_localize(local_tz)
+            df['timestamp_ns'] = parsed.dt.tz_convert('UTC').dt.tz_localize(None).astype('datetime64[ns]').astype('int64')
+    df = df.drop(columns=['timestamp'], errors='ignore')
+
+    fields = []
+    if 'timestamp_ns' in df.columns:
+        fields.append(('timestamp_ns', 'q'))
+    for name in df.columns:
+        if name == 'timestamp_ns' or not pd.api.types.is_numeric_dtype(df[name]):
+            continue
+        fields.append((name, 'i' if name in INTEGER_COLUMNS else 'd'))
+
+    buffer = SampleBuffer(fields, max(len(df), 1))
+    for values in df[[name for name, _ in fields]].itertuples(index=False):
+        buffer.append(values)
+
+    with open(out_path, 'wb') as f:
+        write_header(f, series, fields, buffer.record_size)
+        for segment in buffer._segments():
+            f.write(segment)
+    return len(df)
+
+
+def convert_session(session_dir: str) -> List[str]:
+    """Converts every CSV series of a session directory into binary series files."""
+    converted = []
+    for name in series_names(session_dir):
+        if os.path.exists(series_path(session_dir, name)):
+            continue
+        paths = chunk_paths(session_dir, name) or [os.path.join(session_dir, f"{name}.csv")]
+        convert_csv(paths, series_path(session_dir, name), name)
+        converted.append(name)
+    return converted
@@ -0,0 +1,490 @@
+import argparse
+import importlib
+import json
+import os
+import re
+import runpy
+import selectors
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Sequence
+
+# The modules GesturePlus spends its startup importing; ones not installed are skipped
+DEFAULT_PRELOAD = [
+    "numpy",
+    "cv2",
+    "mediapipe",
+    "PyQt6.QtCore",
+    "PyQt6.QtGui",
+    "PyQt6.QtWidgets",
+    "speech_recognition",
+    "pyttsx3",
+    "pynput.keyboard",
+]
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "gestureplus-zygote.sock")
+
+# Request framing: one JSON request with the worker's file descriptors attached
+MAX_REQUEST_BYTES = 65536
+MAX_FDS = 16
+# Seconds workers get to exit after SIGTERM when the zygote stops
+WORKER_GRACE = 5.0
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def preload(modules: Sequence[str]) -> Dict[str, float]:
+    """Imports ``modules``, returning the seconds each took; modules that fail to import get None."""
+    timings = {}
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            timings[name] = time.perf_counter() - start
+        except Exception as e:
+            print(f"Zygote: not preloading {name}: {e}")
+            timings[name] = None
+    return timings
+
+
+def native_thread_count() -> int:
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        return 1
+
+
+class ZygoteServer:
+    """Imports the heavy modules once, then forks a ready worker per request.
+
+    A worker starts as a copy of the server with everything already imported,
+    so running a script in it skips the imports a cold ``python script.py``
+    would do. The server is single-threaded (one selector loop over the
+    listening socket, client connections and a SIGCHLD wakeup pipe) because
+    forking a process that runs other threads can leave their locks held in
+    the child. Modules that start threads when imported are therefore a
+    problem; the server reports when it finds more than one thread after
+    preloading.
+
+    Each request carries the script, its arguments, environment, working
+    directory and launch settings, with the client's stdout/stderr pipes and
+    any ``pass_fds`` attached. The server answers with the worker's pid and,
+    once it has reaped the worker, with its exit code.
+    """
+
+    def __init__(self, path: str = DEFAULT_SOCKET, modules: Sequence[str] = DEFAULT_PRELOAD,
+                 parent_pid: int = None):
+        self.path = path
+        # A zygote started on someone's behalf exits once they are gone
+        self.parent_pid = parent_pid
+        self.modules = list(modules)
+        self.timings = {}
+        self.workers = {}
+        self.spawned = 0
+        self.wake_fds = ()
+
+    def serve(self):
+        start = time.perf_counter()
+        self.timings = preload(self.modules)
+        loaded = [name for name, seconds in self.timings.items() if seconds is not None]
+        print(f"Zygote: preloaded {len(loaded)} modules in {time.perf_counter() - start:.2f}s "
+              f"({', '.join(loaded) or 'none'})")
+        if native_thread_count() > 1:
+            print(f"Zygote: warning: {native_thread_count()} threads after preloading; "
+                  f"forked workers only get the thread that forked them")
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.path)
+        listener.listen(16)
+        wake_read, wake_write = os.pipe()
+        self.wake_fds = (wake_read, wake_write)
+        os.set_blocking(wake_read, False)
+        os.set_blocking(wake_write, False)
+        signal.set_wakeup_fd(wake_write)
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+        stop = []
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.append(signum))
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(listener, selectors.EVENT_READ, "listener")
+        self.selector.register(wake_read, selectors.EVENT_READ, "wake")
+        print(f"Zygote: listening on {self.path}", flush=True)
+        try:
+            while not stop:
+                if self.parent_pid is not None and os.getppid() != self.parent_pid:
+                    print("Zygote: parent exited")
+                    break
+                for key, _ in self.selector.select(timeout=1.0):
+                    if key.data == "listener":
+                        connection, _ = listener.accept()
+                        self.selector.register(connection, selectors.EVENT_READ, "request")
+                    elif key.data == "wake":
+                        try:
+                            os.read(wake_read, 4096)
+                        except BlockingIOError:
+                            pass
+                        self.reap()
+                    else:
+                        self.handle(key.fileobj)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            listener.close()
+            os.unlink(self.path)
+            self.stop_workers()
+            print(f"Zygote: stopped after {self.spawned} workers")
+
+    def handle(self, connection: socket.socket):
+        self.selector.unregister(connection)
+        try:
+            message, fds, _, _ = socket.recv_fds(connection, MAX_REQUEST_BYTES, MAX_FDS)
+        except OSError:
+            connection.close()
+            return
+        if not message:
+            connection.close()
+            return
+        try:
+            request = json.loads(message)
+            pid = os.fork()
+        except (ValueError, OSError) as e:
+            connection.sendall(json.dumps({"error": str(e)}).encode() + b"\n")
+            connection.close()
+            for fd in fds:
+                os.close(fd)
+            return
+        if pid == 0:
+            self.run_worker(request, fds, connection)
+        for fd in fds:
+            os.close(fd)
+        self.spawned += 1
+        self.workers[pid] = connection
+        connection.sendall(json.dumps({"pid": pid}).encode() + b"\n")
+
+    def reap(self):
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            connection = self.workers.pop(pid, None)
+            if connection is not None:
+                try:
+                    connection.sendall(json.dumps({"exit": os.waitstatus_to_exitcode(status)}).encode() + b"\n")
+                except OSError:
+                    pass
+                connection.close()
+
+    def stop_workers(self, grace: float = WORKER_GRACE):
+        """Sends SIGTERM to every running worker, then SIGKILL to those left after ``grace`` seconds."""
+        for signum, wait in ((signal.SIGTERM, grace), (signal.SIGKILL, grace)):
+            for pid in self.workers:
+                try:
+                    os.kill(pid, signum)
+                except ProcessLookupError:
+                    pass
+            deadline = time.monotonic() + wait
+            while self.workers and time.monotonic() < deadline:
+                self.reap()
+                time.sleep(0.05)
+
+    def run_worker(self, request: Dict, fds: List[int], connection: socket.socket):
+        """Becomes the requested script; never returns."""
+        code = 1
+        try:
+            signal.set_wakeup_fd(-1)
+            for signum in (signal.SIGCHLD, signal.SIGTERM):
+                signal.signal(signum, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            # Nothing of the server's stays open in the worker: listener, wakeup pipe, other clients
+            for key in list(self.selector.get_map().values()):
+                if isinstance(key.fileobj, socket.socket):
+                    key.fileobj.close()
+            self.selector.close()
+            connection.close()
+            for fd in self.wake_fds:
+                os.close(fd)
+            for other in self.workers.values():
+                other.close()
+
+            null = os.open(os.devnull, os.O_RDONLY)
+            os.dup2(null, 0)
+            os.dup2(fds[0], 1)
+            os.dup2(fds[1], 2)
+            for original, received in zip(request.get("pass_fds", []), fds[2:]):
+                os.dup2(received, original, inheritable=False)
+            for fd in set(fds + [null]) - {0, 1, 2} - set(request.get("pass_fds", [])):
+                os.close(fd)
+            sys.stdout = open(1, "w", buffering=1, closefd=False)
+            sys.stderr = open(2, "w", buffering=1, closefd=False)
+
+            os.environ.clear()
+            os.environ.update(request.get("env") or {})
+            os.chdir(request.get("cwd") or os.getcwd())
+            if request.get("settings"):
+                from run_parallel import apply_settings
+                apply_settings(request["settings"])
+
+            script = request["script"]
+            sys.argv = [script] + list(request.get("args", []))
+            sys.path[0] = os.path.dirname(os.path.abspath(script))
+            runpy.run_path(script, run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+        finally:
+            try:
+                import atexit
+                atexit._run_exitfuncs()
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(code)
+
+
+class ZygoteProcess:
+    """The client's handle on a worker, with the parts of subprocess.Popen run_parallel.py uses."""
+
+    def __init__(self, connection: socket.socket, pid: int, stdout, stderr):
+        self.connection = connection
+        self.pid = pid
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = None
+        self._buffer = b""
+
+    def _read_exit(self, timeout):
+        self.connection.settimeout(timeout)
+        while b"\n" not in self._buffer:
+            chunk = self.connection.recv(4096)
+            if not chunk:
+                # The zygote went away without reporting; the worker's status is unknown
+                self.returncode = -1 if self.returncode is None else self.returncode
+                return
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        self.returncode = json.loads(line)["exit"]
+        self.connection.close()
+
+    def poll(self):
+        if self.returncode is None:
+            try:
+                self._read_exit(0)
+            except (BlockingIOError, socket.timeout):
+                pass
+        return self.returncode
+
+    def wait(self, timeout: float = None):
+        if self.returncode is None:
+            try:
+                self._read_exit(timeout)
+            except socket.timeout:
+                raise subprocess.TimeoutExpired(f"zygote worker {self.pid}", timeout)
+        return self.returncode
+
+    def send_signal(self, signum: int):
+        if self.returncode is None:
+            try:
+                os.kill(self.pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+class ZygoteClient:
+    def __init__(self, path: str = DEFAULT_SOCKET):
+        self.path = path
+
+    def available(self) -> bool:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(self.path)
+            return True
+        except OSError:
+            return False
+
+    def spawn(self, script: str, args: Sequence[str] = (), env: Dict[str, str] = None, cwd: str = None,
+              settings: Dict = None, pass_fds: Sequence[int] = ()) -> ZygoteProcess:
+        """Runs ``script`` in a worker forked from the zygote, its output on pipes like Popen's."""
+        out_read, out_write = os.pipe()
+        err_read, err_write = os.pipe()
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(self.path)
+            request = {
+                "script": os.path.abspath(script),
+                "args": list(args),
+                "env": dict(os.environ if env is None else env),
+                "cwd": cwd or os.getcwd(),
+                "settings": settings or {},
+                "pass_fds": list(pass_fds),
+            }
+            socket.send_fds(connection, [json.dumps(request).encode()], [out_write, err_write, *pass_fds])
+            reply = b""
+            while not reply.endswith(b"\n"):
+                chunk = connection.recv(4096)
+                if not chunk:
+                    raise OSError("zygote closed the connection")
+                reply += chunk
+            reply = json.loads(reply)
+            if "error" in reply:
+                raise OSError(f"zygote could not start {script}: {reply['error']}")
+        except BaseException:
+            connection.close()
+            for fd in (out_read, err_read):
+                os.close(fd)
+            raise
+        finally:
+            os.close(out_write)
+            os.close(err_write)
+        return ZygoteProcess(connection, reply["pid"], open(out_read, "rb"), open(err_read, "rb"))
+
+
+def start_server(path: str = DEFAULT_SOCKET, modules: Sequence[str] = DEFAULT_PRELOAD,
+                 timeout: float = 120.0) -> subprocess.Popen:
+    """Starts a zygote in the background and waits until it accepts requests.
+
+    The zygote and the workers it forks stay in our session and process group,
+    so Ctrl+C in our terminal reaches them as it would reach plain children.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "serve", "--socket", path,
+               "--preload", ",".join(modules), "--parent-pid", str(os.getpid())]
+    server = subprocess.Popen(command)
+    client = ZygoteClient(path)
+    deadline = time.monotonic() + timeout
+    while not client.available():
+        if server.poll() is not None:
+            raise RuntimeError(f"zygote exited with code {server.returncode} while preloading")
+        if time.monotonic() > deadline:
+            server.terminate()
+            raise RuntimeError(f"zygote was not ready after {timeout:.0f}s")
+        time.sleep(0.05)
+    return server
+
+
+def import_profile(module: str) -> List[Dict]:
+    """Every import ``import module`` triggers in a fresh interpreter, from ``python -X importtime``."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append({"module": name, "self_ms": int(self_us) / 1000,
+                            "cumulative_ms": int(cumulative_us) / 1000, "depth": len(indent) // 2})
+    if result.returncode != 0:
+        return None
+    return imports
+
+
+def time_to_ready(command_or_spawn, runs: int) -> List[float]:
+    """Milliseconds from launch until the probe script prints its first line, per run."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = command_or_spawn()
+        process.stdout.readline()
+        times.append((time.perf_counter() - start) * 1000)
+        process.wait()
+        process.stdout.close()
+        process.stderr.close()
+    return times
+
+
+def profile_report(modules: Sequence[str], runs: int, top: int) -> Dict:
+    """Where startup time goes: import costs per module, then a cold start against a zygote start."""
+    report = {"modules": {}, "heaviest_imports": []}
+    installed = []
+    print(f"{'module':<24}{'import ms':>10}")
+    all_imports = {}
+    for module in modules:
+        imports = import_profile(module)
+        if imports is None:
+            print(f"{module:<24}{'not installed':>10}")
+            continue
+        installed.append(module)
+        total = next((entry["cumulative_ms"] for entry in reversed(imports) if entry["module"] == module),
+                     sum(entry["self_ms"] for entry in imports))
+        report["modules"][module] = total
+        print(f"{module:<24}{total:>10.1f}")
+        for entry in imports:
+            all_imports.setdefault(entry["module"], entry)
+
+    heaviest = sorted(all_imports.values(), key=lambda entry: entry["self_ms"], reverse=True)[:top]
+    report["heaviest_imports"] = heaviest
+    print(f"\nHeaviest single imports (own time, excluding what they import):")
+    for entry in heaviest:
+        print(f"  {entry['module']:<40}{entry['self_ms']:>8.1f} ms")
+
+    with tempfile.TemporaryDirectory(prefix="zygote_profile_") as directory:
+        probe = os.path.join(directory, "probe.py")
+        with open(probe, "w") as f:
+            f.write("".join(f"import {module}\n" for module in installed) + "print('ready', flush=True)\n")
+        cold = time_to_ready(lambda: subprocess.Popen([sys.executable, probe], stdout=subprocess.PIPE,
+                                                      stderr=subprocess.PIPE), runs)
+        path = os.path.join(directory, "zygote.sock")
+        preload_start = time.perf_counter()
+        server = start_server(path, installed)
+        preload_ms = (time.perf_counter() - preload_start) * 1000
+        try:
+            client = ZygoteClient(path)
+            warm = time_to_ready(lambda: client.spawn(probe), runs)
+        finally:
+            server.terminate()
+            server.wait()
+
+    report["cold_ms"] = cold
+    report["zygote_ms"] = warm
+    report["zygote_preload_ms"] = preload_ms
+    print(f"\nTime until a script importing {len(installed)} modules is running ({runs} runs):")
+    print(f"  cold python:  mean {statistics.fmean(cold):8.1f} ms, min {min(cold):8.1f} ms")
+    print(f"  zygote fork:  mean {statistics.fmean(warm):8.1f} ms, min {min(warm):8.1f} ms "
+          f"(after a one-off {preload_ms:.0f} ms preload)")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-warmed process server for the GesturePlus modules")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="Preload modules and fork workers on request")
+    serve_parser.add_argument("--socket", type=str, default=DEFAULT_SOCKET, help="Unix socket to listen on")
+    serve_parser.add_argument("--preload", type=str, default=",".join(DEFAULT_PRELOAD),
+                              help="Comma-separated modules to import before serving")
+    serve_parser.add_argument("--parent-pid", type=int, help="Exit when this process is no longer our parent")
+    profile_parser = subparsers.add_parser("profile", help="Report where startup time goes, with and without a zygote")
+    profile_parser.add_argument("--modules", type=str, default=",".join(DEFAULT_PRELOAD),
+                                help="Comma-separated modules to profile")
+    profile_parser.add_argument("--runs", type=int, default=5, help="Launches timed per mode")
+    profile_parser.add_argument("--top", type=int, default=15, help="Heaviest imports to list")
+    profile_parser.add_argument("--json", type=str, help="Also write the report to this file")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        ZygoteServer(args.socket, [name for name in args.preload.split(",") if name], args.parent_pid).serve()
+    else:
+        report = profile_report([name for name in args.modules.split(",") if name], args.runs, args.top)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()